@@ -3,20 +3,24 @@ import csv
 from datetime import datetime
 from importlib import import_module
 from io import StringIO
-from os.path import isfile
+from os.path import exists, isdir, isfile
+from utils.cache import load_cached
 from utils.dgh import CsvDGH
-from modules.constraint_generation import constraint_generation
+from modules.constraint_generation import release_buckets
 from modules.k_anonymization import k_anonymization
 from modules.program_execution import program_execution
 from utils.exception import ArgumentError
-from utils.utils import log, debug, strTypeVal
+from utils.table import ColumnarTable, SpilledTable
+from utils.utils import log, debug
+from utils.writer import CsvReleaseWriter
 
 _DEBUG = True
 
 
 class _Table:
 
-    def __init__(self, pt_path: str, dgh_paths: dict):
+    def __init__(self, pt_path: str, dgh_paths: dict, chunk_size=10000, cache_dir: str = None,
+                 spill_dir: str = None, release_threads=0, high_water=1000, bit_vectors=False):
 
         """
         Instantiates a table and the specified Domain Generalization Hierarchies from the
@@ -25,6 +29,16 @@ class _Table:
         :param pt_path:                 Path to the table to anonymize.
         :param dgh_paths:               Dictionary whose values are paths to DGH files and whose keys
                                         are the corresponding attribute names.
+        :param chunk_size:              Number of rows of the batches read from the table file.
+        :param cache_dir:               Path to the cache directory of the parsed DGHs and data constraints,
+                                        None to parse them at every run.
+        :param spill_dir:               Path to the directory where the path condition buckets are spilled
+                                        while the table is read, None to keep them in memory.
+        :param release_threads:         Number of threads that solve in background the release data of the
+                                        next path condition buckets, 0 to solve every bucket when it's written.
+        :param high_water:              Maximum number of release data solved in background and not yet written.
+        :param bit_vectors:             If True the attributes with a bounded domain are bit-vectors for the
+                                        solver, instead of integers.
         :raises IOError:                If a file cannot be read.
         :raises FileNotFoundError:      If a file cannot be found.
         """
@@ -44,25 +58,46 @@ class _Table:
         """
         self.string_dict = dict()
         """
-        Dictionary of input strings to build the domain of all attributes that contains only strings.
+        Dictionary whose keys are the attributes that contains only strings and whose values are the
+        encoders of their domains.
         """
-        self.raw_dataset = []
+        self.chunk_size = chunk_size
         """
-        List of raw dataset of data input extracted from the table.
+        Number of rows of the batches read from the table file.
+        """
+        self.cache_dir = cache_dir
+        """
+        Path to the cache directory of the parsed DGHs and data constraints, None if they are not cached.
+        """
+        self.spill_dir = spill_dir
+        """
+        Path to the directory where the path condition buckets are spilled, None if they are kept in memory.
+        """
+        self.release_threads = release_threads
+        """
+        Number of threads that solve in background the release data of the next path condition buckets.
+        """
+        self.high_water = high_water
+        """
+        Maximum number of release data solved in background and not yet written.
+        """
+        self.bit_vectors = bit_vectors
+        """
+        If True the attributes with a bounded domain are bit-vectors for the solver, instead of integers.
         """
         self.pc_buckets = dict()
         """
         Dictionary of path condition buckets whose key is result of path condition and whose values
         are corresponding raw dataset that satisfy the path condition.
         """
-        self.anonymized = []
+        self.release_count = 0
         """
-        List of tuples that contains the tuple anonymized, the path condition and the list
-        of all tuples of path condition not anonymized.
+        Number of release data written to the output file, that is the output of the algorithm.
         """
-        self.release_dataset = []
+        self.decimals = dict()
         """
-        List of tuples that contains the release data, that is the output of the algorithm.
+        Dictionary whose keys are the attributes of decimals and whose values are the maximum numbers of decimals
+        of their values in the table, used to scale their values for the solver.
         """
         self.constructed_set = dict()
         """
@@ -75,7 +110,7 @@ class _Table:
         """
         self.generic_values = dict()
         """
-        Dictionary of all generic values of all attributes.
+        Dictionary whose keys are the attribute names and whose values are the sets of their generic values.
         """
         self.dghs = dict()
         """
@@ -84,6 +119,11 @@ class _Table:
         """
         for attribute in dgh_paths:
             self._add_dgh(dgh_paths[attribute], attribute)
+        self.generalizations = dict()
+        """
+        Look up table whose keys are triples (attribute, value, level) and whose values are the
+        generalized values, shared by the k-anonymization of all the path condition buckets.
+        """
 
     def __del__(self):
 
@@ -94,7 +134,7 @@ class _Table:
         self.table.close()
 
     def kb_anonymity(self, qi_names: list, subject_program: str, data_constraints: str, k: int, conf_opt: str,
-                     output: str, tuple_fields: list, is_anonymized=False, v=False):
+                     output: str, tuple_fields: list, is_anonymized=False, workers=1, algorithm="greedy", v=False):
 
         """
         The algorithm of kb-anonymity, that apply the 3 steps to do it:
@@ -111,26 +151,32 @@ class _Table:
         :param is_anonymized:            If True I anonymize the requirement using anonymized dataset,
                                          else I use raw dataset.
         :param tuple_fields:             List of fields that are included in constraints to have no tuple repeat.
+        :param workers:                  Number of processes that execute the subject program on the batches and
+                                         solve the path condition buckets in parallel.
+        :param algorithm:                Algorithm of generalization of the k-anonymization ("greedy", "ola" or
+                                         "mondrian").
         :param v:                        If True prints some logging.
         :raises argparse.ArgumentError:  If a field constraint not exist in raw dataset labels.
         """
 
-        self.program_execution_module(subject_program, k, v)
+        self.program_execution_module(subject_program, k, workers=workers, v=v)
+        # The buckets go one at a time through the k-anonymization and the constraint generation, so every
+        # bucket is released as soon as it's anonymized, without waiting for the other buckets
         if is_anonymized:
-            self.k_anonymization_module(qi_names, k, conf_opt == 'I-T', v)
+            buckets = self.k_anonymization_module(qi_names, k, conf_opt == 'I-T', algorithm, v)
         else:
-            for pc, R in self.pc_buckets.items():
-                for raw in R:
-                    self.anonymized.append((raw, pc, R))
-        self.constraint_generation_module(conf_opt, data_constraints, output, tuple_fields, is_anonymized, v)
+            buckets = ((pc, R, R) for pc, R in self._pop_buckets())
+        self.constraint_generation_module(conf_opt, data_constraints, output, tuple_fields, buckets, workers, v)
 
-    def program_execution_module(self, subject_program: str, k: int, v=True):
+    def program_execution_module(self, subject_program: str, k: int, workers=1, v=True):
 
         """
         The definition of the program execution module.
 
         :param subject_program:          Path to the file that contains path conditions.
         :param k:                        Level of anonymity.
+        :param workers:                  Number of processes that execute the subject program on the batches
+                                         in parallel.
         :param v:                        If True prints some logging.
         """
 
@@ -141,36 +187,13 @@ class _Table:
 
         log("[LOG] Start Program Execution Module.", endl=True, enabled=v)
 
-        string_elements_indexes = []
-
-        # Read all data from the input csv file
-        for i, row in enumerate(self.table):
-            # i = index row
-            # row value
-            raw_dataset = self._get_values(row, i)
-
-            # Save indexes of string dataset elements
-            if i == 0:
-                for n, val in enumerate(raw_dataset):
-                    if strTypeVal(val) == "str":
-                        string_elements_indexes.append(n)
-                        attr = list(self.attributes.keys())[n]
-                        self.string_dict.setdefault(attr, [])
-                        self.string_dict[attr].append(val)
-            else:
-                for n in string_elements_indexes:
-                    attr = list(self.attributes.keys())[n]
-                    if raw_dataset[n] not in self.string_dict[attr]:
-                        self.string_dict[attr].append(raw_dataset[n])
-
-            # Save the raw dataset in the list
-            self.raw_dataset.append(raw_dataset)
-
-        self.pc_buckets = program_execution(self.raw_dataset, self.attributes, self.string_dict, subject_program, k, v)
+        # Read all data from the input file by batches, executed as soon as they are read
+        self.pc_buckets = program_execution(self._read_batches(), self.attributes, self.string_dict,
+                                            subject_program, k, workers, self.spill_dir, v)
 
         log("[LOG] End Program Execution Module.", endl=True, enabled=v)
 
-    def k_anonymization_module(self, qi_names: list, k: int, is_it_opt=False, v=True):
+    def k_anonymization_module(self, qi_names: list, k: int, is_it_opt=False, algorithm="greedy", v=True):
 
         """
         The definition of the k-anonymization module.
@@ -178,7 +201,10 @@ class _Table:
         :param qi_names:    List of names of the Quasi Identifiers attributes to consider during k-anonymization.
         :param k:           Level of anonymity.
         :param is_it_opt:   If True the configuration option is I-T.
+        :param algorithm:   Algorithm of generalization ("greedy", "ola" or "mondrian").
         :param v:           If True prints some logging.
+        :return:            Generator of the anonymized buckets, as triples (pc, B, list of the anonymized tuples
+                            of B), in the order of the buckets.
         :raises KeyError:   If a QI attribute name is not valid.
         """
 
@@ -189,15 +215,26 @@ class _Table:
 
         log("[LOG] Start k-Anonymization Module.", endl=True, enabled=v)
 
-        for pc, B in self.pc_buckets.items():
+        # Statistics of the lattice search of all the buckets
+        stats = dict()
+
+        for pc, B in self._pop_buckets():
             pc_anonym = k_anonymization(pc, B, self.attributes, qi_names, k, self.dghs,
-                                        self.generic_values, is_it_opt, v)
-            self.anonymized.extend(pc_anonym)
+                                        self.generic_values, is_it_opt, self.generalizations, algorithm, stats, v)
+            # Skip the buckets whose values are not in the hierarchies (the error is already logged)
+            # and the buckets whose tuples are all suppressed
+            if pc_anonym is not None and len(pc_anonym) != 0:
+                yield pc, B, [anon_data for anon_data, _, _ in pc_anonym]
+
+        if algorithm == "ola":
+            log("[LOG] Evaluated {0} of {1} lattice nodes.".format(stats.get("evaluated_nodes", 0),
+                                                                   stats.get("lattice_nodes", 0)),
+                endl=True, enabled=v)
 
         log("[LOG] End Program Execution Module.", endl=True, enabled=v)
 
     def constraint_generation_module(self, conf_opt: str, data_constraints: str, output: str, tuple_fields: list,
-                                     is_anonymized=False, v=True):
+                                     buckets, workers=1, v=True):
 
         """
         The definition of the constraint generation module.
@@ -206,8 +243,9 @@ class _Table:
         :param data_constraints: Path to the file that contains data constraints.
         :param output:           Path to the output file.
         :param tuple_fields:     List of fields that are included in constraints to have no tuple repeat.
-        :param is_anonymized:    If True I anonymize the requirements using anonymized dataset,
-                                 else I use raw dataset.
+        :param buckets:          Iterable of the buckets to release, as triples (pc, B, list of the tuples of B,
+                                 raw or anonymized).
+        :param workers:          Number of processes that solve the path condition buckets in parallel.
         :param v:                If True prints some logging.
         """
 
@@ -218,28 +256,43 @@ class _Table:
 
         log("[LOG] Start Constraint Generation Module.", endl=True, enabled=v)
 
-        self.release_dataset = constraint_generation(self.anonymized, tuple(self.attributes.keys()),
-                                                     tuple_fields, self.string_dict, conf_opt,
-                                                     data_constraints, self.generic_values, v)
-
-        log("[LOG] End Constraint Generation Module.", endl=True, enabled=v)
-
         debug("[DEBUG] Creating the output file...", _DEBUG)
         try:
-            output_file = open(output, 'w')
+            release_writer = self._open_release(output)
         except IOError:
             raise
         log("[LOG] Created output file.", endl=True, enabled=v)
 
-        print(','.join(list(self.release_dataset[0].keys())) + "\n", file=output_file, end="")
+        # The release data of every bucket are written as soon as the bucket is solved
+        with release_writer:
+            for release in release_buckets(buckets, tuple(self.attributes.keys()), tuple_fields,
+                                           self.string_dict, conf_opt, data_constraints, self.generic_values,
+                                           workers, self.cache_dir, self.decimals, self.release_threads,
+                                           self.high_water, self._sorts(), v):
+                release_writer.write(release)
 
-        for raw in self.release_dataset:
-            print(','.join(list(raw.values())) + "\n", file=output_file, end="")
+        self.release_count = release_writer.count
 
-        output_file.close()
+        log("[LOG] End Constraint Generation Module.", endl=True, enabled=v)
+        log("[LOG] Written {0} release data.".format(self.release_count), endl=True, enabled=v)
 
         log("[LOG] All done.", endl=True, enabled=v)
 
+    def _pop_buckets(self):
+
+        """
+        Removes the path condition buckets one at a time, in order, so that every bucket can be released
+        from memory as soon as it has been processed. The spilled buckets are loaded from disk only when
+        they are removed, so only the buckets being processed are in memory.
+
+        :return:            Generator of couples (pc, B).
+        :raises IOError:    If a spilled bucket cannot be read.
+        """
+
+        for pc in list(self.pc_buckets):
+            B = self.pc_buckets.pop(pc)
+            yield pc, B.load() if isinstance(B, SpilledTable) else B
+
     def _init_table(self, pt_path: str):
 
         """
@@ -251,16 +304,82 @@ class _Table:
         """
 
         try:
-            self.table = open(pt_path, 'r')
+            self.table = open(pt_path, 'r', newline='')
         except FileNotFoundError:
             raise
 
-    def _get_values(self, row: str, row_index=None):
+    def _read_batches(self):
+
+        """
+        Reads the rows of the table file by batches of chunk size rows.
+
+        :return:            Generator of columnar tables, where the strings are encoded in the domain of
+                            their attribute.
+        :raises IOError:    If a row cannot be read.
+        """
+
+        batch = ColumnarTable(self.attributes, self.string_dict)
+
+        for i, row in enumerate(self._get_rows()):
+            # i = index row
+            # row value
+            values = self._get_values(row, i)
+            if values is None:
+                continue
+
+            # Save the values in the batch, converted to the types of the columns
+            try:
+                batch.append(values)
+            except ValueError as error:
+                raise IOError(None, "Row {0} can't be read: {1}".format(i + 1, error), self.table.name)
+
+            if len(batch) == self.chunk_size:
+                self._add_decimals(batch)
+                yield batch
+                batch = ColumnarTable(self.attributes, self.string_dict, batch.types)
+
+        if len(batch) != 0:
+            self._add_decimals(batch)
+            yield batch
+
+    def _sorts(self):
+
+        """
+        Gets the sorts of the attributes for the solver.
+
+        :return:    Dictionary whose keys are the attributes names and whose values are their sorts, None if they
+                    are all integers.
+        """
+
+        return dict((attribute, "bitvec") for attribute in self.attributes) if self.bit_vectors else None
+
+    def _add_decimals(self, batch: ColumnarTable):
+
+        """
+        Updates the numbers of decimals of the attributes with the values of a batch.
+
+        :param batch:   Columnar table of a batch of the table file.
+        """
+
+        for attribute, decimals in batch.decimals().items():
+            self.decimals[attribute] = max(self.decimals.get(attribute, 0), decimals)
+
+    def _get_rows(self):
+
+        """
+        Gets the rows of the table file after the attributes.
+
+        :return:    Iterator of the rows of the table file.
+        """
+
+        return self.table
+
+    def _get_values(self, row, row_index=None):
 
         """
         Gets the row values from the file.
 
-        :param row:         Line of the table file.
+        :param row:         Row of the table file.
         :param row_index:   Index of the row in the table file.
         :return:            List of corresponding values if valid, None if this row must be ignored.
         :raises KeyError:   If an attribute name is not valid.
@@ -268,9 +387,11 @@ class _Table:
         """
 
         # Ignore empty lines:
-        if row.strip() == '':
+        if ''.join(row).strip() == '':
             return None
 
+        return row
+
     def _set_values(self, row, values, attributes: list) -> str:
 
         """
@@ -284,6 +405,18 @@ class _Table:
 
         pass
 
+    def _open_release(self, output: str):
+
+        """
+        Opens the output file of the release data.
+
+        :param output:      Path to the output file.
+        :return:            Writer of the release data, which writes them by batches.
+        :raises IOError:    If the file cannot be written.
+        """
+
+        pass
+
     def _add_dgh(self, dgh_path: str, attribute: str):
 
         """
@@ -300,58 +433,63 @@ class _Table:
 
 class CsvTable(_Table):
 
-    def __init__(self, pt_path: str, dgh_paths: dict):
+    def __init__(self, pt_path: str, dgh_paths: dict, chunk_size=10000, cache_dir: str = None,
+                 spill_dir: str = None, release_threads=0, high_water=1000, bit_vectors=False):
+
+        self.csv_reader = None
+        """
+        Reader of the rows of the table file.
+        """
 
-        super().__init__(pt_path, dgh_paths)
+        super().__init__(pt_path, dgh_paths, chunk_size, cache_dir, spill_dir, release_threads, high_water,
+                         bit_vectors)
 
     def __del__(self):
 
         super().__del__()
 
     def kb_anonymity(self, qi_names, subject_program, data_constraints, k, conf_opt, output,
-                     tuple_fields, is_anonymized=False, v=False):
+                     tuple_fields, is_anonymized=False, workers=1, algorithm="greedy", v=False):
 
         super().kb_anonymity(qi_names, subject_program, data_constraints, k, conf_opt, output,
-                             tuple_fields, is_anonymized, v)
+                             tuple_fields, is_anonymized, workers, algorithm, v)
 
-    def program_execution_module(self, subject_program, k, is_anonymized=False, v=False):
+    def program_execution_module(self, subject_program, k, is_anonymized=False, workers=1, v=False):
 
-        super().program_execution_module(subject_program, k, v)
+        super().program_execution_module(subject_program, k, workers, v)
 
-    def k_anonymization_module(self, qi_names, k, is_it_opt=False, v=False):
+    def k_anonymization_module(self, qi_names, k, is_it_opt=False, algorithm="greedy", v=False):
 
-        super().k_anonymization_module(qi_names, k, is_it_opt, v)
+        return super().k_anonymization_module(qi_names, k, is_it_opt, algorithm, v)
 
     def constraint_generation_module(self, conf_opt, data_constraints, output, tuple_fields,
-                                     is_anonymized=False, v=False):
+                                     buckets, workers=1, v=False):
 
-        super().constraint_generation_module(conf_opt, data_constraints, output, tuple_fields, is_anonymized, v)
+        super().constraint_generation_module(conf_opt, data_constraints, output, tuple_fields, buckets,
+                                             workers, v)
 
     def _init_table(self, pt_path):
 
         super()._init_table(pt_path)
 
+        # A single reader parses all the rows of the file:
         try:
-            csv_reader = csv.reader(StringIO(next(self.table)))
+            self.csv_reader = csv.reader(self.table)
         except IOError:
             raise
 
         # Initialize the dictionary of table attributes:
-        for i, attribute in enumerate(next(csv_reader)):
+        for i, attribute in enumerate(next(self.csv_reader)):
             self.attributes[attribute] = i
 
-    def _get_values(self, row: str, row_index=None):
+    def _get_rows(self):
 
-        super()._get_values(row, row_index)
+        return self.csv_reader
 
-        # Try to parse the row:
-        try:
-            csv_reader = csv.reader(StringIO(row))
-        except IOError:
-            raise
-        parsed_row = next(csv_reader)
+    def _get_values(self, row: list, row_index=None):
 
-        return parsed_row
+        # The row is already parsed by the reader:
+        return super()._get_values(row, row_index)
 
     def _set_values(self, row: list, values, attributes: list):
 
@@ -363,18 +501,17 @@ class CsvTable(_Table):
 
         return values.getvalue()
 
+    def _open_release(self, output):
+
+        return CsvReleaseWriter(output)
+
     def _add_dgh(self, dgh_path, attribute):
 
         try:
-            self.dghs[attribute] = CsvDGH(dgh_path)
-
-            with open(dgh_path) as f:
-                lines = f.read().splitlines()
-            self.generic_values.setdefault(attribute, [])
-            for l in lines:
-                for i, value in enumerate(l.split(',')):
-                    if i != 0 and value not in self.generic_values[attribute]:
-                        self.generic_values[attribute].append(value)
+            # The DGH is parsed only if its file has changed since it was cached:
+            self.dghs[attribute] = load_cached(dgh_path, "dgh", lambda: CsvDGH(dgh_path), self.cache_dir)
+            # The generic values are collected by the DGH while reading its file:
+            self.generic_values[attribute] = self.dghs[attribute].generic_values
 
         except FileNotFoundError:
             raise
@@ -403,6 +540,28 @@ if __name__ == "__main__":
     parser.add_argument("-tf", "--tuple_fields", nargs='+', default=None,
                         type=str, help="Fields used to have the no tuple repeat (only used with P-T option).")
     parser.add_argument("-o", "--output", type=str, help="Path to the output file.")
+    parser.add_argument("-cs", "--chunk_size", type=int, default=10000,
+                        help="Number of rows of the batches read from the raw dataset.")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="Number of processes that execute the subject program and solve the path "
+                             "condition buckets in parallel.")
+    parser.add_argument("-ka", "--k_algorithm", choices=['greedy', 'ola', 'mondrian'], default='greedy',
+                        type=str, help="Algorithm of generalization of the k-anonymization, value can be only: "
+                                       "greedy, ola or mondrian (numeric QIs without generalization files).")
+    parser.add_argument("-cd", "--cache_dir", type=str, default=None,
+                        help="Path to the cache directory of the parsed generalization files and data constraints, "
+                             "which are parsed again only when they change.")
+    parser.add_argument("-sd", "--spill_dir", type=str, default=None,
+                        help="Path to the directory where the path condition buckets are spilled while the raw "
+                             "dataset is read, to process tables larger than the memory one bucket at a time.")
+    parser.add_argument("-rt", "--release_threads", type=int, default=0,
+                        help="Number of threads that solve in background the release data of the next path "
+                             "condition buckets while the next buckets are anonymized.")
+    parser.add_argument("-hw", "--high_water", type=int, default=1000,
+                        help="Maximum number of release data solved in background and not yet written.")
+    parser.add_argument("-bv", "--bit_vectors", action="store_true",
+                        help="The attributes with a bounded domain are bit-vectors for the solver, instead of "
+                             "integers.")
 
     args = parser.parse_args()
 
@@ -429,6 +588,35 @@ if __name__ == "__main__":
                                         message="Domain generation hierarchy file {0} isn't a file "
                                                 "or it doesn't exist.".format(dghs_file))
 
+        if args.chunk_size < 1:
+            raise ArgumentError(argument="-cs | --chunk_size", value=args.chunk_size,
+                                message="Chunk size must be at least 1.")
+
+        if args.cache_dir is not None and exists(args.cache_dir) and not isdir(args.cache_dir):
+            raise ArgumentError(argument="-cd | --cache_dir", value=args.cache_dir,
+                                message="Cache directory isn't a directory.")
+
+        if args.spill_dir is not None and not isdir(args.spill_dir):
+            raise ArgumentError(argument="-sd | --spill_dir", value=args.spill_dir,
+                                message="Spill directory isn't a directory or it doesn't exist.")
+
+        if args.workers < 1:
+            raise ArgumentError(argument="-w | --workers", value=args.workers,
+                                message="Number of workers must be at least 1.")
+
+        if args.release_threads < 0:
+            raise ArgumentError(argument="-rt | --release_threads", value=args.release_threads,
+                                message="Number of release threads can't be negative.")
+
+        if args.release_threads > 0 and args.workers > 1:
+            raise ArgumentError(argument="-rt | --release_threads", value=args.release_threads,
+                                argument2="-w | --workers", value2=args.workers,
+                                message="Release threads can't be used with more than one worker.")
+
+        if args.high_water < 1:
+            raise ArgumentError(argument="-hw | --high_water", value=args.high_water,
+                                message="High-water mark must be at least 1.")
+
         if args.tuple_fields is not None and args.configuration_option != "P-T":
             raise ArgumentError(argument="-co | --configuration_option", value=args.configuration_option,
                                 message="Tuple fields must set only with P-T configuration.")
@@ -448,12 +636,17 @@ if __name__ == "__main__":
                                 argument2="-qi | --quasi_identifier", value2=args.quasi_identifier,
                                 message="If raw dataset is not anonymized, mustn't insert arg quasi_identifier.")
 
-        if args.anonymized and args.domain_gen_hierarchies is None:
+        if args.anonymized and args.domain_gen_hierarchies is None and args.k_algorithm != "mondrian":
             raise ArgumentError(argument="-a | --anonymized", value=args.anonymized,
                                 argument2="-dgh | --domain_gen_hierarchies", value2=args.domain_gen_hierarchies,
                                 message="If the raw dataset is anonymized, "
                                         "must insert arg domain_gen_hierarchies.")
 
+        if args.k_algorithm == "mondrian" and args.domain_gen_hierarchies is not None:
+            raise ArgumentError(argument="-ka | --k_algorithm", value=args.k_algorithm,
+                                argument2="-dgh | --domain_gen_hierarchies", value2=args.domain_gen_hierarchies,
+                                message="Mondrian doesn't use the domain_gen_hierarchies.")
+
         if not args.anonymized and args.domain_gen_hierarchies is not None:
             raise ArgumentError(argument="-a | --anonymized", value=args.anonymized,
                                 argument2="-dgh | --domain_gen_hierarchies", value2=args.domain_gen_hierarchies,
@@ -467,10 +660,12 @@ if __name__ == "__main__":
             for i, qi_name in enumerate(args.quasi_identifier):
                 dgh_paths[qi_name] = args.domain_gen_hierarchies[i]
 
-        table = CsvTable(args.raw_dataset, dgh_paths)
+        table = CsvTable(args.raw_dataset, dgh_paths, args.chunk_size, args.cache_dir, args.spill_dir,
+                         args.release_threads, args.high_water, args.bit_vectors)
 
         table.kb_anonymity(args.quasi_identifier, args.subject_program, args.data_constraints, args.k,
-                           args.configuration_option, args.output, args.tuple_fields, args.anonymized, v=True)
+                           args.configuration_option, args.output, args.tuple_fields, args.anonymized,
+                           args.workers, args.k_algorithm, v=True)
 
         end = (datetime.now() - start).total_seconds()
 
@@ -483,6 +678,8 @@ if __name__ == "__main__":
     except IOError as error:
         log("[ERROR] There has been an error with reading file '{0}'.".format(error.filename),
             endl=True, enabled=True)
+        if error.strerror is not None:
+            log("[ERROR] {0}".format(error.strerror), endl=True, enabled=True)
     except KeyError as error:
         if len(error.args) > 0:
             log("[ERROR] Attribute '{0}' is not valid.".format(error.args[0]), endl=True, enabled=True)
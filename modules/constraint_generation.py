@@ -1,50 +1,92 @@
 import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 from modules.constraint_solver import ConstraintSolver
+from utils.release_pool import ReleasePool
+from utils.table import ColumnarTable
 from utils.utils import log, strToVal
 
 
-def algorithm2(T: list, attributes: tuple, string_dict: dict):
+def exclusion_constraints(T: list, fields, attributes: tuple, string_dict: dict, exclusions: dict = None):
     """
-    Application of algorithm 2 to T list to build a set of constraints for same path, no field repeat
+    Builds in one pass on T the deduplicated set of values of each field, so that every field is excluded
+    from all its values with a single not-in-set constraint instead of one disequality for each tuple.
     :param T:                       Set of raw tuples.
+    :param fields:                  Names of the attributes to exclude from their values in T.
     :param attributes:              Name attributes of raw dataset.
     :param string_dict:             Dictionary of input strings domain of all attributes that contains only strings.
-    :return:                        Conjunctive set of constraints for P-F.
+    :param exclusions:              Dictionary whose keys are fields and whose values are their constraints already
+                                    built on T (None if a field has no values), updated with the missing fields,
+                                    so that the tuples of the same bucket share the same constraints.
+    :return:                        List of constraints (attr, "not in", values), one for each field.
     """
 
-    S = []
+    if exclusions is not None:
+        missing = [attr for attr in attributes if attr in fields and attr not in exclusions]
+        if len(missing) != 0:
+            for constraint in exclusion_constraints(T, missing, attributes, string_dict):
+                exclusions[constraint[0]] = constraint
+            for attr in missing:
+                exclusions.setdefault(attr, None)
+        return [exclusions[attr] for attr in attributes if attr in fields and exclusions[attr] is not None]
+
+    # indices in the tuples of the fields, with the set of values found for each one
+    indexes = [i for i, attr in enumerate(attributes) if attr in fields]
+    values = dict((i, set()) for i in indexes)
+
+    if isinstance(T, ColumnarTable):
+        # the columns already contain the codes of the strings and the values converted to their type
+        for i in indexes:
+            values[i] = set(T.column(attributes[i]))
+    else:
+        # foreach tuple in T
+        for t in T:
+            for i in indexes:
+                values[i].add(t[i])
 
-    # foreach tuple in T
-    for t in T:
-        # foreach element in tuple
-        for i in range(len(list(t))):
-            # get the attribute corresponding at i in tuple
-            attr = list(attributes)[i]
-            # get the value corresponding at i in tuple
+        for i in indexes:
+            attr = attributes[i]
             # if the value is a string, I convert it to the index of value in dictionary attribute
-            # and then add the constraint to the list
-            # else I add the constraint to the list converting the value to its type
-            val = strToVal(string_dict[attr].index(list(t)[i])) \
-                if attr in string_dict.keys() else strToVal(list(t)[i])
-            S.append((attr, "!=", val))
+            # else I convert the value to its type
+            if attr in string_dict.keys():
+                values[i] = set(string_dict[attr].encode(val) for val in values[i])
+            else:
+                values[i] = set(strToVal(val) for val in values[i])
+
+    S = []
+    for i in indexes:
+        if len(values[i]) != 0:
+            S.append((attributes[i], "not in", tuple(sorted(values[i]))))
 
     # return the set of all constraints
     return S
 
 
-def algorithm3(T: list, attributes: tuple, fields_tuple_rep: list, string_dict: dict):
+def algorithm2(T: list, attributes: tuple, string_dict: dict):
+    """
+    Application of algorithm 2 to T list to build a set of constraints for same path, no field repeat
+    :param T:                       Set of raw tuples.
+    :param attributes:              Name attributes of raw dataset.
+    :param string_dict:             Dictionary of input strings domain of all attributes that contains only strings.
+    :return:                        Conjunctive set of constraints for P-F.
+    """
+
+    # every attribute must be different from all the values of T
+    return exclusion_constraints(T, attributes, attributes, string_dict)
+
+
+def algorithm3(T: list, attributes: tuple, fields_tuple_rep: list, string_dict: dict, exclusions: dict = None):
     """
     Application of algorithm 3 to T list to build a set of constraints for same path, no tuple repeat
     :param T:                       Set of raw tuples.
     :param attributes:              Name attributes of raw dataset.
     :param fields_tuple_rep:        List of fields that are included in constraints to have no tuple repeat.
     :param string_dict:             Dictionary of input strings domain of all attributes that contains only strings.
+    :param exclusions:              Dictionary of the constraints of the fields already built on T.
     :return:                        Conjunctive set of constraints for P-T.
     """
 
-    S = []
-
     # if the fields tuple repeat are not set in input arguments, I assign the first attribute
     if fields_tuple_rep is None:
         fields_tuple_rep = [attributes[0]]
@@ -53,27 +95,15 @@ def algorithm3(T: list, attributes: tuple, fields_tuple_rep: list, string_dict:
             if field not in attributes:
                 raise AttributeError("field_tuple {0} doesn't exist!".format(field))
 
-    # foreach tuple in T
-    for t in T:
-        # foreach element in tuple
-        for i in range(len(list(t))):
-            # get the attribute corresponding at i in tuple
-            attr = list(attributes)[i]
-            # If the attribute is one of the fields
-            if attr in fields_tuple_rep:
-                # get the value corresponding at i in tuple
-                # if the value is a string, I convert it to the index of value in dictionary attribute
-                # and then add the constraint to the list
-                # else I add the constraint to the list converting the value to its type
-                val = strToVal(string_dict[attr].index(list(t)[i])) \
-                    if attr in string_dict.keys() else strToVal(list(t)[i])
-                S.append((attr, "!=", val))
+    # the fields must be different from all the values of T
+    S = exclusion_constraints(T, fields_tuple_rep, attributes, string_dict, exclusions)
 
     # return the set of all constraints and random fields
     return S
 
 
-def algorithm4(T: list, b: tuple, attributes: tuple, string_dict: dict, generic_values: dict):
+def algorithm4(T: list, b: tuple, attributes: tuple, string_dict: dict, generic_values: dict,
+               exclusions: dict = None):
     """
     Application of algorithm 3 to T list to build a set of constraints for same path, no tuple repeat
     :param T:                       Set of raw tuples.
@@ -81,6 +111,8 @@ def algorithm4(T: list, b: tuple, attributes: tuple, string_dict: dict, generic_
     :param attributes:              Name attributes of raw dataset.
     :param string_dict:             Dictionary of input strings domain of all attributes that contains only strings.
     :param generic_values:          Dictionary that contains all data with their generalizations of qi.
+    :param exclusions:              Dictionary of the constraints of the fields already built on T, shared by
+                                    all the tuples of T.
     :return:                        Conjunctive set of constraints for I-T.
     """
 
@@ -100,23 +132,10 @@ def algorithm4(T: list, b: tuple, attributes: tuple, string_dict: dict, generic_
     # if there aren't generic values in the tuple, I run the algorithm 3
     # on raw dataset of pc and I set the random field selected (option is random field)
     if len(fields) == 0:
-        S = algorithm3(T, attributes, None, string_dict)
+        S = algorithm3(T, attributes, None, string_dict, exclusions)
     else:
-        # foreach tuple in T
-        for t in T:
-            # foreach element in tuple
-            for i in range(len(list(t))):
-                # get the attribute corresponding at i in tuple
-                attr = list(attributes)[i]
-                # If the attribute is one of the selected fields
-                if attr in fields:
-                    # get the value corresponding at i in tuple
-                    # if the value is a string, I convert it to the index of value in dictionary attribute
-                    # and then add the constraint to the list
-                    # else I add the constraint to the list converting the value to its type
-                    val = strToVal(string_dict[attr].index(list(t)[i])) \
-                        if attr in string_dict.keys() else strToVal(list(t)[i])
-                    S.append((attr, "!=", val))
+        # the selected fields must be different from all the values of T
+        S = exclusion_constraints(T, fields, attributes, string_dict, exclusions)
 
     # foreach field in tuple b
     for j in range(len(list(b))):
@@ -128,7 +147,7 @@ def algorithm4(T: list, b: tuple, attributes: tuple, string_dict: dict, generic_
             # if the value is a string, I convert it to the index of value in dictionary attribute
             # and then add the constraint to the list
             # else I add the constraint to the list converting the value to its type
-            val = strToVal(string_dict[attr].index(list(b)[j]))\
+            val = string_dict[attr].encode(list(b)[j]) \
                 if attr in string_dict.keys() else strToVal(list(b)[j])
             S.append((attr, "==", val))
 
@@ -136,54 +155,240 @@ def algorithm4(T: list, b: tuple, attributes: tuple, string_dict: dict, generic_
     return S
 
 
-def constraint_generation(raw_dataset: list, attributes: tuple, fields_tuple_rep: list, string_dict: dict,
-                          conf_opt: str, data_constraints: str, generic_values: dict, v=True):
+def bucket_release(constraint_solver: ConstraintSolver, pc: tuple, B: list, tuples: list, attributes: tuple,
+                   fields_tuple_rep: list, string_dict: dict, conf_opt: str, generic_values: dict, v=True):
     """
-    Takes the set of unique tuples from the k-Anonymization module and the path conditions for every tuple associated
-    with the unique tuple. Various constraints are then generated for each of the unique tuple according to each of
-    the three configurations.
+    Generates the release data of all the tuples of a path condition bucket.
 
-    :param raw_dataset:             Dataset list of all raw dataset or anonymized dataset.
+    :param constraint_solver:       Constraint solver initialized with the data constraints.
+    :param pc:                      Path condition of the bucket.
+    :param B:                       Bucket of raw tuples that respect the path condition.
+    :param tuples:                  List of tuples (raw or anonymized) of the bucket to release.
+    :param attributes:              Name attributes of raw dataset.
+    :param fields_tuple_rep:        List of fields that are included in constraints to have no tuple repeat.
+    :param string_dict:             Dictionary of input strings domain of all attributes that contains only strings.
+    :param conf_opt:                Configuration option to generate new tuples.
+    :param generic_values:          Dictionary that contains all data with their generalizations of qi.
+    :param v:                       If True prints some logging.
+    :return:                        Release data of the bucket built by solver depending on constraints.
+    """
+
+    return list(iter_bucket_release(constraint_solver, pc, B, tuples, attributes, fields_tuple_rep, string_dict,
+                                    conf_opt, generic_values, v))
+
+
+def iter_bucket_release(constraint_solver: ConstraintSolver, pc: tuple, B: list, tuples: list, attributes: tuple,
+                        fields_tuple_rep: list, string_dict: dict, conf_opt: str, generic_values: dict, v=True):
+    """
+    Generates one at a time the release data of all the tuples of a path condition bucket, like bucket_release.
+
+    :param constraint_solver:       Constraint solver initialized with the data constraints.
+    :param pc:                      Path condition of the bucket.
+    :param B:                       Bucket of raw tuples that respect the path condition.
+    :param tuples:                  List of tuples (raw or anonymized) of the bucket to release.
+    :param attributes:              Name attributes of raw dataset.
+    :param fields_tuple_rep:        List of fields that are included in constraints to have no tuple repeat.
+    :param string_dict:             Dictionary of input strings domain of all attributes that contains only strings.
+    :param conf_opt:                Configuration option to generate new tuples.
+    :param generic_values:          Dictionary that contains all data with their generalizations of qi.
+    :param v:                       If True prints some logging.
+    :return:                        Generator of the release data of the bucket.
+    """
+
+    # the path condition is asserted once for all the tuples of the same pc, together with
+    # the constraints of P-F and P-T that depend only on the bucket and not on the tuple
+    if conf_opt == 'P-F':
+        S_pc = algorithm2(B, attributes, string_dict)
+    elif conf_opt == 'P-T':
+        S_pc = algorithm3(B, attributes, fields_tuple_rep, string_dict)
+    else:  # conf_opt == 'I-T'
+        S_pc = []
+    constraint_solver.set_path_condition(pc, S_pc)
+
+    if conf_opt == 'I-T':
+        # the values of every field in the bucket are collected once for all the tuples, and the solver
+        # indexes each exclusion only the first time a tuple uses it
+        exclusions = dict()
+        for b in tuples:
+
+            log("[LOG] Using {0} on data {1}.".format(conf_opt, b), endl=False, enabled=v)
+
+            S = algorithm4(B, b, attributes, string_dict, generic_values, exclusions)
+
+            # get release raw from constraint condition and add it if it is not None
+            r = constraint_solver.get_release_raw(S)
+            if r is not None:
+                log("[LOG] Add release data {0} to final result.".format(r), endl=False, enabled=v)
+                yield r
+    else:
+        # the tuples of P-F and P-T have no constraints of their own, so the release data of the whole
+        # bucket are enumerated by a single loop of the solver
+        releases = constraint_solver.enumerate_release_raws(len(tuples))
+        for b in tuples:
+
+            log("[LOG] Using {0} on data {1}.".format(conf_opt, b), endl=False, enabled=v)
+
+            r = next(releases, None)
+            if r is None:
+                # the solver can't satisfy the constraints for the remaining tuples
+                break
+            log("[LOG] Add release data {0} to final result.".format(r), endl=False, enabled=v)
+            yield r
+
+
+_worker = dict()
+"""
+Dictionary of the data of a worker process: its own constraint solver (and so its own Z3 context) and the
+arguments shared by all the buckets.
+"""
+
+
+def _init_worker(constraint_solver: ConstraintSolver, attributes: tuple, fields_tuple_rep: list, string_dict: dict,
+                 conf_opt: str, generic_values: dict, v: bool):
+    """
+    Initializes a worker process of the pool with its own copy of the constraint solver, whose data constraints
+    are parsed from the SMT-LIB2 format instead of reading again their file.
+    """
+
+    _worker["solver"] = constraint_solver
+    _worker["args"] = (attributes, fields_tuple_rep, string_dict, conf_opt, generic_values, v)
+
+
+def _worker_bucket_release(bucket: tuple):
+    """
+    Generates in a worker process the release data of a bucket (pc, B, tuples).
+    """
+
+    pc, B, tuples = bucket
+    # The tables of the buckets are sent without the string encoders, which the worker got once
+    for table in (B, tuples):
+        if isinstance(table, ColumnarTable):
+            table.share_strings(_worker["args"][2])
+    return bucket_release(_worker["solver"], pc, B, tuples, *_worker["args"])
+
+
+def release_buckets(buckets, attributes: tuple, fields_tuple_rep: list, string_dict: dict, conf_opt: str,
+                    data_constraints: str, generic_values: dict, workers=1, cache_dir: str = None,
+                    decimals: dict = None, threads=0, high_water=1000, sorts: dict = None, v=True):
+    """
+    Generates the release data bucket by bucket, like constraint_generation, consuming the buckets as they are
+    produced so that the release data of a bucket can be written while the next buckets are still anonymized
+    and solved.
+
+    :param buckets:                 Iterable of the path condition buckets, as triples (pc, B, tuples) where tuples
+                                    is the list of the tuples (raw or anonymized) of the bucket to release.
     :param attributes:              Name attributes of raw dataset.
     :param fields_tuple_rep:        List of fields that are included in constraints to have no tuple repeat.
     :param string_dict:             Dictionary of input strings domain of all attributes that contains only strings.
     :param conf_opt:                Configuration option to generate new tuples.
     :param data_constraints:        Path to the file that contains data constraints.
     :param generic_values:          Dictionary that contains all data with their generalizations of qi.
+    :param workers:                 Number of processes that solve the path condition buckets in parallel.
+    :param cache_dir:               Path to the cache directory of the parsed data constraints, None to read them
+                                    from the file.
+    :param decimals:                Dictionary whose keys are the attributes of decimals and whose values are the
+                                    numbers of decimals of their values in the raw dataset.
+    :param threads:                 Number of threads that solve in background the release data of the next
+                                    buckets, 0 to solve every bucket when it's released.
+    :param high_water:              Maximum number of release data solved in background and not yet released.
+    :param sorts:                   Dictionary whose keys are attributes and whose values are the sorts of
+                                    their variables for the solver, "int" (the default) or "bitvec".
     :param v:                       If True prints some logging.
-    :return:                        Release dataset built by solver depending on constraints
+    :return:                        Generator of the lists of release data of the path condition buckets, in the
+                                    order of the buckets.
     """
 
     log("[LOG] Start generating constraints to raw dataset.", endl=False, enabled=v)
 
-    R = []
-    # Initialize the constraint solver reading the data constraints
-    constraint_solver = ConstraintSolver(attributes, data_constraints, string_dict)
+    # Initialize the constraint solver reading the data constraints, compiled once to a single formula
+    constraint_solver = ConstraintSolver(attributes, data_constraints, string_dict, cache_dir, decimals, sorts)
+
+    if workers > 1:
+        # Every process of the pool solves whole buckets with its own solver, and the release data are
+        # yielded in the order of the buckets; at most two buckets for each worker are pending, so only
+        # those buckets are held in memory while the next ones are anonymized
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(constraint_solver, attributes, fields_tuple_rep, string_dict, conf_opt,
+                                           generic_values, v)) as executor:
+            pending = deque()
+            for bucket in buckets:
+                pending.append((bucket[0], executor.submit(_worker_bucket_release, bucket)))
+                if len(pending) >= 2 * workers:
+                    pc, future = pending.popleft()
+                    log("[LOG] Solved path condition {0}.".format(pc), endl=False, enabled=v)
+                    yield future.result()
+            while pending:
+                pc, future = pending.popleft()
+                log("[LOG] Solved path condition {0}.".format(pc), endl=False, enabled=v)
+                yield future.result()
+    elif threads > 0:
+        # The threads of the pool solve the next buckets while they are anonymized, each with its own Z3
+        # context; a bucket is released as soon as it's solved, or when too many buckets or release data
+        # are pending
+        def produce(solver, bucket):
+            return iter_bucket_release(solver, *bucket, attributes, fields_tuple_rep, string_dict, conf_opt,
+                                       generic_values, v)
+
+        with ReleasePool(constraint_solver, produce, threads, high_water) as pool:
+            for bucket in buckets:
+                pool.submit(bucket)
+                while len(pool) > 0 and (pool.ready() or len(pool) >= 2 * threads or pool.full()):
+                    (pc, _, _), R_pc = pool.pop()
+                    log("[LOG] Solved path condition {0}.".format(pc), endl=False, enabled=v)
+                    yield R_pc
+            while len(pool) > 0:
+                (pc, _, _), R_pc = pool.pop()
+                log("[LOG] Solved path condition {0}.".format(pc), endl=False, enabled=v)
+                yield R_pc
+    else:
+        for pc, B, tuples in buckets:
+            yield bucket_release(constraint_solver, pc, B, tuples, attributes, fields_tuple_rep, string_dict,
+                                 conf_opt, generic_values, v)
 
-    pc_prev = ()
+    log("[LOG] end generating constraints to raw dataset.", endl=False, enabled=v)
 
-    for b, pc, B in raw_dataset:
 
-        log("[LOG] Using {0} on data {1}.".format(conf_opt, b), endl=False, enabled=v)
+def constraint_generation(raw_dataset: list, attributes: tuple, fields_tuple_rep: list, string_dict: dict,
+                          conf_opt: str, data_constraints: str, generic_values: dict, workers=1,
+                          cache_dir: str = None, decimals: dict = None, threads=0, high_water=1000,
+                          sorts: dict = None, v=True):
+    """
+    Takes the set of unique tuples from the k-Anonymization module and the path conditions for every tuple associated
+    with the unique tuple. Various constraints are then generated for each of the unique tuple according to each of
+    the three configurations.
 
-        if conf_opt == 'P-F':
-            S = algorithm2(B, attributes, string_dict)
-        elif conf_opt == 'P-T':
-            S = algorithm3(B, attributes, fields_tuple_rep, string_dict)
-        else:  # conf_opt == 'I-T'
-            S = algorithm4(B, b, attributes, string_dict, generic_values)
+    :param raw_dataset:             Dataset list of all raw dataset or anonymized dataset.
+    :param attributes:              Name attributes of raw dataset.
+    :param fields_tuple_rep:        List of fields that are included in constraints to have no tuple repeat.
+    :param string_dict:             Dictionary of input strings domain of all attributes that contains only strings.
+    :param conf_opt:                Configuration option to generate new tuples.
+    :param data_constraints:        Path to the file that contains data constraints.
+    :param generic_values:          Dictionary that contains all data with their generalizations of qi.
+    :param workers:                 Number of processes that solve the path condition buckets in parallel.
+    :param cache_dir:               Path to the cache directory of the parsed data constraints, None to read them
+                                    from the file.
+    :param decimals:                Dictionary whose keys are the attributes of decimals and whose values are the
+                                    numbers of decimals of their values in the raw dataset.
+    :param threads:                 Number of threads that solve in background the release data of the next
+                                    buckets, 0 to solve every bucket when it's released.
+    :param high_water:              Maximum number of release data solved in background and not yet released.
+    :param sorts:                   Dictionary whose keys are attributes and whose values are the sorts of
+                                    their variables for the solver, "int" (the default) or "bitvec".
+    :param v:                       If True prints some logging.
+    :return:                        Release dataset built by solver depending on constraints
+    """
 
-        # adding the path condition to set S
-        for condition in pc:
-            S.append(condition)
+    # Group the tuples of the dataset by their path condition bucket, keeping the order
+    buckets = []
+    for b, pc, B in raw_dataset:
+        if len(buckets) == 0 or buckets[-1][0] != pc:
+            buckets.append((pc, B, []))
+        buckets[-1][2].append(b)
 
-        # get release raw from constraint condition and add it if it is not None
-        r = constraint_solver.get_release_raw(S, pc_prev != pc)
-        pc_prev = pc
-        if r is not None:
-            log("[LOG] Add release data {0} to final result.".format(r), endl=False, enabled=v)
-            R.append(r)
+    R = []
 
-    log("[LOG] end generating constraints to raw dataset.", endl=False, enabled=v)
+    for R_pc in release_buckets(buckets, attributes, fields_tuple_rep, string_dict, conf_opt, data_constraints,
+                                generic_values, workers, cache_dir, decimals, threads, high_water, sorts, v):
+        R.extend(R_pc)
 
     return R
@@ -1,4 +1,8 @@
-from z3 import Solver, Int, IntVal, Or, sat
+from decimal import Decimal, ROUND_CEILING, ROUND_FLOOR
+from z3 import And, BitVec, BitVecVal, BoolVal, Context, Solver, Int, IntVal, Or, Distinct, is_bv_value, \
+    parse_smt2_string, sat
+from utils.cache import load_cached
+from utils.sampler import DomainSampler
 from utils.utils import strTypeVal
 
 
@@ -14,6 +18,10 @@ def get_constraint(attr: str, op: str, val: str):
 
     if op == "==":
         return attr == val
+    elif op == "in":
+        if len(val) == 0:
+            return BoolVal(False, attr.ctx)
+        return Or([attr == single_val for single_val in val])
     elif op == "!=":
         return attr != val
     elif op == ">=":
@@ -24,19 +32,100 @@ def get_constraint(attr: str, op: str, val: str):
         return attr > val
     elif op == "<":
         return attr < val
+    elif op == "not in":
+        return Distinct(attr, *val)
     else:
         raise KeyError("Operator {0} in data constraints file mustn't be used.".format(op))
 
 
+def count_decimals(val):
+    """
+    Gets the number of decimals of a value, as it's written.
+
+    :param val:         Value, or string of the value.
+    :return:            Number of decimals, 0 for an integer.
+    :raises ValueError: If the value isn't a number.
+    """
+
+    return max(-to_decimal(val).as_tuple().exponent, 0)
+
+
+def to_decimal(val):
+    """
+    Converts a value to an exact decimal, with the digits of its shortest representation for a float.
+
+    :param val:         Value, or string of the value.
+    :return:            The decimal.
+    :raises ValueError: If the value isn't a number.
+    """
+
+    if isinstance(val, float):
+        val = repr(val)
+    elif isinstance(val, bool):
+        val = int(val)
+    try:
+        result = Decimal(val)
+    except ArithmeticError:
+        raise ValueError("Value {0} isn't a number.".format(val))
+    if not result.is_finite():
+        raise ValueError("Value {0} isn't a number.".format(val))
+    return result
+
+
+def read_data_constraints(data_constraints: str):
+    """
+    Reads the data constraints from the file, without checking their attributes.
+
+    :param data_constraints:    Path to the file that contains data constraints.
+    :return:                    List of triples (attribute, type, constraints), where type is "int" or "float" and
+                                constraints is the list of the couples (operator, value) of the line.
+    :raises KeyError:           If a value isn't int or real.
+    """
+
+    parsed = []
+
+    # read all data constraints from the file
+    with open(data_constraints) as f:
+        lines = f.read().splitlines()
+
+    for line in lines:
+        # save in cv all part of constraint
+        cv = line.split(" ")
+        # if the constraint is ==, I save the set of values in val
+        if cv[1] == "==":
+            val = cv[2].split("-")[0]
+        # I save the value in val
+        else:
+            val = cv[2]
+        # the type of the attribute is the type of its first value
+        if strTypeVal(val) not in ("int", "float"):
+            raise KeyError("Value {0} in data constraints isn't int or real.".format(cv[2]))
+
+        # after the attribute, other data in line are operator - value
+        parsed.append((cv[0], strTypeVal(val), list(zip(*[iter(cv[1:])] * 2))))
+
+    return parsed
+
+
 class ConstraintSolver:
 
-    def __init__(self, attributes: tuple, data_constraints: str, string_dict: dict):
+    def __init__(self, attributes: tuple, data_constraints: str, string_dict: dict, cache_dir: str = None,
+                 decimals: dict = None, sorts: dict = None):
         """
-        Initialization of constraint solver adding all constraints of input data.
+        Initialization of constraint solver adding all constraints of input data. Every attribute is an integer
+        for the solver: the values of a float attribute are scaled by a power of 10 with as many decimals as its
+        data constraints and its data. An attribute whose domain is bounded can be a bit-vector just wide enough
+        for its domain, which the solver can bit-blast, if its sort is set to "bitvec".
 
         :param attributes:              Name attributes of raw dataset.
         :param string_dict:             Dictionary of input strings domain of all attributes that contains only strings.
         :param data_constraints:        Path to the file that contains data constraints.
+        :param cache_dir:               Path to the cache directory of the parsed data constraints, None to read
+                                        them from the file.
+        :param decimals:                Dictionary whose keys are attributes and whose values are the numbers of
+                                        decimals of their values observed in the data.
+        :param sorts:                   Dictionary whose keys are attributes and whose values are the sorts of
+                                        their variables for the solver, "int" (the default) or "bitvec".
         """
 
         self.data_constraints = []
@@ -63,67 +152,375 @@ class ConstraintSolver:
         """
         List of all attributes that are float.
         """
+        self.scales = dict()
+        """
+        Dictionary whose keys are the float attributes and whose values are the powers of 10 that scale their
+        values to integers for the solver.
+        """
+        self.widths = dict()
+        """
+        Dictionary whose keys are the attributes that are bit-vectors for the solver and whose values are the
+        widths of their bit-vectors.
+        """
+        self.bounds = dict()
+        """
+        Dictionary whose keys are the bit-vector attributes and whose values are the couples (lowest value,
+        highest value) of their domains, scaled to integers.
+        """
+        self.data_formula = None
+        """
+        Conjunction of all the data constraints, compiled once and asserted by every solver with a single
+        assertion.
+        """
+        self.data_sampler = DomainSampler()
+        """
+        Sampler of the domains of the attributes admitted by the data constraints, which are all on single
+        attributes.
+        """
+        self.sampler = None
+        """
+        Sampler of the current path condition, None if its constraints can't be sampled attribute by attribute
+        and they are solved by the solver.
+        """
+        self.path_constraints = []
+        """
+        List of the constraints of the current path condition and of its bucket.
+        """
+        self.exclusions = dict()
+        """
+        Dictionary whose keys are attributes and whose values are couples (values, indexed) of the last not in
+        constraint of the tuples of the current path condition on the attribute, where indexed is True if its
+        values are indexed by the sampler.
+        """
+        self.solver = None
+        """
+        Incremental solver of the current path condition, started only when the constraints can't be sampled.
+        """
+        self.ctx = None
+        """
+        Z3 context of the variables and of the solvers, None for the main context.
+        """
+
+        # read all data constraints from the file, or from the cache if the file has not changed
+        parsed = load_cached(data_constraints, "data_constraints",
+                             lambda: read_data_constraints(data_constraints), cache_dir)
 
-        # read all data constraints from the file
-        with open(data_constraints) as f:
-            lines = f.read().splitlines()
+        if decimals is None:
+            decimals = dict()
+        if sorts is None:
+            sorts = dict()
 
-        # add all constraints to the solver
-        for line in lines:
-            # save in cv all part of constraint
-            cv = line.split(" ")
+        # List of the data constraints (attr, op, val) with the values scaled to integers
+        scaled = []
+
+        # scale all constraints to integers, saving the domains of the attributes
+        for name, type_val, constraints in parsed:
             # if attribute exists
-            if cv[0] not in list(attributes):
-                raise KeyError("Attribute {0} in data constraints file doesn't exist.".format(cv[0]))
-            # if the constraint is ==, I save the set of values in val
-            if cv[1] == "==":
-                val = cv[2].split("-")[0]
-            # I save the value in val
-            else:
-                val = cv[2]
-            # set the type of Int of attribute to solver if data is integer
-            if strTypeVal(val) == "int":
-                attr = Int(cv[0])
-            # else set the type of Int of attribute to solver if data is float
-            elif strTypeVal(val) == "float":
-                if cv[0] not in self.float_list:
-                    self.float_list.append(cv[0])
-                attr = Int(cv[0])
-            # else the type of attribute isn't possible to read
-            else:
-                raise KeyError("Value {0} in data constraints isn't int or real.".format(cv[2]))
+            if name not in list(attributes):
+                raise KeyError("Attribute {0} in data constraints file doesn't exist.".format(name))
+            # if the attribute type is float, its values are scaled by the decimals of its constraints and data
+            if type_val == "float" and name not in self.float_list:
+                self.float_list.append(name)
+                # only the values of == are separated by '-', the other values can be negative numbers
+                precision = max([decimals.get(name, 0)] + [count_decimals(single_val) for op, val in constraints
+                                                           for single_val in (val.split("-") if op == "==" else
+                                                                              (val,))])
+                self.scales[name] = 10 ** precision
 
-            # save the attribute in references
-            self.attributes_ref[cv[0]] = attr
+            # save the attribute in references, with its sort set once its domain is known
+            self.attributes_ref[name] = None
 
-            # after the attribute, other data in line are operator - value
-            for op, val in zip(*[iter(cv[1:])] * 2):
-                # if the attribute type is float, this is converted to int
-                if cv[0] in self.float_list:
-                    val = str(float(val) * 10)
-                # if the operator is ==, I add or constraint to all values
+            for op, val in constraints:
+                # if the operator is ==, the attribute is one of the values between '-'
+                # (because attribute is one of the list, not all)
                 if op == "==":
-                    or_values = []
-                    # selecting all values between '-' and add in a or constraint
-                    # (because attribute is one of the list, not all)
-                    for single_val in val.split("-"):
-                        single_val = IntVal(single_val)
-                        or_values.append(get_constraint(attr, op, single_val))
-                    self.data_constraints.append(Or(or_values))
+                    constraint = self.scale_constraint(name, "in", val.split("-"))
                 # else is a single value constraint, add it to constraints
                 else:
-                    if cv[0] not in self.attribute_constraints:
-                        self.attribute_constraints.append(cv[0])
-                    val = IntVal(val)
-                    self.data_constraints.append(get_constraint(attr, op, val))
+                    if name not in self.attribute_constraints:
+                        self.attribute_constraints.append(name)
+                    constraint = self.scale_constraint(name, op, val)
+                if constraint is not None:
+                    scaled.append((name,) + constraint)
+                    self.data_sampler.domain(name).add(*constraint)
 
         # If in input there are string values, I add the constraint these data
         # like 0 < attr < number of values
         for attr, values in self.string_dict.items():
             self.attribute_constraints.append(attr)
-            self.attributes_ref[attr] = Int(attr)
-            self.data_constraints.append((Int(attr) >= 0))
-            self.data_constraints.append((Int(attr) < len(values)))
+            self.attributes_ref[attr] = None
+            scaled.append((attr, ">=", 0))
+            scaled.append((attr, "<", len(values)))
+            self.data_sampler.domain(attr).add(">=", 0)
+            self.data_sampler.domain(attr).add("<", len(values))
+
+        # the attributes with a bounded domain and the "bitvec" sort are bit-vectors wide enough for the values
+        # next to their domains
+        for attr in self.attributes_ref:
+            domain = self.data_sampler.domain(attr)
+            lo, hi = domain.lo, domain.hi
+            if domain.allowed is not None and len(domain.allowed) != 0:
+                lo = min(domain.allowed) if lo is None else max(lo, min(domain.allowed))
+                hi = max(domain.allowed) if hi is None else min(hi, max(domain.allowed))
+            if sorts.get(attr, "int") == "bitvec" and lo is not None and hi is not None:
+                self.bounds[attr] = (lo, hi)
+                self.widths[attr] = max((lo - 1).bit_length(), (hi + 1).bit_length()) + 1
+            self.attributes_ref[attr] = self.variable(attr)
+
+        for attr, op, val in scaled:
+            self.data_constraints.append(self.get_scaled_constraint(attr, op, val))
+
+        self.data_formula = And(self.data_constraints)
+
+    def __getstate__(self):
+        """
+        Gets the state of the constraint solver to pickle it, with the data constraints serialized in SMT-LIB2
+        format, since the Z3 expressions can't be pickled; the solver of the path condition isn't kept.
+        """
+
+        state = self.__dict__.copy()
+        state["data_constraints"] = None
+        state["data_formula"] = self.to_smt2()
+        state["attributes_ref"] = list(self.attributes_ref)
+        state["solver"] = None
+        state["sampler"] = None
+        state["path_constraints"] = []
+        state["exclusions"] = dict()
+        state["ctx"] = None
+        state["used_constraints"] = []
+        return state
+
+    def __setstate__(self, state: dict):
+        """
+        Restores a pickled constraint solver, parsing once its data constraints from the SMT-LIB2 format.
+        """
+
+        self.__dict__.update(state)
+        self.data_formula = self.from_smt2(state["data_formula"], self.ctx)
+        self.data_constraints = [self.data_formula]
+        self.attributes_ref = dict((attr, None) for attr in state["attributes_ref"])
+        for attr in self.attributes_ref:
+            self.attributes_ref[attr] = self.variable(attr)
+
+    def in_context(self, ctx: Context):
+        """
+        Copies the constraint solver in another Z3 context, since a context can't be used by two threads at the
+        same time.
+
+        :param ctx:     Z3 context of the copy.
+        :return:        The copy of the constraint solver.
+        """
+
+        state = self.__getstate__()
+        state["ctx"] = ctx
+        constraint_solver = ConstraintSolver.__new__(ConstraintSolver)
+        constraint_solver.__setstate__(state)
+        return constraint_solver
+
+    def _new_context(self):
+        """
+        Moves the data constraints and the variables of the attributes to a new Z3 context.
+        """
+
+        self.ctx = Context()
+        self.data_formula = self.data_formula.translate(self.ctx)
+        self.data_constraints = [self.data_formula]
+        for attr in self.attributes_ref:
+            self.attributes_ref[attr] = None
+            self.attributes_ref[attr] = self.variable(attr)
+
+    def to_smt2(self):
+        """
+        Serializes the data constraints in SMT-LIB2 format.
+
+        :return:    String of the declarations of the attributes and of the assertion of the data constraints.
+        """
+
+        solver = Solver(ctx=self.ctx)
+        solver.add(self.data_formula)
+        return solver.to_smt2()
+
+    @staticmethod
+    def from_smt2(smt2: str, ctx: Context = None):
+        """
+        Parses data constraints serialized in SMT-LIB2 format.
+
+        :param smt2:    String of the data constraints in SMT-LIB2 format.
+        :param ctx:     Z3 context of the data constraints, None for the main context.
+        :return:        Conjunction of the data constraints.
+        """
+
+        return And(parse_smt2_string(smt2, ctx=ctx))
+
+    def set_path_condition(self, pc: tuple, S=None):
+        """
+        Starts the release data of a path condition. If the path condition and the constraints of its bucket are
+        all on single attributes, like the data constraints, the release data are sampled from the domains of the
+        attributes; otherwise the incremental solver is started: the data constraints and the path condition
+        are asserted only once, while the constraints of every tuple are pushed and popped on top of them.
+
+        :param pc:      Path condition shared by all the next tuples.
+        :param S:       List of constraints built by constraint generation shared by all the tuples of the pc.
+        """
+
+        self.used_constraints = []
+        self.path_constraints = list(pc) if S is None else list(pc) + list(S)
+        self.exclusions = dict()
+        self.solver = None
+
+        # restrict the domains of the data constraints with the path condition
+        constraints = self.get_sampler_constraints(self.path_constraints)
+        self.sampler = None if constraints is None else self.data_sampler.restrict(constraints)
+
+        if self.sampler is None:
+            self._start_solver()
+
+    def _start_solver(self):
+        """
+        Starts the long-lived solver of the path condition, blocking the values already released in the pc.
+        """
+
+        # every path condition is solved in a new context, since the models found by Z3 depend on the path
+        # conditions solved before in the same context: so the release data of a bucket are the same whether
+        # the buckets are solved serially, by the release threads or by the worker processes
+        self._new_context()
+
+        self.solver = Solver(ctx=self.ctx)
+
+        # add all data constraints with a single assertion
+        self.solver.add(self.data_formula)
+
+        # add all constraints of the path condition and of its bucket
+        for (attr, op, val) in self.path_constraints:
+            self.solver.add(self.get_solver_constraint(attr, op, val))
+
+        # open the scope of the values already released in the pc
+        self.solver.push()
+        self._block_values(0)
+
+    def variable(self, attr: str):
+        """
+        Gets the variable of an attribute for the solver.
+
+        :param attr:    Attribute label.
+        :return:        Bit-vector variable if the attribute has a width, integer variable otherwise.
+        """
+
+        ref = self.attributes_ref.get(attr)
+        if ref is not None:
+            return ref
+        return BitVec(attr, self.widths[attr], self.ctx) if attr in self.widths else Int(attr, self.ctx)
+
+    def scale_constraint(self, attr: str, op: str, val):
+        """
+        Scales a constraint to the integers of the solver: the values of a float attribute are multiplied by its
+        scale, and a value that isn't an integer once scaled is rounded so that the constraint admits the same
+        integers (e.g. 'x < 2.5' becomes 'x < 3', while 'x == 2.5' can't be satisfied).
+
+        :param attr:            Attribute label.
+        :param op:              Operator string.
+        :param val:             Value, or list of values for the in and not in operators.
+        :return:                Couple (operator, value scaled to int or tuple of values scaled to int), None if
+                                the constraint is always satisfied.
+        :raises ValueError:     If a value isn't a number.
+        """
+
+        scale = self.scales.get(attr, 1)
+
+        if op in ("in", "not in"):
+            values = []
+            for single_val in val:
+                single_val = to_decimal(single_val) * scale
+                # a value that isn't an integer once scaled is never taken by the attribute
+                if single_val == single_val.to_integral_value():
+                    values.append(int(single_val))
+            values = tuple(dict.fromkeys(values))
+            if op == "not in" and len(values) == 0:
+                return None
+            return op, values
+
+        val = to_decimal(val) * scale
+        if val == val.to_integral_value():
+            return op, int(val)
+        elif op == "==":
+            return "in", ()
+        elif op == "!=":
+            return None
+        elif op in (">", "<="):
+            return op, int(val.to_integral_value(ROUND_FLOOR))
+        else:
+            return op, int(val.to_integral_value(ROUND_CEILING))
+
+    def get_solver_constraint(self, attr: str, op: str, val):
+        """
+        Converts a constraint built by constraint generation in the format of the solver.
+
+        :param attr:    Attribute label.
+        :param op:      Operator string.
+        :param val:     Value.
+        :return:        Constraint for solver.
+        """
+
+        constraint = self.scale_constraint(attr, op, val)
+        if constraint is None:
+            return BoolVal(True, self.ctx)
+        return self.get_scaled_constraint(attr, *constraint)
+
+    def get_scaled_constraint(self, attr: str, op: str, val):
+        """
+        Converts a constraint already scaled to integers in the format of the solver.
+
+        :param attr:    Attribute label.
+        :param op:      Operator string.
+        :param val:     Value scaled to int, or tuple of values for the in and not in operators.
+        :return:        Constraint for solver.
+        """
+
+        # the in and not in constraints have a set of values
+        if op in ("in", "not in"):
+            if attr in self.bounds:
+                # the values out of the domain of a bit-vector are never taken
+                lo, hi = self.bounds[attr]
+                val = [single_val for single_val in val if lo <= single_val <= hi]
+                if op == "not in" and len(val) == 0:
+                    return BoolVal(True, self.ctx)
+            return get_constraint(self.variable(attr), op, [self.get_solver_value(attr, single_val)
+                                                            for single_val in val])
+        return get_constraint(self.variable(attr), op, self.get_solver_value(attr, val))
+
+    def get_solver_value(self, attr: str, val: int):
+        """
+        Converts a value of an attribute, already scaled to int, in the format of the solver.
+
+        :param attr:    Attribute label.
+        :param val:     Value scaled to int.
+        :return:        Value for solver.
+        """
+
+        if attr in self.widths:
+            # the values out of the domain are compared as the values next to it, so they fit the bit-vector
+            lo, hi = self.bounds[attr]
+            return BitVecVal(min(max(val, lo - 1), hi + 1), self.widths[attr], self.ctx)
+        return IntVal(val, self.ctx)
+
+    def get_sampler_constraints(self, constraints: list):
+        """
+        Converts constraints built by constraint generation in the format of the sampler.
+
+        :param constraints: List of constraints (attr, op, val).
+        :return:            List of constraints with the values scaled to int like for the solver, None if a value
+                            can't be converted.
+        """
+
+        converted = []
+        try:
+            for (attr, op, val) in constraints:
+                constraint = self.scale_constraint(attr, op, val)
+                if constraint is not None:
+                    converted.append((attr,) + constraint)
+        except (TypeError, ValueError):
+            return None
+        return converted
 
     def find_release_raw(self, solver: Solver):
         """
@@ -133,70 +530,181 @@ class ConstraintSolver:
         :return:        The release raw found from constraints.
         """
 
-        # get the model of solver
+        # get the values of the model of solver
+        return self._release_data(self._model_values(solver))
+
+    def _model_values(self, solver: Solver):
+        """
+        Gets the values of the attributes in the model of the solver.
+
+        :param solver:  Solver that get the release raw.
+        :return:        Dictionary whose keys are the attributes and whose values are their int values.
+        """
+
         model = solver.model()
+        values = dict()
+        for attr, ref in self.attributes_ref.items():
+            val = model.eval(ref, model_completion=True)
+            # the bit-vectors are signed
+            values[attr] = val.as_signed_long() if is_bv_value(val) else val.as_long()
+        return values
+
+    def _release_data(self, values: dict):
+        """
+        Get release raw from the values of the attributes found by the solver or by the sampler.
+
+        :param values:  Dictionary whose keys are the attributes and whose values are their int values.
+        :return:        The release raw found from constraints.
+        """
+
         # save the data in a dictionary attribute -> value
         data = dict()
-        for attr, ref in self.attributes_ref.items():
+        for attr in self.attributes_ref:
+            val = values[attr]
             if attr in self.attribute_constraints:
-                self.used_constraints.append((attr, "!=", str(model[ref])))
+                self.used_constraints.append((attr, "!=", str(val)))
             # if the value derive from a string value mapped to index,
             # I get the string from the domain
             if attr in self.string_dict.keys():
-                attr_values = self.string_dict[attr]
-                index = model[ref].as_long()
-                data[attr] = str(attr_values[index])
+                data[attr] = self.string_dict[attr].decode(val)
             # else I add the value
             else:
-                val = model[ref]
-                # if the attribute type is float, this is converted from float to int
+                # if the attribute type is float, this is converted from int to float
                 if attr in self.float_list:
-                    val = model[ref].as_long() / 10
+                    val = val / self.scales[attr]
                 data[attr] = str(val)
         # return release data
         return data
 
-    def get_release_raw(self, S: list, new_pc=False):
+    def get_release_raw(self, S: list):
         """
         Takes constraints for each of unique tuples and tries to generate one new tuple satisfying the constraints.
         If the solver finds a satisfying tuple, this tuple will be part of the released dataset.
+        The path condition of the tuple must be set before with set_path_condition.
 
         :param S:       List of all constraints built by constraint generation.
-        :param new_pc:  If True, I clean all previous results and add the new pc constraints.
         :return:        Return the release data that satisfy all constraints, None if can't satisfy all constraints.
         """
 
-        # initialize solver and give to it a randomness
-        solver = Solver()
-
-        if new_pc:
-            self.used_constraints = []
-
-        # add all data constraints
-        for dc in self.data_constraints:
-            solver.add(dc)
-
-        # add all constraints found from generation
-        for (attr, op, val) in S:
-            # if the attribute type is float, this is converted to int
-            if attr in self.float_list:
-                val = val * 10
-            attr = Int(attr)
-            val = IntVal(val)
-            solver.add(get_constraint(attr, op, val))
-
-        # add all constraint results found before in the same pc
-        for (attr, op, val) in self.used_constraints:
-            attr = Int(attr)
-            val = IntVal(val)
-            solver.add(get_constraint(attr, op, val))
-
-        # if the solver is satisfying, I get a release data that can satisfy all value attributes
-        if solver.check() == sat:
-            return self.find_release_raw(solver)
-        elif len(self.used_constraints) != 0:
-            self.used_constraints = []
-            return self.get_release_raw(S)
-
-        # return None, because the solver can't satisfy all constraints
-        return None
+        # the constraints of the tuple restrict the domains of the path condition only for its sample, except
+        # the exclusions shared with the other tuples, which are indexed by the sampler
+        extra, excluding = None, []
+        if self.sampler is not None:
+            own = []
+            for (attr, op, val) in S:
+                if op == "not in" and self._index_exclusion(attr, val):
+                    excluding.append(attr)
+                else:
+                    own.append((attr, op, val))
+            constraints = self.get_sampler_constraints(own)
+            extra = None if constraints is None else DomainSampler.constraint_domains(constraints)
+        if extra is None and self.solver is None:
+            self._start_solver()
+
+        while True:
+            if extra is not None:
+                values = self.sampler.sample(extra, excluding)
+            else:
+                # add all constraints found from generation in the scope of this tuple
+                self.solver.push()
+                for (attr, op, val) in S:
+                    self.solver.add(self.get_solver_constraint(attr, op, val))
+
+                # if the solver is satisfying, I get a release data that can satisfy all value attributes
+                values = self._model_values(self.solver) if self.solver.check() == sat else None
+
+                self.solver.pop()
+
+            if values is not None:
+                n_used = len(self.used_constraints)
+                data = self._release_data(values)
+                self._block_values(n_used)
+                return data
+
+            # return None, because the solver can't satisfy all constraints even without the values
+            # released before
+            if len(self.used_constraints) == 0:
+                return None
+
+            # clean all the values released before in the same pc and retry
+            self._unblock_values()
+
+    def _index_exclusion(self, attr: str, val: tuple):
+        """
+        Indexes in the sampler the values of a not in constraint of a tuple, only if they aren't the same
+        values of the last not in constraint on the attribute, as for the tuples of the same bucket.
+
+        :param attr:    Attribute label.
+        :param val:     Tuple of the excluded values.
+        :return:        True if the values are indexed by the sampler.
+        """
+
+        indexed = self.exclusions.get(attr)
+        if indexed is None or indexed[0] is not val:
+            constraints = self.get_sampler_constraints([(attr, "not in", val)])
+            if constraints is None:
+                indexed = (val, False)
+            else:
+                # the constraint is dropped if none of its values can be taken once scaled
+                indexed = (val, self.sampler.exclude(attr, constraints[0][2] if len(constraints) != 0 else ()))
+            self.exclusions[attr] = indexed
+        return indexed[1]
+
+    def enumerate_release_raws(self, n: int):
+        """
+        Generates up to n different release data that satisfy the constraints of the path condition, in a single
+        loop of samples or of checks of the solver: after every release data its values are blocked, so the next
+        one has different values, and when the constraints can't be satisfied with the blocked values they are
+        cleaned. It's used when the tuples of the path condition have no constraints of their own.
+
+        :param n:       Number of release data to generate.
+        :return:        Generator of the release data, which stops before n if the constraints can't be
+                        satisfied even without the values released before.
+        """
+
+        count = 0
+
+        while count < n:
+            if self.sampler is not None:
+                values = self.sampler.sample()
+                found = values is not None
+            else:
+                found = self.solver.check() == sat
+            if found:
+                n_used = len(self.used_constraints)
+                data = self._release_data(values) if self.sampler is not None \
+                    else self.find_release_raw(self.solver)
+                self._block_values(n_used)
+                count += 1
+                yield data
+            elif len(self.used_constraints) != 0:
+                # clean all the values released before in the same pc and retry
+                self._unblock_values()
+            else:
+                return
+
+    def _block_values(self, n_used: int):
+        """
+        Blocks the values just released for the next tuples of the same pc, in the sampler and in the scope
+        opened by the solver.
+
+        :param n_used:  Number of used constraints before the last release data.
+        """
+
+        for (attr, op, val) in self.used_constraints[n_used:]:
+            if self.sampler is not None:
+                self.sampler.block(attr, int(val))
+            if self.solver is not None:
+                self.solver.add(self.get_scaled_constraint(attr, op, int(val)))
+
+    def _unblock_values(self):
+        """
+        Cleans all the values blocked in the same pc, closing and opening again their scope.
+        """
+
+        if self.sampler is not None:
+            self.sampler.unblock()
+        if self.solver is not None:
+            self.solver.pop()
+            self.solver.push()
+        self.used_constraints = []
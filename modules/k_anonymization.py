@@ -1,10 +1,20 @@
+from array import array
+from utils.lattice import lattice_groups
+from utils.mondrian import mondrian_groups
 from utils.utils import debug, log
 
+try:
+    from utils.generalization import generalize_groups
+except ImportError:
+    # Without numpy the QI sequences are generalized one by one
+    generalize_groups = None
+
 _DEBUG = True
 
 
 def k_anonymization(pc: tuple, B: list, attributes: dict, qi_names: list, k: int, dghs: dict,
-                    generic_values: dict, is_it_opt=False, v=True):
+                    generic_values: dict, is_it_opt=False, generalizations: dict = None, algorithm="greedy",
+                    stats: dict = None, v=True):
     """
     Replace some field values with asterisks or generic values and make sure that each tuple is indistinguishable from
     at least k–1 other tuples in the group.
@@ -18,6 +28,14 @@ def k_anonymization(pc: tuple, B: list, attributes: dict, qi_names: list, k: int
                              keys are the corresponding attribute names.
     :param generic_values:   Dictionary containing generalization values for Quasi Identifiers.
     :param is_it_opt:        If True the configuration option is I-T.
+    :param generalizations:  Look up table whose keys are triples (attribute, value, level) and whose values are
+                             the generalized values (None for the hierarchy roots), shared by the buckets that
+                             use the same DGHs so that every value is generalized only once for each level.
+    :param algorithm:        Algorithm of generalization: "greedy" generalizes each round the attribute with
+                             the most distinct values, "ola" searches the full-domain generalization of least
+                             loss in the lattice of the generalization levels, "mondrian" partitions the
+                             numeric attributes on their medians and generalizes them to ranges without DGHs.
+    :param stats:            Dictionary where the statistics of the lattice search are added.
     :param v:                If True prints some logging.
     :raises KeyError:        If a QI attribute name is not valid.
     :return:                 List of dataset raw with qi anonymized.
@@ -28,11 +46,94 @@ def k_anonymization(pc: tuple, B: list, attributes: dict, qi_names: list, k: int
     if v:
         _DEBUG = False
 
-    debug("[DEBUG] Instantiating the QI frequency dictionary...", _DEBUG)
+    if generalizations is None:
+        generalizations = dict()
+
+    log("[LOG] Starting anonymizing the path condition {0}.".format(pc), endl=False, enabled=v)
+
+    # Get the anonymized QI sequences with the indices of their rows
+    if algorithm == "ola":
+        groups = lattice_groups(B, attributes, qi_names, k, dghs, generalizations, stats, v)
+    elif algorithm == "mondrian":
+        groups = mondrian_groups(B, attributes, qi_names, k, generic_values, v)
+    elif generalize_groups is not None:
+        groups = generalize_groups(B, attributes, qi_names, k, dghs, generalizations, v)
+    else:
+        groups = _generalize_sequences(B, attributes, qi_names, k, dghs, generalizations, v)
+
+    if groups is None:
+        return
+
+    debug("[DEBUG] Adding tuples of path condition {0} to the anonymized table..."
+          .format(pc), _DEBUG)
+    log("[LOG] Adding tuples of path condition {0} to the anonymized table..."
+        .format(pc), endl=True, enabled=v)
+
+    anonymized = []
+
+    # Add all tuples for every own frequency
+    for qi_anonymized, indexes in groups:
+
+        for index in indexes:
+            n = 0
+            anon_data = list(B[index])
+
+            for name in qi_names:
+                anon_data[attributes.get(name)] = qi_anonymized[n]
+                n += 1
+
+            if is_it_opt:
+
+                has_not_concret_values = True
+
+                if len(attributes.items()) != len(generic_values.items()):
+                    has_not_concret_values = False
+                else:
+                    for attr, gen_vals in generic_values.items():
+                        if anon_data[attributes[attr]] not in gen_vals:
+                            has_not_concret_values = False
+                            break
+
+                if len(anon_data) <= 1 or has_not_concret_values:
+                    log("[LOG] Data raw {0} error: unsatisfiable case"
+                        .format(tuple(anon_data)), endl=True, enabled=v)
+                    continue
+
+            anonymized.append((anon_data, pc, B))
+
+    return anonymized
+
+
+def _generalize_sequences(B: list, attributes: dict, qi_names: list, k: int, dghs: dict, generalizations: dict,
+                          v=True):
+    """
+    Generalizes one by one the QI sequences of a bucket, each round on the attribute with the most distinct
+    values, until the tuples which are not k-anonymous are at most k, then suppresses them.
+
+    :param B:                Bucket of tuples that respect the path condition.
+    :param attributes:       Dictionary of attributes corresponding the qi to the index in the raw dataset tuples.
+    :param qi_names:         List of names of the Quasi Identifiers attributes to consider during k-anonymization.
+    :param k:                Level of anonymity.
+    :param dghs:             Dictionary whose values are DGH instances and whose
+                             keys are the corresponding attribute names.
+    :param generalizations:  Look up table whose keys are triples (attribute, value, level) and whose values are
+                             the generalized values.
+    :param v:                If True prints some logging.
+    :return:                 List of couples (anonymized QI sequence, indices of its rows in B), None if a value
+                             is not in the hierarchy of its attribute.
+    """
+
+    debug("[DEBUG] Instantiating the QI groups dictionary...", _DEBUG)
     # Dictionary whose keys are sequences of values for the Quasi Identifiers and whose values
-    # are couples (n, s) where n is the number of occurrences of a sequence and s is a set
-    # containing the indices of the rows in the original table file with those QI values:
-    qi_frequency = dict()
+    # are the ids of the groups of the rows with those QI values:
+    qi_groups = dict()
+    # Number of occurrences of each group, indexed by group id:
+    counts = array('q')
+    # Group id of each row of the bucket, indexed by row:
+    row_groups = array('q')
+    # Group in which each group has been merged, indexed by group id (the group itself if it
+    # has not been merged), so that merging two groups doesn't need to relabel their rows:
+    merged = array('q')
 
     debug("[DEBUG] Instantiating the attributes domains dictionary...", _DEBUG)
     # Dictionary whose keys are the indices in the QI attribute names list, and whose values are
@@ -47,10 +148,6 @@ def k_anonymization(pc: tuple, B: list, attributes: dict, qi_names: list, k: int
     for n, attribute in enumerate(qi_names):
         gen_levels[n] = 0
 
-    log("[LOG] Starting anonymizing the path condition {0}.".format(pc), endl=False, enabled=v)
-
-    anonymized = []
-
     # I anonymize all datasets divided from their path condition
     for n, row in enumerate(B):
         # n = index row
@@ -62,20 +159,23 @@ def k_anonymization(pc: tuple, B: list, attributes: dict, qi_names: list, k: int
             qi_values.append(row[attributes.get(name)])
         qi_values = tuple(qi_values)
 
-        if qi_values in qi_frequency:
-            occurrences = qi_frequency[qi_values][0] + 1  # add occurrence of B row
-            rows_set = qi_frequency[qi_values][1].union([n])  # add index
-            qi_frequency[qi_values] = (occurrences, rows_set)  # update value
+        group = qi_groups.get(qi_values)
+        if group is not None:
+            counts[group] += 1  # add occurrence of B row
         else:
-            # Initialize number of occurrences and set of row indices:
-            qi_frequency[qi_values] = (1, set())
-            qi_frequency[qi_values][1].add(n)
+            # Initialize a new group with one occurrence:
+            group = len(counts)
+            qi_groups[qi_values] = group
+            counts.append(1)
+            merged.append(group)
 
             # Update domain set for each attribute in this sequence:
             for j, value in enumerate(qi_values):
                 domains[j].add(value)
 
-        log("[LOG] Read line {0} from the path condition {1}.".format(n, pc), endl=False, enabled=v)
+        row_groups.append(group)
+
+        log("[LOG] Read line {0} from the path condition.".format(n), endl=False, enabled=v)
 
     log('', endl=True, enabled=v)
 
@@ -84,12 +184,12 @@ def k_anonymization(pc: tuple, B: list, attributes: dict, qi_names: list, k: int
         # Number of tuples which are not k-anonymous.
         count = 0
 
-        for qi_sequence in qi_frequency:
+        for group in qi_groups.values():
 
             # Check number of occurrences of this sequence:
-            if qi_frequency[qi_sequence][0] < k:
+            if counts[group] < k:
                 # Update the number of tuples which are not k-anonymous:
-                count += qi_frequency[qi_sequence][0]
+                count += counts[group]
         debug("[DEBUG] {0} tuples are not yet k-anonymous...".format(count), _DEBUG)
         log("[LOG] {0} tuples are not yet k-anonymous...".format(count), endl=True, enabled=v)
 
@@ -110,65 +210,63 @@ def k_anonymization(pc: tuple, B: list, attributes: dict, qi_names: list, k: int
             log("[LOG] Current attribute with most distinct values is '{0}'."
                 .format(qi_names[attribute_idx]), endl=True, enabled=v)
 
+            # The values not yet in the look up table are generalized by the DGH in a single call, in order
+            # of the sequences:
+            missing = list(dict.fromkeys(
+                qi_sequence[attribute_idx] for qi_sequence in qi_groups
+                if (qi_names[attribute_idx], qi_sequence[attribute_idx], gen_levels[attribute_idx])
+                not in generalizations))
+            debug("[DEBUG] Generalizing {0} values...".format(len(missing)), _DEBUG)
+            try:
+                generalized_values = dghs[qi_names[attribute_idx]].generalize_column(missing,
+                                                                                     gen_levels[attribute_idx])
+            except KeyError as error:
+                log('', endl=True, enabled=True)
+                log("[ERROR] Value '{0}' is not in hierarchy for attribute '{1}'."
+                    .format(error.args[0], qi_names[attribute_idx]),
+                    endl=True, enabled=True)
+                return
+            for value, generalized_value in zip(missing, generalized_values):
+                generalizations[(qi_names[attribute_idx], value, gen_levels[attribute_idx])] = generalized_value
+
             # Generalize each value for that attribute and update the attribute set in the
             # domains dictionary:
             domains[attribute_idx] = set()
-            # Look up table for the generalized values, to avoid searching in hierarchies:
-            generalizations = dict()
 
             # Note: using the list of keys since the dictionary is changed in size at runtime
             # and it can't be used an iterator:
-            for j, qi_sequence in enumerate(list(qi_frequency)):
+            for j, qi_sequence in enumerate(list(qi_groups)):
 
                 log("[LOG] Generalizing attribute '{0}' for sequence {1}..."
                     .format(qi_names[attribute_idx], j), endl=False, enabled=v)
 
-                # Get the generalized value:
-                if qi_sequence[attribute_idx] in generalizations:
-                    # Find directly the generalized value in the look up table:
-                    generalized_value = generalizations[attribute_idx]
-                else:
-                    debug("[DEBUG] Generalizing value '{0}'...".format(qi_sequence[attribute_idx]), _DEBUG)
-                    # Get the corresponding generalized value from the attribute DGH:
-                    try:
-                        generalized_value = dghs[qi_names[attribute_idx]] \
-                            .generalize(
-                            qi_sequence[attribute_idx],
-                            gen_levels[attribute_idx])
-                    except KeyError as error:
-                        log('', endl=True, enabled=True)
-                        log("[ERROR] Value '{0}' is not in hierarchy for attribute '{1}'."
-                            .format(error.args[0], qi_names[attribute_idx]),
-                            endl=True, enabled=True)
-                        return
-
-                    if generalized_value is None:
-                        # Skip if it's a hierarchy root:
-                        continue
-
-                    # Add to the look up table:
-                    generalizations[attribute_idx] = generalized_value
+                # Key of the value in the look up table of the generalized values:
+                key = (qi_names[attribute_idx], qi_sequence[attribute_idx], gen_levels[attribute_idx])
+
+                # Find directly the generalized value in the look up table:
+                generalized_value = generalizations[key]
+
+                if generalized_value is None:
+                    # Skip if it's a hierarchy root:
+                    continue
 
                 # Tuple with generalized value:
                 new_qi_sequence = list(qi_sequence)
                 new_qi_sequence[attribute_idx] = generalized_value
                 new_qi_sequence = tuple(new_qi_sequence)
 
+                # Remove the old sequence:
+                group = qi_groups.pop(qi_sequence)
+
                 # Check if there is already a tuple like this one:
-                if new_qi_sequence in qi_frequency:
-                    # Update the already existing one:
-                    # Update the number of occurrences:
-                    occurrences = qi_frequency[new_qi_sequence][0] \
-                                  + qi_frequency[qi_sequence][0]
-                    # Unite the row indices sets:
-                    rows_set = qi_frequency[new_qi_sequence][1] \
-                        .union(qi_frequency[qi_sequence][1])
-                    qi_frequency[new_qi_sequence] = (occurrences, rows_set)
-                    # Remove the old sequence:
-                    qi_frequency.pop(qi_sequence)
+                new_group = qi_groups.get(new_qi_sequence)
+                if new_group is not None:
+                    # Merge the group into the already existing one:
+                    counts[new_group] += counts[group]
+                    merged[group] = new_group
                 else:
-                    # Add new tuple and remove the old one:
-                    qi_frequency[new_qi_sequence] = qi_frequency.pop(qi_sequence)
+                    # Add new tuple with the same group:
+                    qi_groups[new_qi_sequence] = group
 
                 # Update domain set with this attribute value:
                 domains[attribute_idx].add(new_qi_sequence[attribute_idx])
@@ -186,48 +284,19 @@ def k_anonymization(pc: tuple, B: list, attributes: dict, qi_names: list, k: int
 
             debug("[DEBUG] Suppressing max k non k-anonymous tuples...")
             # Drop tuples which occur less than k times:
-            rem_sequence = [qi_sequence for qi_sequence, data in qi_frequency.items() if data[0] < k]
+            rem_sequence = [qi_sequence for qi_sequence, group in qi_groups.items() if counts[group] < k]
             for rs in rem_sequence:
-                del qi_frequency[rs]
+                del qi_groups[rs]
             log("[LOG] Suppressed {0} tuples.".format(count), endl=True, enabled=v)
 
-            debug("[DEBUG] Adding tuples of path condition {0} to the anonymized table..."
-                  .format(pc), _DEBUG)
-            log("[LOG] Adding tuples of path condition {0} to the anonymized table..."
-                .format(pc), endl=True, enabled=v)
-
-            # Add all tuples for every own frequency
-            for qi_sequence in qi_frequency.items():
-                qi_anonymized = qi_sequence[0]
-                indexes = qi_sequence[1][1]
-
-                for index in indexes:
-                    n = 0
-                    anon_data = list(B[index])
-
-                    for name in qi_names:
-                        anon_data[attributes.get(name)] = qi_anonymized[n]
-                        n += 1
-
-                    if is_it_opt:
-
-                        has_not_concret_values = True
-
-                        if len(attributes.items()) != len(generic_values.items()):
-                            has_not_concret_values = False
-                        else:
-                            for attr, gen_vals in generic_values.items():
-                                if anon_data[attributes[attr]] not in gen_vals:
-                                    has_not_concret_values = False
-                                    break
-
-                        if len(anon_data) <= 1 or has_not_concret_values:
-                            log("[LOG] Data raw {0} error: unsatisfiable case"
-                                .format(tuple(anon_data)), endl=True, enabled=v)
-                            continue
-
-                    anonymized.append((anon_data, pc, B))
-
-            break
-
-    return anonymized
+            # Indices of the rows of every remaining group, following the merges of the groups
+            # of each row up to its final group:
+            group_rows = dict((group, []) for group in qi_groups.values())
+            for index, group in enumerate(row_groups):
+                while merged[group] != group:
+                    merged[group] = merged[merged[group]]
+                    group = merged[group]
+                if group in group_rows:
+                    group_rows[group].append(index)
+
+            return [(qi_anonymized, group_rows[group]) for qi_anonymized, group in qi_groups.items()]
@@ -1,31 +1,28 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from importlib import import_module
-from utils.utils import log, strToVal
+from utils.table import ColumnarTable, SpilledTable
+from utils.utils import debug, log, strToVal
+
+try:
+    import numpy as np
+    from utils.pc_compiler import load_exec_pc_batch, numpy_columns
+except ImportError:
+    # Without numpy the subject program is always executed row by row
+    load_exec_pc_batch = None
 
 _DEBUG = True
 
 
-def program_execution(raw_dataset: list, attributes: dict, string_dict: dict, subject_program: str, k: int, v=True):
+def load_subject_program(subject_program: str):
     """
-    Doing the program execution (phase 1), where it takes raw tuples and execute the subject
-    program to each of the tuples, then collect the path conditions exercised by each execution
+    Loads the functions of the subject program that build the path conditions.
 
-    :param raw_dataset:       List of all raw dataset of input file.
-    :param attributes:        Dictionary of attributes corresponding the qi to the index in the raw dataset tuples.
-    :param string_dict:       Dictionary of input strings domain of all attributes that contains only strings.
     :param subject_program:   Path to the python file that contains path conditions.
-    :param k:                 Level of anonymity.
-    :param v:                 If True prints some logging.
-    :return:                  Dictionary of path condition (buckets dictionary built by executing the subject program)
-                              to raw dataset (condition codes of path condition).
+    :return:                  Couple (exec_pc, exec_pc_batch), where exec_pc_batch is None if the subject
+                              program can only be executed row by row.
     """
 
-    global _DEBUG
-
-    if v:
-        _DEBUG = False
-
-    pc_buckets = dict()
-
     # Read python file of path conditions and get the exec_pc function to use for tuples
     # To see how to write this file, go to README.md file
     try:
@@ -34,47 +31,200 @@ def program_execution(raw_dataset: list, attributes: dict, string_dict: dict, su
     except IOError:
         raise IOError("Error loading exec_pc from python file {0}".format("import.subject_program_db"))
 
-    for i, row in enumerate(raw_dataset):
-        # Get all attribute names, converting in int or float or string, depends from data
-        qi_sequence = list()
-        for attribute in attributes:
-            qi_sequence.append(strToVal(row[attributes[attribute]]))
+    # Get the batch version of exec_pc (defined in the subject program or compiled from exec_pc),
+    # that evaluates all the rows of a batch at once on its columns
+    exec_pc_batch = None
+    if load_exec_pc_batch is not None:
+        try:
+            exec_pc_batch = load_exec_pc_batch(mod)
+        except (ValueError, OSError) as error:
+            debug("[DEBUG] The subject program is executed row by row: {0}".format(error), _DEBUG)
 
-        # I create the dictionary attribute -> value
-        dataset_code = dict()
-        for j in range(len(qi_sequence)):
-            dataset_code[list(attributes.keys())[j]] = qi_sequence[j]
+    return exec_pc, exec_pc_batch
 
-        pc_exec = exec_pc(dataset_code)
 
-        pc = []
-        for pc_elem in pc_exec:
-            if list(pc_elem)[0] in string_dict.keys():
-                pc.append((pc_elem[0], pc_elem[1], string_dict[pc_elem[0]].index(pc_elem[2])))
-            else:
-                pc.append(pc_elem)
-        pc = tuple(pc)
+def execute_batch(columns: dict, exec_pc, exec_pc_batch=None):
+    """
+    Executes the subject program on a batch of rows.
+
+    :param columns:           Dictionary whose keys are the attributes names and whose values are the columns of
+                              the batch, with the values converted to their type.
+    :param exec_pc:           Function of the subject program that gets the path condition of a row.
+    :param exec_pc_batch:     Function of the subject program that gets the path conditions of the batch, if None
+                              exec_pc is called on every row.
+    :return:                  Dictionary of path conditions whose values are the indices of the batch rows, in order
+                              of the first row of each path condition.
+    """
+
+    # Dictionary of path conditions whose values are the indices of the batch rows
+    batch_buckets = dict()
+
+    if exec_pc_batch is not None:
+        ids, pcs = exec_pc_batch(numpy_columns(columns))
+        # Group the rows by their path condition, in order of the first row of each one
+        groups = [(np.flatnonzero(ids == j), pc) for j, pc in enumerate(pcs)]
+        for indices, pc in sorted(groups, key=lambda group: group[0][0]):
+            batch_buckets[pc] = indices.tolist()
+        return batch_buckets
+
+    attribute_names = list(columns.keys())
+
+    for i, qi_sequence in enumerate(zip(*columns.values())):
+        # I create the dictionary attribute -> value
+        dataset_code = dict(zip(attribute_names, qi_sequence))
+
+        pc = tuple(exec_pc(dataset_code))
 
         # I remove all data rows that can't respect all path conditions
         if len(pc) == 0:
             continue
 
         # Set empty list of pc if it not exists
-        if pc not in pc_buckets:
-            pc_buckets.setdefault(pc, [])
+        if pc not in batch_buckets:
+            batch_buckets.setdefault(pc, [])
+
+        # Add the index of the row to list of pc
+        batch_buckets[pc].append(i)
+
+    return batch_buckets
 
-        # Add qi_sequence_indexed to list of pc
-        pc_buckets[pc].append(row)
 
-        log("[LOG] Read line {0} from the input file.".format(i), endl=False, enabled=v)
+_worker = dict()
+"""
+Dictionary of the functions of the subject program imported by a worker process.
+"""
+
+
+def _init_worker(subject_program: str):
+    """
+    Initializes a worker process of the pool, importing the subject program only once.
+    """
+
+    _worker["exec_pc"], _worker["exec_pc_batch"] = load_subject_program(subject_program)
+
+
+def _worker_execute_batch(columns: dict, is_columnar: bool):
+    """
+    Executes in a worker process the subject program on a batch of rows.
+    """
+
+    return execute_batch(columns, _worker["exec_pc"], _worker["exec_pc_batch"] if is_columnar else None)
+
+
+def program_execution(raw_dataset: list, attributes: dict, string_dict: dict, subject_program: str, k: int,
+                      workers=1, spill_dir: str = None, v=True):
+    """
+    Doing the program execution (phase 1), where it takes raw tuples and execute the subject
+    program to each of the tuples, then collect the path conditions exercised by each execution
+
+    :param raw_dataset:       List or columnar table of all raw dataset of input file, or an iterable of batches
+                              (lists or columnar tables) of the raw dataset read from the input file.
+    :param attributes:        Dictionary of attributes corresponding the qi to the index in the raw dataset tuples.
+    :param string_dict:       Dictionary of input strings domain of all attributes that contains only strings.
+    :param subject_program:   Path to the python file that contains path conditions.
+    :param k:                 Level of anonymity.
+    :param workers:           Number of processes that execute the subject program on the batches in parallel.
+    :param spill_dir:         Path to the directory where the rows of the columnar batches are spilled bucket by
+                              bucket, None to keep all the buckets in memory.
+    :param v:                 If True prints some logging.
+    :return:                  Dictionary of path condition (buckets dictionary built by executing the subject program)
+                              to raw dataset (condition codes of path condition), as lists or columnar tables
+                              like the batches of the input, or as spilled tables to load if spill_dir is set.
+    """
+
+    global _DEBUG
+
+    if v:
+        _DEBUG = False
+
+    pc_buckets = dict()
+
+    # A list of rows or a table is executed as a single batch
+    if isinstance(raw_dataset, (list, ColumnarTable)):
+        batches = [raw_dataset]
+    else:
+        batches = raw_dataset
+
+    # Index of the first row of the batch in the input file
+    offset = 0
+
+    for batch, batch_buckets in _execute_batches(batches, attributes, subject_program, workers):
+
+        # Add the rows of the batch to the buckets
+        for pc, indices in batch_buckets.items():
+            if isinstance(batch, ColumnarTable):
+                if pc not in pc_buckets:
+                    # The rows of a spilled bucket are written to its file batch by batch
+                    pc_buckets[pc] = ColumnarTable(batch.attributes, batch.string_dict, batch.types) \
+                        if spill_dir is None else SpilledTable(spill_dir, batch.attributes, batch.string_dict,
+                                                               batch.types)
+                pc_buckets[pc].extend(batch, indices)
+            else:
+                pc_buckets.setdefault(pc, []).extend(batch[i] for i in indices)
+
+        offset += len(batch)
+
+        log("[LOG] Read line {0} from the input file.".format(offset - 1), endl=False, enabled=v)
+
+    # The string values of the path conditions are converted to the indices of the values in the
+    # dictionaries of their attributes, now that all the strings of the input are known
+    for pc in list(pc_buckets):
+        pc_encoded = []
+        for pc_elem in pc:
+            if pc_elem[0] in string_dict.keys():
+                pc_encoded.append((pc_elem[0], pc_elem[1], string_dict[pc_elem[0]].encode(pc_elem[2])))
+            else:
+                pc_encoded.append(pc_elem)
+        pc_buckets[tuple(pc_encoded)] = pc_buckets.pop(pc)
 
     # Remove all pc buckets with number of elements minor of k
     rem_pc = [pc for pc, B in pc_buckets.items() if len(B) < k]
     for rpc in rem_pc:
         log("[ERROR] Unsatisfiable case. pc = {0}, |B| = {1}"
             .format(rpc, len(pc_buckets.get(rpc))), endl=False, enabled=v)
-        del pc_buckets[rpc]
+        B = pc_buckets.pop(rpc)
+        if isinstance(B, SpilledTable):
+            B.discard()
 
     log('', endl=True, enabled=v)
 
     return pc_buckets
+
+
+def _execute_batches(batches, attributes: dict, subject_program: str, workers=1):
+    """
+    Executes the subject program on every batch, in a pool of processes if there is more than one worker.
+
+    :param batches:           Iterable of batches (lists or columnar tables) of the raw dataset.
+    :param attributes:        Dictionary of attributes corresponding the qi to the index in the raw dataset tuples.
+    :param subject_program:   Path to the python file that contains path conditions.
+    :param workers:           Number of processes that execute the subject program on the batches in parallel.
+    :return:                  Generator of couples (batch, batch buckets), in the order of the batches.
+    """
+
+    def columns_of(batch):
+        # Columns of the batch with the values converted to their type
+        if isinstance(batch, ColumnarTable):
+            return batch.decoded_columns()
+        return dict((attribute, [strToVal(row[n]) for row in batch]) for attribute, n in attributes.items())
+
+    if workers <= 1:
+        exec_pc, exec_pc_batch = load_subject_program(subject_program)
+        for batch in batches:
+            is_columnar = isinstance(batch, ColumnarTable)
+            yield batch, execute_batch(columns_of(batch), exec_pc, exec_pc_batch if is_columnar else None)
+        return
+
+    # Every process of the pool imports the subject program once and executes whole batches; at most two
+    # batches for each worker are pending, so the batches are read while the workers execute the previous ones
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(subject_program,)) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append((batch, executor.submit(_worker_execute_batch, columns_of(batch),
+                                                   isinstance(batch, ColumnarTable))))
+            if len(pending) >= 2 * workers:
+                batch, future = pending.popleft()
+                yield batch, future.result()
+        while pending:
+            batch, future = pending.popleft()
+            yield batch, future.result()
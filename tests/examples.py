@@ -0,0 +1,23 @@
+"""
+Files of the examples shared by the tests.
+"""
+
+QI_NAMES = ["age", "city_birth", "zip_code"]
+"""
+Names of the Quasi Identifiers attributes of db_100.csv.
+"""
+DGH_PATHS = {"age": "example/age_generalization.csv", "city_birth": "example/city_birth_generalization.csv",
+             "zip_code": "example/zip_code_generalization.csv"}
+"""
+Dictionary whose keys are the Quasi Identifiers of db_100.csv and whose values are the paths to their generalization
+files.
+"""
+
+HEART = ("example/heart.csv", "import.subject_program_heart", "example/data_constraints_heart.txt")
+"""
+Triple (dataset, subject program, data constraints) of heart.csv.
+"""
+DB = ("example/db_100.csv", "import.subject_program_db", "example/data_constraints_db.txt")
+"""
+Triple (dataset, subject program, data constraints) of db_100.csv.
+"""
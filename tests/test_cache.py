@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from utils import cache
+from utils.cache import load_cached
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "file.txt")
+        self.cache_dir = os.path.join(self.directory.name, "cache")
+        # Number of times the file has been parsed
+        self.parsed = 0
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, content: str, mtime_ns: int):
+        """
+        Writes the file with a modification time.
+
+        :param content:     Content of the file.
+        :param mtime_ns:    Modification time in nanoseconds.
+        """
+
+        with open(self.path, "w") as f:
+            f.write(content)
+        os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def load(self):
+        """
+        Loads the content of the file through the cache.
+
+        :return:    Couple (content, number of times the file has been hashed).
+        """
+
+        def parse():
+            self.parsed += 1
+            with open(self.path) as f:
+                return f.read()
+
+        with patch.object(cache, "file_hash", wraps=cache.file_hash) as file_hash:
+            content = load_cached(self.path, "text", parse, self.cache_dir)
+        return content, file_hash.call_count
+
+    def test_load(self):
+        """
+        The file is parsed cold and when it's edited, and the cache is used without hashing the file when its
+        modification time has not changed.
+        """
+
+        self.write("abc", 10 ** 18)
+        self.assertEqual(self.load(), ("abc", 1))
+        self.assertEqual(self.parsed, 1)
+
+        # Warm
+        self.assertEqual(self.load(), ("abc", 0))
+        self.assertEqual(self.parsed, 1)
+
+        # Edited with the same size
+        self.write("xyz", 2 * 10 ** 18)
+        self.assertEqual(self.load(), ("xyz", 1))
+        self.assertEqual(self.parsed, 2)
+        self.assertEqual(self.load(), ("xyz", 0))
+        self.assertEqual(self.parsed, 2)
+
+        # Touched, the content is the same
+        os.utime(self.path, ns=(3 * 10 ** 18, 3 * 10 ** 18))
+        self.assertEqual(self.load(), ("xyz", 1))
+        self.assertEqual(self.parsed, 2)
+        self.assertEqual(self.load(), ("xyz", 0))
+
+        # Edited with another size and the same modification time
+        self.write("abcd", 3 * 10 ** 18)
+        self.assertEqual(self.load()[0], "abcd")
+        self.assertEqual(self.parsed, 3)
+
+    def test_no_cache_dir(self):
+        """
+        Without the cache directory the file is parsed at every load.
+        """
+
+        self.write("abc", 10 ** 18)
+        self.cache_dir = None
+        self.load()
+        self.load()
+        self.assertEqual(self.parsed, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
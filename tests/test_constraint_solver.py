@@ -0,0 +1,182 @@
+import csv
+from collections import Counter
+import operator
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from main import CsvTable
+from modules import k_anonymization
+from modules.constraint_generation import release_buckets
+from modules.constraint_solver import read_data_constraints
+from utils.sampler import DomainSampler
+from utils.utils import strToVal
+from tests.examples import DB, DGH_PATHS, HEART, QI_NAMES
+
+OPERATORS = {"==": operator.eq, "!=": operator.ne, "<": operator.lt, "<=": operator.le, ">": operator.gt,
+             ">=": operator.ge}
+
+
+class TestReleaseData(unittest.TestCase):
+
+    def setUp(self):
+        k_anonymization._DEBUG = False
+        # Sorts of the attributes for the solver, None for integers
+        self.sorts = None
+
+    def release(self, raw_dataset: str, subject_program: str, data_constraints: str, conf_opt: str,
+                tuple_fields: list = None):
+        """
+        Generates the release data of a dataset and checks that every release data satisfies the path condition
+        of its bucket and the data constraints, and that the release data of every bucket keep the k-anonymity.
+
+        :param raw_dataset:         Path to the dataset.
+        :param subject_program:     Module of the subject program.
+        :param data_constraints:    Path to the file that contains data constraints.
+        :param conf_opt:            Configuration option to generate new tuples.
+        :param tuple_fields:        List of fields that are included in constraints to have no tuple repeat.
+        :return:                    Number of release data.
+        """
+
+        is_it_opt = conf_opt == "I-T"
+        table = CsvTable(raw_dataset, DGH_PATHS if is_it_opt else dict())
+        table.program_execution_module(subject_program, 3, v=False)
+        if is_it_opt:
+            buckets = list(table.k_anonymization_module(QI_NAMES, 3, True, v=False))
+        else:
+            buckets = [(pc, B, B) for pc, B in table._pop_buckets()]
+
+        count = 0
+        for (pc, B, tuples), R_pc in zip(buckets, release_buckets(buckets, tuple(table.attributes), tuple_fields,
+                                                             table.string_dict, conf_opt, data_constraints,
+                                                             table.generic_values, decimals=table.decimals,
+                                                             sorts=self.sorts, v=False)):
+            for r in R_pc:
+                self.assert_satisfies(r, pc, table.string_dict, data_constraints)
+            self.assert_anonymous(R_pc, B, tuples, conf_opt, tuple_fields, table.attributes, table.string_dict,
+                                  table.generic_values, QI_NAMES if is_it_opt else None)
+            count += len(R_pc)
+        return count
+
+    def assert_satisfies(self, r: dict, pc: tuple, string_dict: dict, data_constraints: str):
+        """
+        Checks that a release data satisfies a path condition and the data constraints.
+
+        :param r:                   Release data, as dictionary whose keys are the attributes names.
+        :param pc:                  Path condition, with the strings encoded as in string_dict.
+        :param string_dict:         Dictionary of the encoders of the attributes that contains only strings.
+        :param data_constraints:    Path to the file that contains data constraints.
+        """
+
+        values = dict((attr, string_dict[attr].encode(val) if attr in string_dict else strToVal(val, True))
+                      for attr, val in r.items())
+
+        for attr, op, val in pc:
+            self.assertTrue(OPERATORS[op](values[attr], val), "{0} violates {1} {2} {3}".format(r, attr, op, val))
+
+        for attr, _, constraints in read_data_constraints(data_constraints):
+            for op, val in constraints:
+                if op == "==":
+                    self.assertIn(values[attr], [strToVal(single_val) for single_val in val.split("-")],
+                                  "{0} violates {1} {2} {3}".format(r, attr, op, val))
+                else:
+                    self.assertTrue(OPERATORS[op](values[attr], strToVal(val)),
+                                    "{0} violates {1} {2} {3}".format(r, attr, op, val))
+
+    def assert_anonymous(self, R_pc: list, B, tuples: list, conf_opt: str, tuple_fields: list, attributes: dict,
+                         string_dict: dict, generic_values: dict, qi_names: list = None, k=3):
+        """
+        Checks that the release data of a bucket keep the k-anonymity: the bucket has at least k tuples (and every
+        anonymized QI sequence at least k occurrences), at most a release data is generated for every tuple, and
+        the release data don't repeat the values of the bucket in every field for P-F, in the tuple fields for
+        P-T, and in the generalized fields of a tuple for I-T, whose other fields are kept.
+
+        :param R_pc:                Release data of the bucket.
+        :param B:                   Bucket of raw tuples.
+        :param tuples:              List of tuples (raw or anonymized) of the bucket released.
+        :param conf_opt:            Configuration option to generate new tuples.
+        :param tuple_fields:        List of fields that are included in constraints to have no tuple repeat.
+        :param attributes:          Dictionary of attributes corresponding to the indices in the tuples.
+        :param string_dict:         Dictionary of the encoders of the attributes that contains only strings.
+        :param generic_values:      Dictionary that contains the generalized values of the QI.
+        :param qi_names:            List of names of the Quasi Identifiers attributes anonymized, None if the
+                                    tuples are raw.
+        :param k:                   Level of anonymity.
+        """
+
+        def value(attr, val):
+            return string_dict[attr].encode(val) if attr in string_dict else strToVal(val, True)
+
+        self.assertGreaterEqual(len(B), k)
+        self.assertLessEqual(len(R_pc), len(tuples))
+        if qi_names is not None:
+            sequences = Counter(tuple(b[attributes[name]] for name in qi_names) for b in tuples)
+            self.assertGreaterEqual(min(sequences.values()), k)
+
+        bucket_values = dict((attr, set(value(attr, row[n]) for row in B)) for attr, n in attributes.items())
+        first = next(iter(attributes))
+
+        for r in R_pc:
+            if conf_opt == "I-T":
+                # The release data of one of the tuples, with new values in its generalized fields
+                def released(b):
+                    fields = [attr for attr, n in attributes.items() if b[n] in generic_values.get(attr, ())]
+                    return all(value(attr, r[attr]) not in bucket_values[attr] if attr in (fields or [first])
+                               else value(attr, r[attr]) == value(attr, b[n]) for attr, n in attributes.items())
+                self.assertTrue(any(released(b) for b in tuples), "{0} is not released from the bucket".format(r))
+            else:
+                for attr in attributes if conf_opt == "P-F" else tuple_fields or [first]:
+                    self.assertNotIn(value(attr, r[attr]), bucket_values[attr],
+                                     "{0} repeats the value of {1} of the bucket".format(r, attr))
+
+    def check_options(self):
+        """
+        Checks the release data of the examples with every configuration option.
+        """
+
+        self.release(*HEART, "P-F")
+        self.assertGreater(self.release(*HEART, "P-T", ["age", "thalach"]), 0)
+        self.assertGreater(self.release(*DB, "P-F"), 0)
+        self.assertGreater(self.release(*DB, "P-T"), 0)
+        self.assertGreater(self.release(*DB, "I-T"), 0)
+
+        # A float attribute with a negative bound
+        with open(HEART[2]) as f:
+            lines = f.read().replace("oldpeak >= 0.0 <= 7.5", "oldpeak >= -1.5 <= 7.5")
+        with tempfile.TemporaryDirectory() as directory:
+            data_constraints = os.path.join(directory, "data_constraints_heart.txt")
+            with open(data_constraints, "w") as f:
+                f.write(lines)
+            self.assertGreater(self.release(*HEART[:2], data_constraints, "P-T", ["age", "thalach"]), 0)
+
+    def test_sampler(self):
+        """
+        The release data sampled from the domains satisfy the path conditions and the data constraints.
+        """
+
+        self.check_options()
+
+    def test_solver(self):
+        """
+        The release data solved by Z3 satisfy the path conditions and the data constraints.
+        """
+
+        with patch.object(DomainSampler, "restrict", return_value=None):
+            self.check_options()
+
+    def test_solver_bit_vectors(self):
+        """
+        The release data solved by Z3 with the bounded attributes as bit-vectors satisfy the path conditions and
+        the data constraints.
+        """
+
+        self.sorts = dict()
+        for raw_dataset in (HEART[0], DB[0]):
+            with open(raw_dataset, newline='') as f:
+                self.sorts.update((attr, "bitvec") for attr in next(csv.reader(f)))
+        with patch.object(DomainSampler, "restrict", return_value=None):
+            self.check_options()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+from utils.dgh import CsvDGH
+from tests.examples import DGH_PATHS
+
+
+class TestDGH(unittest.TestCase):
+
+    def test_generalize_column(self):
+        """
+        A column is generalized like its values one by one, on every level.
+        """
+
+        for path in DGH_PATHS.values():
+            dgh = CsvDGH(path)
+            for level, values in enumerate(dgh.values):
+                with self.subTest(path=path, level=level):
+                    self.assertEqual(dgh.generalize_column(values, level),
+                                     [dgh.generalize(value, level) for value in values])
+
+            with self.assertRaises(KeyError):
+                dgh.generalize_column(["not a value"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
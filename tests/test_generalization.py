@@ -0,0 +1,45 @@
+import unittest
+from main import CsvTable
+from modules import k_anonymization
+from modules.k_anonymization import _generalize_sequences
+from utils.generalization import generalize_groups
+from tests.examples import DB, DGH_PATHS, QI_NAMES
+
+
+def _groups(groups):
+    """
+    Gets the groups of a generalization in a comparable form.
+
+    :param groups:  List of couples (anonymized QI sequence, indices of its rows), None if a value is not in the
+                    hierarchy of its attribute.
+    :return:        List of couples (tuple of the QI sequence, list of the indices as int).
+    """
+
+    if groups is None:
+        return None
+    return [(tuple(qi_sequence), [int(index) for index in indices]) for qi_sequence, indices in groups]
+
+
+class TestGeneralization(unittest.TestCase):
+
+    def setUp(self):
+        k_anonymization._DEBUG = False
+
+    def test_engines_equal(self):
+        """
+        The numpy engine generalizes the QI sequences of every bucket like the Python loop.
+        """
+
+        for k in (3, 10):
+            table = CsvTable(DB[0], DGH_PATHS)
+            table.program_execution_module(DB[1], k, v=False)
+
+            for pc, B in table._pop_buckets():
+                with self.subTest(k=k, pc=pc):
+                    expected = _generalize_sequences(B, table.attributes, QI_NAMES, k, table.dghs, dict(), False)
+                    actual = generalize_groups(B, table.attributes, QI_NAMES, k, table.dghs, dict(), False)
+                    self.assertEqual(_groups(expected), _groups(actual))
+
+
+if __name__ == "__main__":
+    unittest.main()
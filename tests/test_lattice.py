@@ -0,0 +1,80 @@
+import unittest
+from main import CsvTable
+from modules import k_anonymization
+from utils.lattice import _Lattice, lattice_groups
+from tests.examples import DB, DGH_PATHS, QI_NAMES
+
+
+class TestLattice(unittest.TestCase):
+
+    def setUp(self):
+        k_anonymization._DEBUG = False
+
+    def buckets(self, k: int):
+        """
+        Gets the buckets of db_100.csv with at least k rows.
+
+        :param k:   Level of anonymity.
+        :return:    Couple (table, list of couples (path condition, bucket)).
+        """
+
+        table = CsvTable(DB[0], DGH_PATHS)
+        table.program_execution_module(DB[1], k, v=False)
+        return table, list(table._pop_buckets())
+
+    def test_k_minimal(self):
+        """
+        The k-minimal nodes found are the k-anonymous nodes without k-anonymous predecessors, counting the
+        suppressed tuples of every node from the QI sequences of the bucket.
+        """
+
+        for k in (3, 10):
+            table, buckets = self.buckets(k)
+            for pc, B in buckets:
+                with self.subTest(k=k, pc=pc):
+                    sequences = dict()
+                    for n, row in enumerate(B):
+                        sequences.setdefault(tuple(row[table.attributes[name]] for name in QI_NAMES), []).append(n)
+                    lattice = _Lattice(sequences, QI_NAMES, k, table.dghs, dict())
+
+                    def is_k_anonymous(node):
+                        counts = dict()
+                        for sequence, rows in sequences.items():
+                            generalized = lattice.generalize(sequence, node)
+                            counts[generalized] = counts.get(generalized, 0) + len(rows)
+                        return sum(count for count in counts.values() if count < k) <= k
+
+                    found = set()
+                    lattice.k_minimal(lattice.bottom, lattice.top, found)
+                    k_minimal = set(node for node in found
+                                    if not any(other != node and all(o <= n for o, n in zip(other, node))
+                                               for other in found))
+
+                    expected = set()
+                    for node in lattice._below(lattice.top):
+                        predecessors = [node[:j] + (level - 1,) + node[j + 1:]
+                                        for j, level in enumerate(node) if level != 0]
+                        if is_k_anonymous(node) and not any(is_k_anonymous(other) for other in predecessors):
+                            expected.add(node)
+
+                    self.assertEqual(k_minimal, expected)
+
+    def test_groups(self):
+        """
+        Every group of the generalized bucket has at least k rows, and every row is in at most one group.
+        """
+
+        for k in (3, 10):
+            table, buckets = self.buckets(k)
+            for pc, B in buckets:
+                with self.subTest(k=k, pc=pc):
+                    groups = lattice_groups(B, table.attributes, QI_NAMES, k, table.dghs, dict(), v=False)
+                    self.assertIsNotNone(groups)
+                    rows = [n for _, indices in groups for n in indices]
+                    self.assertEqual(len(rows), len(set(rows)))
+                    for qi_sequence, indices in groups:
+                        self.assertGreaterEqual(len(indices), k)
+
+
+if __name__ == "__main__":
+    unittest.main()
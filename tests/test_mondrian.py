@@ -0,0 +1,67 @@
+import unittest
+from main import CsvTable
+from modules import k_anonymization
+from utils.mondrian import mondrian_groups
+from utils.utils import strToVal
+from tests.examples import DB
+
+QI_NUMBERS = ["age", "zip_code"]
+
+
+class TestMondrian(unittest.TestCase):
+
+    def setUp(self):
+        k_anonymization._DEBUG = False
+
+    def assert_partitions(self, B, attributes: dict, k: int):
+        """
+        Checks that the partitions of a bucket have at least k rows, cover every row once, and that their
+        generalized values contain the values of their rows.
+
+        :param B:           Bucket of tuples.
+        :param attributes:  Dictionary of attributes corresponding the qi to the index in the tuples.
+        :param k:           Level of anonymity.
+        """
+
+        generic_values = dict()
+        groups = mondrian_groups(B, attributes, QI_NUMBERS, k, generic_values, v=False)
+
+        self.assertEqual(sorted(n for _, rows in groups for n in rows), list(range(len(B))))
+        for qi_anonymized, rows in groups:
+            self.assertGreaterEqual(len(rows), k)
+            for name, value in zip(QI_NUMBERS, qi_anonymized):
+                if value.startswith("["):
+                    self.assertIn(value, generic_values[name])
+                    low, high = (strToVal(bound, True) for bound in value[1:-1].split(","))
+                else:
+                    low = high = strToVal(value, True)
+                for n in rows:
+                    self.assertTrue(low <= strToVal(B[n][attributes[name]], True) <= high,
+                                    "{0} = {1} not in {2}".format(name, B[n][attributes[name]], value))
+
+    def test_partitions(self):
+        """
+        The buckets of db_100.csv are partitioned in groups of at least k rows.
+        """
+
+        for k in (3, 10):
+            table = CsvTable(DB[0], dict())
+            table.program_execution_module(DB[1], k, v=False)
+            for pc, B in table._pop_buckets():
+                with self.subTest(k=k, pc=pc):
+                    self.assert_partitions(B, table.attributes, k)
+
+    def test_negative(self):
+        """
+        The ranges with negative bounds are written as "[min,max]".
+        """
+
+        B = [[str(age), str(zip_code)] for age, zip_code in ((-5, -20), (-3, -10), (-1, 0), (2, 10), (4, 20))]
+        self.assert_partitions(B, {"age": 0, "zip_code": 1}, 2)
+
+        groups = mondrian_groups(B, {"age": 0, "zip_code": 1}, QI_NUMBERS, 2, dict(), v=False)
+        self.assertEqual(groups, [(("[-5,-1]", "[-20,0]"), [0, 1, 2]), (("[2,4]", "[10,20]"), [3, 4])])
+
+
+if __name__ == "__main__":
+    unittest.main()
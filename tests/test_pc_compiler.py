@@ -0,0 +1,73 @@
+import os
+import sys
+import tempfile
+import unittest
+from main import CsvTable
+from modules import program_execution
+from modules.program_execution import execute_batch, load_subject_program
+from utils.pc_compiler import compile_exec_pc
+from tests.examples import DB, HEART
+
+# exec_pc with a loop, that can't be compiled to exec_pc_batch
+UNSUPPORTED = '''def exec_pc(t: dict):
+    pc = []
+
+    for attr in ("age", "zip_code"):
+        if t[attr] < 50:
+            pc.append((attr, "<", 50))
+        else:
+            pc.append((attr, ">=", 50))
+
+    return pc
+'''
+
+
+class TestPcCompiler(unittest.TestCase):
+
+    def setUp(self):
+        program_execution._DEBUG = False
+
+    def test_batch_equal(self):
+        """
+        The compiled exec_pc_batch builds the same buckets of every batch as exec_pc row by row.
+        """
+
+        for raw_dataset, subject_program, _ in (HEART, DB):
+            exec_pc, exec_pc_batch = load_subject_program(subject_program)
+            self.assertIsNotNone(exec_pc_batch)
+
+            table = CsvTable(raw_dataset, dict(), chunk_size=40)
+            for i, batch in enumerate(table._read_batches()):
+                with self.subTest(raw_dataset=raw_dataset, batch=i):
+                    columns = batch.decoded_columns()
+                    expected = execute_batch(columns, exec_pc)
+                    actual = execute_batch(columns, exec_pc, exec_pc_batch)
+                    self.assertEqual(list(actual.items()), list(expected.items()))
+            del table
+
+    def test_unsupported(self):
+        """
+        A subject program that can't be compiled is executed row by row.
+        """
+
+        with self.assertRaises(ValueError):
+            compile_exec_pc(UNSUPPORTED)
+
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "subject_program_loop.py"), "w") as f:
+                f.write(UNSUPPORTED)
+            sys.path.insert(0, directory)
+            try:
+                exec_pc, exec_pc_batch = load_subject_program("subject_program_loop")
+            finally:
+                sys.path.remove(directory)
+                sys.modules.pop("subject_program_loop", None)
+
+        self.assertIsNone(exec_pc_batch)
+        buckets = execute_batch({"age": [20, 60, 30], "zip_code": [70, 10, 80]}, exec_pc, exec_pc_batch)
+        self.assertEqual(buckets, {(("age", "<", 50), ("zip_code", ">=", 50)): [0, 2],
+                                   (("age", ">=", 50), ("zip_code", "<", 50)): [1]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+from contextlib import nullcontext
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from main import CsvTable
+from modules import k_anonymization
+from modules.constraint_generation import release_buckets
+from modules.constraint_solver import ConstraintSolver
+from utils.release_pool import ReleasePool
+from utils.sampler import DomainSampler
+from tests.examples import DB, HEART
+
+
+class TestReleasePool(unittest.TestCase):
+
+    def setUp(self):
+        k_anonymization._DEBUG = False
+
+    def release(self, raw_dataset: str, subject_program: str, data_constraints: str, conf_opt: str,
+                tuple_fields: list = None, workers=1, threads=0):
+        """
+        Generates the release data of the buckets of a dataset.
+
+        :param raw_dataset:         Path to the dataset.
+        :param subject_program:     Module of the subject program.
+        :param data_constraints:    Path to the file that contains data constraints.
+        :param conf_opt:            Configuration option to generate new tuples.
+        :param tuple_fields:        List of fields that are included in constraints to have no tuple repeat.
+        :param workers:             Number of processes that solve the buckets.
+        :param threads:             Number of threads of the release pool, 0 to solve the buckets serially.
+        :return:                    List of the release data of every bucket.
+        """
+
+        table = CsvTable(raw_dataset, dict())
+        table.program_execution_module(subject_program, 3, v=False)
+        buckets = [(pc, B, B) for pc, B in table._pop_buckets()]
+
+        return list(release_buckets(buckets, tuple(table.attributes), tuple_fields, table.string_dict, conf_opt,
+                                    data_constraints, table.generic_values, workers, decimals=table.decimals,
+                                    threads=threads, high_water=5, v=False))
+
+    def solver(self):
+        """
+        Gets a constraint solver of the data constraints of db_100.csv.
+        """
+
+        table = CsvTable(DB[0], dict())
+        table.program_execution_module(DB[1], 3, v=False)
+        return ConstraintSolver(tuple(table.attributes), DB[2], table.string_dict)
+
+    def test_threads_equal(self):
+        """
+        The release data solved by the threads of the pool (and by the worker processes) are the release data
+        solved serially, in the order of the buckets, sampled from the domains or solved by Z3.
+        """
+
+        for sampler in (True, False):
+            with nullcontext() if sampler else patch.object(DomainSampler, "restrict", return_value=None):
+                for args in ((*HEART, "P-T", ["age", "thalach"]), (*DB, "P-F"), (*DB, "P-T")):
+                    with self.subTest(sampler=sampler, conf_opt=args[3], raw_dataset=args[0]):
+                        expected = self.release(*args)
+                        self.assertGreater(sum(len(R_pc) for R_pc in expected), 0)
+                        for threads in (1, 3):
+                            self.assertEqual(self.release(*args, threads=threads), expected)
+                        # the patch of the sampler doesn't reach the worker processes that aren't forked
+                        if sampler:
+                            self.assertEqual(self.release(*args, workers=2), expected)
+
+    def test_error(self):
+        """
+        An exception raised solving a bucket is raised when the bucket is popped, after the buckets before it.
+        """
+
+        def produce(constraint_solver, bucket):
+            for i in range(bucket):
+                yield i
+            if bucket == 2:
+                raise ValueError("bucket 2")
+
+        with ReleasePool(self.solver(), produce, threads=2) as pool:
+            for bucket in (1, 2, 3):
+                pool.submit(bucket)
+            self.assertEqual(pool.pop(), (1, [0]))
+            with self.assertRaises(ValueError):
+                pool.pop()
+            self.assertEqual(pool.pop(), (3, [0, 1, 2]))
+            self.assertEqual(len(pool), 0)
+
+    def test_close_blocked(self):
+        """
+        The pool is closed while its threads wait at high water for the first bucket to be popped.
+        """
+
+        def produce(constraint_solver, bucket):
+            i = 0
+            while bucket != 0 or i < 3:
+                yield i
+                i += 1
+
+        pool = ReleasePool(self.solver(), produce, threads=3, high_water=2)
+        for bucket in (0, 1, 2):
+            pool.submit(bucket)
+
+        deadline = time.monotonic() + 10
+        while not (pool.ready() and pool.full()) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(pool.ready() and pool.full())
+        time.sleep(0.05)
+        self.assertLessEqual(pool.size, 3 + 2)
+
+        closing = threading.Thread(target=pool.close, daemon=True)
+        closing.start()
+        closing.join(10)
+        self.assertFalse(closing.is_alive())
+        self.assertFalse(any(thread.is_alive() for thread in pool._threads))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import os
+import pickle
+import tempfile
+import unittest
+from main import CsvTable
+from utils.table import ColumnarTable, SpilledTable
+
+
+class TestColumnarTable(unittest.TestCase):
+
+    def test_wrong_number(self):
+        """
+        A row with a value of a numeric column that isn't a number is refused without changing the table.
+        """
+
+        table = ColumnarTable({"a": 0, "b": 1})
+        table.append(["1", "x"])
+
+        for row in (["", "y"], ["z", "y"], ["2"]):
+            with self.subTest(row=row):
+                with self.assertRaises(ValueError):
+                    table.append(row)
+                self.assertEqual(len(table), 1)
+                self.assertEqual([len(column) for column in table.columns], [1, 1])
+                self.assertEqual(table.types, ["int", "str"])
+
+        table.append(["1.5", "y"])
+        self.assertEqual(table.types, ["float", "str"])
+        self.assertEqual(list(table), [["1", "x"], ["1.5", "y"]])
+
+    def test_numbers_of_strings(self):
+        """
+        The numbers of a column of strings are converted to numbers, like every value of the table file.
+        """
+
+        table = ColumnarTable({"a": 0})
+        for row in (["x"], ["5"], ["2.5"]):
+            table.append(row)
+
+        self.assertEqual(table.types, ["str"])
+        self.assertEqual(table.decoded_columns()["a"], ["x", 5, 2.5])
+        self.assertEqual(table.values(1), [5])
+        self.assertEqual(list(table), [["x"], ["5"], ["2.5"]])
+
+    def test_pickle_without_strings(self):
+        """
+        A pickled table doesn't contain the string encoders, which are set again with share_strings.
+        """
+
+        table = ColumnarTable({"a": 0, "b": 1})
+        for row in (["1", "x"], ["2", "y"]):
+            table.append(row)
+
+        copy = pickle.loads(pickle.dumps(table))
+        self.assertIsNone(copy.string_dict)
+        self.assertEqual(list(copy.share_strings(table.string_dict)), list(table))
+
+    def test_wrong_row_file(self):
+        """
+        A wrong row of the table file is reported as an error reading the file.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "table.csv")
+            with open(path, "w") as f:
+                f.write("a,b\n1,x\n,y\n")
+
+            table = CsvTable(path, dict())
+            with self.assertRaises(IOError) as context:
+                list(table._read_batches())
+            self.assertEqual(context.exception.filename, path)
+            del table
+
+
+class TestSpilledTable(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        """
+        The rows spilled batch by batch are loaded like the rows kept in memory, also when a column of integers
+        becomes a column of decimals, and the file is removed when the table is loaded.
+        """
+
+        batches = [[["1", "x", "10"], ["2", "y", "20"], ["3", "x", "30"]], [["4", "z", "2.50"], ["5", "y", "40"]]]
+        attributes = {"a": 0, "b": 1, "c": 2}
+        string_dict = dict()
+
+        memory = None
+        spilled = None
+        for rows in batches:
+            batch = ColumnarTable(attributes, string_dict, memory.types if memory is not None else None)
+            for row in rows:
+                batch.append(row)
+            if memory is None:
+                memory = ColumnarTable(attributes, string_dict, batch.types)
+                spilled = SpilledTable(self.directory.name, attributes, string_dict, batch.types)
+            memory.extend(batch, [0, 2] if len(batch) == 3 else None)
+            spilled.extend(batch, [0, 2] if len(batch) == 3 else None)
+
+        self.assertEqual(len(spilled), 4)
+        self.assertEqual(len(os.listdir(self.directory.name)), 1)
+
+        table = spilled.load()
+        self.assertEqual(table.types, ["int", "str", "float"])
+        self.assertEqual(list(table), list(memory))
+        self.assertEqual(list(table), [["1", "x", "10"], ["3", "x", "30"], ["4", "z", "2.50"], ["5", "y", "40"]])
+        self.assertEqual(table.decoded_columns(), memory.decoded_columns())
+        self.assertIsNone(spilled.path)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_discard(self):
+        """
+        The file of a table is removed when the table is discarded or deleted without being loaded.
+        """
+
+        table = ColumnarTable({"a": 0})
+        table.append(["1"])
+
+        for delete in (False, True):
+            with self.subTest(delete=delete):
+                spilled = SpilledTable(self.directory.name, table.attributes, table.string_dict, table.types)
+                spilled.extend(table)
+                self.assertTrue(os.path.exists(spilled.path))
+                if delete:
+                    del spilled
+                else:
+                    spilled.discard()
+                    self.assertIsNone(spilled.path)
+                    spilled.discard()
+                self.assertEqual(os.listdir(self.directory.name), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
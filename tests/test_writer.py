@@ -0,0 +1,93 @@
+import csv
+import gzip
+import os
+import tempfile
+import unittest
+from utils.writer import CsvReleaseWriter
+
+FIELDS = ["id", "age", "city_birth", "disease"]
+
+PLAIN = [["1", "40", "San Giovanni Del Dosso", "Cancer"], ["2", "43", "Comina (La)", "AIDS"],
+         ["3", "-1.5", "L'Aquila", ""], ["4", "0", "Reggio nell'Emilia", "Anorexia"]]
+
+QUOTED = [["5", "[30,40]", 'Say "hi"', "a,b"], ["6", '"', ",", "line\nbreak"]]
+
+
+def _baseline(rows: list):
+    """
+    Gets the content written by the first writer of the release data, that joined the values with commas.
+
+    :param rows:    List of rows of the release data.
+    :return:        Content of the file, header included.
+    """
+
+    return "".join(",".join(row) + "\n" for row in [FIELDS] + rows)
+
+
+class TestCsvReleaseWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name: str, rows: list):
+        """
+        Writes release data with a writer that writes every two rows.
+
+        :param name:    Name of the output file.
+        :param rows:    List of rows of the release data.
+        :return:        Path to the output file.
+        """
+
+        path = os.path.join(self.directory.name, name)
+        with CsvReleaseWriter(path, batch_size=2) as writer:
+            for row in rows:
+                writer.write([dict(zip(FIELDS, row))])
+            self.assertEqual(writer.count + len(writer.rows), len(rows))
+        return path
+
+    def test_plain(self):
+        """
+        The values without commas and quotes are written byte by byte like the first writer.
+        """
+
+        with open(self.write("release.csv", PLAIN), newline='') as f:
+            self.assertEqual(f.read(), _baseline(PLAIN))
+
+    def test_quoted(self):
+        """
+        The values with commas, quotes or line breaks are quoted, so that they are read back the same, and
+        the other values of their rows are written like the first writer.
+        """
+
+        with open(self.write("release.csv", PLAIN + QUOTED), newline='') as f:
+            content = f.read()
+        self.assertTrue(content.startswith(_baseline(PLAIN)))
+        self.assertIn('5,"[30,40]","Say ""hi""","a,b"\n', content)
+
+        with open(os.path.join(self.directory.name, "release.csv"), newline='') as f:
+            self.assertEqual(list(csv.reader(f)), [FIELDS] + PLAIN + QUOTED)
+
+    def test_gzip(self):
+        """
+        A ".gz" file contains the same bytes of the file written without compression.
+        """
+
+        with open(self.write("release.csv", PLAIN + QUOTED), 'rb') as f:
+            expected = f.read()
+        with gzip.open(self.write("release.csv.gz", PLAIN + QUOTED), 'rb') as f:
+            self.assertEqual(f.read(), expected)
+
+    def test_empty(self):
+        """
+        Without release data the file is empty.
+        """
+
+        with open(self.write("release.csv", []), 'rb') as f:
+            self.assertEqual(f.read(), b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
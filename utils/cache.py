@@ -0,0 +1,100 @@
+import hashlib
+import os
+import pickle
+
+CACHE_VERSION = 2
+"""
+Version of the format of the cached objects, to change when the classes of the cached objects change so that the
+old cache files are not used.
+"""
+
+
+def file_stat(path: str):
+    """
+    Gets the key of a file in the cache without reading it: its absolute path, its size and its modification time.
+
+    :param path:                Path to the file.
+    :return:                    Triple (absolute path, size in bytes, modification time in nanoseconds).
+    :raises FileNotFoundError:  If the file is not found.
+    """
+
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+
+    return path, stat.st_size, stat.st_mtime_ns
+
+
+def file_hash(path: str):
+    """
+    Gets the hash of the content of a file.
+
+    :param path:                Path to the file.
+    :return:                    SHA-1 of the content, as hexadecimal string.
+    :raises FileNotFoundError:  If the file is not found.
+    :raises IOError:            If the file cannot be read.
+    """
+
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def load_cached(path: str, kind: str, parse, cache_dir: str = None):
+    """
+    Gets the object parsed from a file, from the cache directory if the file has not changed since it was cached,
+    otherwise parsing the file and saving the object in the cache directory. Every cache file starts with the key
+    of its file, that is its path, size, modification time and the hash of its content: the object is unpickled
+    if the path, size and modification time are the same, and the file is hashed only if the modification time
+    has changed, to reuse the object if the content is the same.
+
+    :param path:                Path to the file to parse.
+    :param kind:                Name of the kind of the object, to cache different objects parsed from the same file.
+    :param parse:               Function without arguments that parses the file.
+    :param cache_dir:           Path to the cache directory, if None the file is always parsed.
+    :return:                    The parsed object.
+    :raises FileNotFoundError:  If the file is not found.
+    :raises IOError:            If the file cannot be read.
+    """
+
+    if cache_dir is None:
+        return parse()
+
+    stat = (CACHE_VERSION, kind) + file_stat(path)
+    cache_path = os.path.join(cache_dir, "{0}-{1}.pickle".format(kind, hashlib.sha1(stat[2].encode()).hexdigest()))
+
+    parsed, digest = None, None
+    try:
+        with open(cache_path, 'rb') as file:
+            key = pickle.load(file)
+            if key[:-1] == stat:
+                return pickle.load(file)
+            # A file touched but not edited has the same size and content
+            if key[:-2] == stat[:-1]:
+                digest = file_hash(path)
+                if key[-1] == digest:
+                    parsed = pickle.load(file)
+    except Exception:
+        # A missing, stale or corrupted cache file is written again
+        pass
+
+    if parsed is None:
+        parsed = parse()
+    if digest is None:
+        digest = file_hash(path)
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # The cache file is replaced only when it's complete, so a concurrent run never reads half of it
+        temp_path = "{0}.{1}.tmp".format(cache_path, os.getpid())
+        with open(temp_path, 'wb') as file:
+            pickle.dump(stat + (digest,), file, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(parsed, file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        # Without a writable cache directory the files are parsed at every run
+        pass
+
+    return parsed
@@ -1,6 +1,6 @@
 import csv
-from io import StringIO
-from utils.tree import Node, Tree
+from array import array
+from sys import intern
 
 
 class _DGH:
@@ -8,26 +8,99 @@ class _DGH:
     def __init__(self, dgh_path):
 
         """
-        Represents multiple hierarchies as a dictionary of trees.
+        Represents multiple hierarchies by generalization levels: the values of every level are stored once,
+        with the index of the parent of each one on the level above.
 
         :param dgh_path:            Path to the file which contains the DGH definition.
         :raises FileNotFoundError:  If the file is not found.
         :raises IOError:            If the file cannot be read.
         """
 
-        self.hierarchies = dict()
+        self.gen_levels = dict()
         """
-        Dictionary where the values are trees and the keys are the values of the corresponding 
-        roots.
+        Dictionary whose keys are the hierarchies root values and whose values are the hierarchies
+        depths (number of generalization levels).
         """
 
-        self.gen_levels = dict()
+        self.values = []
         """
-        Dictionary whose keys are the hierarchies root values and whose values are the hierarchies 
-        depths (number of generalization levels).
+        List of the levels of generalization, from 0 (not generalized), where every level is the list of the
+        values of its nodes (interned strings).
+        """
+
+        self.parent_indices = []
+        """
+        List of the levels of generalization, where every level is the array of the indices of the parents of
+        its nodes in the level above (-1 for the roots).
+        """
+
+        self.indices = []
+        """
+        List of the levels of generalization, where every level is a dictionary whose keys are the values
+        and whose values are the indices of their nodes.
+        """
+
+        self.generic_values = set()
+        """
+        Set of the values that are generalizations of other values.
+        """
+
+        self._hierarchies = []
+
+    def _add_node(self, value: str, level: int, parent: int):
+
+        """
+        Adds a node to a level of generalization.
+
+        :param value:   Value of the node.
+        :param level:   Level of generalization of the node.
+        :param parent:  Index of the parent in the level above, -1 for a root.
+        :return:        Index of the node in its level.
+        """
+
+        while len(self.values) <= level:
+            self.values.append([])
+            self.parent_indices.append(array('l'))
+            self._hierarchies.append(array('l'))
+
+        self.values[level].append(value)
+        self.parent_indices[level].append(parent)
+        self._hierarchies[level].append(-1 if parent >= 0 else len(self.gen_levels) - 1)
+
+        return len(self.values[level]) - 1
+
+    def _build_index(self):
+
+        """
+        Builds the index of the values of every level. On duplicated values the first node found in the
+        hierarchies order and in breadth-first order is kept, as a search on the trees would do: the nodes
+        of a level are ordered by hierarchy, then by the order of their parents, then by insertion.
         """
 
-    def generalize(self, value, gen_level=None):
+        ranks = [None] * len(self.values)
+
+        for level in reversed(range(len(self.values))):
+            parents, hierarchies = self.parent_indices[level], self._hierarchies[level]
+
+            # The nodes inherit the hierarchy of their parents
+            for i, parent in enumerate(parents):
+                if parent >= 0:
+                    hierarchies[i] = self._hierarchies[level + 1][parent]
+
+            order = sorted(range(len(parents)), key=lambda i: (hierarchies[i],
+                                                               ranks[level + 1][parents[i]] if parents[i] >= 0
+                                                               else -1, i))
+            ranks[level] = array('l', [0]) * len(order)
+            index = dict()
+            for rank, i in enumerate(order):
+                ranks[level][i] = rank
+                index.setdefault(self.values[level][i], i)
+            self.indices.append(index)
+
+        self.indices.reverse()
+        self._hierarchies = None
+
+    def generalize(self, value, gen_level: int):
 
         """
         Returns the upper lever generalization of a value in the domain.
@@ -38,28 +111,44 @@ class _DGH:
         :raises KeyError:   If the value is not part of the domain.
         """
 
-        # Search across all hierarchies (slow if there are a lot of hierarchies):
-        for hierarchy in self.hierarchies:
-
-            # Try to find the node:
-            if gen_level is None:
-                node = self.hierarchies[hierarchy].bfs_search(value)
-            else:
-                node = self.hierarchies[hierarchy].bfs_search(
-                    value,
-                    self.gen_levels[hierarchy] - gen_level)     # Depth.
-
-            if node is None:
-                continue
-            elif node.parent is None:
-                # The value is a hierarchy root:
-                return None
-            else:
-                return node.parent.data
+        try:
+            if 0 <= gen_level < len(self.indices):
+                parent = self.parent_indices[gen_level][self.indices[gen_level][value]]
+                return self.values[gen_level + 1][parent] if parent >= 0 else None
+        except KeyError:
+            pass
 
         # The value is not found:
         raise KeyError(value)
 
+    def generalize_column(self, values, gen_level):
+
+        """
+        Returns the upper level generalization of a whole column of values in the domain.
+
+        :param values:      Values to generalize, all on the same level.
+        :param gen_level:   Current level of generalization, where 0 means it's not generalized.
+        :return:            List of the generalized values on the level above, None for the roots.
+        :raises KeyError:   If a value is not part of the domain.
+        """
+
+        if 0 <= gen_level < len(self.indices):
+            index, parents = self.indices[gen_level], self.parent_indices[gen_level]
+        else:
+            index, parents = dict(), array('l')
+        above = self.values[gen_level + 1] if 0 <= gen_level < len(self.values) - 1 else []
+        generalized = []
+
+        for value in values:
+            try:
+                parent = parents[index[value]]
+            except KeyError:
+                # The value is not found:
+                raise KeyError(value)
+            generalized.append(above[parent] if parent >= 0 else None)
+
+        return generalized
+
 
 class CsvDGH(_DGH):
 
@@ -67,52 +156,44 @@ class CsvDGH(_DGH):
 
         super().__init__(dgh_path)
 
+        # Dictionary whose keys are triples (level, parent index, value) and whose values are the
+        # indices of the nodes, used only while reading the file:
+        children = dict()
+        # Dictionary whose keys are the roots values and whose values are the indices of their nodes:
+        roots = dict()
+
         try:
-            with open(dgh_path, 'r') as file:
-                for line in file:
+            with open(dgh_path, 'r', newline='') as file:
+                for values in csv.reader(file):
 
-                    try:
-                        csv_reader = csv.reader(StringIO(line))
-                    except IOError:
-                        raise
-                    values = next(csv_reader)
+                    if len(values) == 0:
+                        continue
+                    values = [intern(value) for value in values]
 
                     # If it doesn't exist a hierarchy with this root, add one:
-                    if values[-1] not in self.hierarchies:
-                        self.hierarchies[values[-1]] = Tree(Node(values[-1]))
+                    if values[-1] not in roots:
                         # Add the number of generalization levels:
                         self.gen_levels[values[-1]] = len(values) - 1
-                    # Populate hierarchy with the other values:
-                    self._insert_hierarchy(values[:-1], self.hierarchies[values[-1]])
+                        roots[values[-1]] = self._add_node(values[-1], len(values) - 1, -1)
+
+                    # Populate hierarchy with the other values, from parent to child:
+                    level, parent = self.gen_levels[values[-1]], roots[values[-1]]
+                    for value in reversed(values[:-1]):
+                        level -= 1
+                        if level < 0:
+                            # The values deeper than the first line of their hierarchy have no level
+                            break
+                        node = children.get((level, parent, value))
+                        if node is None:
+                            node = self._add_node(value, level, parent)
+                            children[(level, parent, value)] = node
+                        parent = node
+
+                    self.generic_values.update(values[1:])
 
         except FileNotFoundError:
             raise
         except IOError:
             raise
 
-    @staticmethod
-    def _insert_hierarchy(values, tree):
-
-        """
-        Inserts values, ordered from child to parent, to a tree.
-
-        :param values:  List of values to insert.
-        :param tree:    Tree where to insert the values.
-        :return:        True if the hierarchy has been inserted, False otherwise.
-        """
-
-        current_node = tree.root
-
-        for i, value in enumerate(reversed(values)):
-
-            if value in current_node.children:
-                current_node = current_node.children[value]
-                continue
-            else:
-                # Insert the hierarchy from this node:
-                for v in list(reversed(values))[i:]:
-                    current_node.add_child(Node(v))
-                    current_node = current_node.children[v]
-                return True
-
-        return False
+        self._build_index()
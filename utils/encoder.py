@@ -0,0 +1,94 @@
+from utils.utils import strToVal
+
+
+class StringEncoder:
+
+    def __init__(self, values=()):
+
+        """
+        Bidirectional dictionary encoder of the domain of an attribute that contains only strings:
+        every string is mapped to an integer code used by the solver.
+
+        :param values:  Initial values of the domain, encoded in the given order.
+        """
+
+        self.codes = dict()
+        """
+        Dictionary whose keys are the strings of the domain and whose values are the corresponding
+        codes.
+        """
+
+        self.values = []
+        """
+        List of the strings of the domain, where the index of each string is its code.
+        """
+
+        self._typed = []
+
+        for value in values:
+            self.add(value)
+
+    def __len__(self):
+
+        return len(self.values)
+
+    def __contains__(self, value):
+
+        return value in self.codes
+
+    def __iter__(self):
+
+        return iter(self.values)
+
+    def add(self, value: str) -> int:
+
+        """
+        Adds a string to the domain, if it isn't already part of it.
+
+        :param value:   String to add.
+        :return:        The code of the string.
+        """
+
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def typed_values(self):
+
+        """
+        Gets the values of the domain converted like the values of the table file, so that the strings which
+        are numbers are int or float; every string is converted only once.
+
+        :return:    List of the values of the domain, where the index of each value is its code.
+        """
+
+        for value in self.values[len(self._typed):]:
+            self._typed.append(strToVal(value))
+        return self._typed
+
+    def encode(self, value: str) -> int:
+
+        """
+        Gets the code of a string of the domain.
+
+        :param value:       String to encode.
+        :return:            The code of the string.
+        :raises KeyError:   If the string is not part of the domain.
+        """
+
+        return self.codes[value]
+
+    def decode(self, code: int) -> str:
+
+        """
+        Gets the string of the domain corresponding to a code.
+
+        :param code:        Code to decode.
+        :return:            The string of the code.
+        :raises IndexError: If the code is not part of the domain.
+        """
+
+        return self.values[code]
@@ -0,0 +1,299 @@
+import numpy as np
+from utils.encoder import StringEncoder
+from utils.table import ColumnarTable
+from utils.utils import log
+
+
+def _encode_column(B, attribute: str, n: int):
+    """
+    Encodes the values of a QI column of a bucket, as strings like they are read from the table file.
+
+    :param B:           Bucket of tuples, as list of rows or columnar table.
+    :param attribute:   Name of the attribute of the column.
+    :param n:           Index of the column.
+    :return:            Couple (encoder, codes), where encoder contains the strings of the column and codes is
+                        the array of the codes of the rows.
+    """
+
+    if not isinstance(B, ColumnarTable):
+        encoder = StringEncoder()
+        codes = np.fromiter((encoder.add(row[n]) for row in B), dtype=np.int64, count=len(B))
+        return encoder, codes
+
+    column = B.column(attribute)
+
+    if B.types[n] == "str":
+        # The codes of the table are shared with the whole dataset, so they are mapped to local ones
+        uniques, codes = np.unique(np.frombuffer(column, dtype=np.int64), return_inverse=True)
+        domain = B.string_dict[attribute].values
+        encoder = StringEncoder(domain[code] for code in uniques.tolist())
+        return encoder, codes.reshape(-1).astype(np.int64)
+
+    uniques, codes = np.unique(np.frombuffer(column, dtype=np.float64 if column.typecode == 'd' else np.int64),
+                               return_inverse=True)
+    encoder = StringEncoder(str(value) for value in uniques.tolist())
+    codes = codes.reshape(-1).astype(np.int64)
+
+    # The numbers that aren't written in their canonical form are different values from the canonical ones
+    for i, text in B.texts[n].items():
+        codes[i] = encoder.add(text)
+
+    return encoder, codes
+
+
+def _row_keys(sequences, sizes: list):
+    """
+    Combines every row of codes in a single integer, so that the rows can be grouped as a flat array.
+
+    :param sequences:   Matrix whose rows are the sequences of codes.
+    :param sizes:       List of the number of codes of each column.
+    :return:            Array of the keys of the rows, or the matrix itself if the keys don't fit in 64 bits.
+    """
+
+    keys = np.zeros(len(sequences), dtype=np.int64)
+    scale = 1
+
+    for j, size in enumerate(sizes):
+        keys += sequences[:, j] * scale
+        scale *= max(size, 1)
+        if scale >= 2 ** 62:
+            return sequences
+
+    return keys
+
+
+def _unique_rows(sequences, sizes: list):
+    """
+    Finds the distinct rows of a matrix of codes, on their keys if they fit in 64 bits.
+
+    :param sequences:   Matrix whose rows are the sequences of codes.
+    :param sizes:       List of the number of codes of each column.
+    :return:            Couple (first, labels), where first is the array of the index of the first occurrence of
+                        each distinct row and labels is the array of the index of the distinct row of each row.
+    """
+
+    keys = _row_keys(sequences, sizes)
+    _, first, labels = np.unique(keys, axis=0 if keys.ndim == 2 else None, return_index=True, return_inverse=True)
+
+    return first, labels.reshape(-1)
+
+
+def _group_rows(sequences, sizes: list):
+    """
+    Groups equal rows of codes, in order of the first occurrence of each one.
+
+    :param sequences:   Matrix whose rows are the sequences of codes.
+    :param sizes:       List of the number of codes of each column.
+    :return:            Couple (groups, labels), where groups is the matrix of the distinct sequences and labels
+                        is the array of the index in groups of each row.
+    """
+
+    first, labels = _unique_rows(sequences, sizes)
+    order = np.argsort(first, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+
+    return sequences[first[order]], rank[labels]
+
+
+def _collides(groups, moved, new_groups, sizes: list):
+    """
+    Checks if some generalized QI sequence is equal to another sequence before the generalization, so that
+    the sequences would be merged depending on their order.
+
+    :param groups:      Matrix of the distinct QI sequences before the generalization.
+    :param moved:       Array of the indices of the generalized sequences.
+    :param new_groups:  Matrix of the generalized sequences, in the order of moved.
+    :param sizes:       List of the number of codes of each attribute.
+    :return:            True if a generalized sequence is equal to a sequence different from its own.
+    """
+
+    if len(moved) == 0:
+        return False
+
+    _, labels = _unique_rows(np.concatenate([groups, new_groups]), sizes)
+
+    # Index of the sequence before the generalization with the same label, -1 if there isn't
+    sequence_of_label = np.full(len(groups) + len(new_groups), -1, dtype=np.int64)
+    sequence_of_label[labels[:len(groups)]] = np.arange(len(groups))
+    matches = sequence_of_label[labels[len(groups):]]
+
+    return bool(((matches >= 0) & (matches != moved)).any())
+
+
+def _generalize_round(groups, counts, attribute_idx: int, parents: dict):
+    """
+    Generalizes one by one the QI sequences on an attribute, merging every sequence into the already existing
+    one equal to it. It's used when a generalized value is also a value of the attribute before the
+    generalization of another sequence, because then the result depends on the order of the sequences.
+
+    :param groups:          Matrix of the distinct QI sequences, in order.
+    :param counts:          Array of the number of occurrences of each sequence.
+    :param attribute_idx:   Index of the attribute to generalize.
+    :param parents:         Dictionary whose keys are the codes of the attribute and whose values are the codes
+                            of their generalizations, -1 for the hierarchy roots.
+    :return:                Tuple (groups, counts, labels, domain size), where labels is the array of the index
+                            in the new groups of each old sequence.
+    """
+
+    qi_groups = dict((tuple(sequence), group) for group, sequence in enumerate(groups.tolist()))
+    counts = counts.tolist()
+    merged = list(range(len(counts)))
+    domain = set()
+
+    for qi_sequence in list(qi_groups):
+        generalized_value = parents[qi_sequence[attribute_idx]]
+        if generalized_value < 0:
+            continue
+
+        new_qi_sequence = qi_sequence[:attribute_idx] + (generalized_value,) + qi_sequence[attribute_idx + 1:]
+        group = qi_groups.pop(qi_sequence)
+        new_group = qi_groups.get(new_qi_sequence)
+        if new_group is not None:
+            counts[new_group] += counts[group]
+            merged[group] = new_group
+        else:
+            qi_groups[new_qi_sequence] = group
+        domain.add(generalized_value)
+
+    position = dict((group, i) for i, group in enumerate(qi_groups.values()))
+    labels = np.empty(len(merged), dtype=np.int64)
+    for group in range(len(merged)):
+        root = group
+        while merged[root] != root:
+            root = merged[root]
+        labels[group] = position[root]
+
+    return np.array(list(qi_groups), dtype=np.int64).reshape(-1, groups.shape[1]), \
+        np.array([counts[group] for group in qi_groups.values()], dtype=np.int64), labels, len(domain)
+
+
+def generalize_groups(B, attributes: dict, qi_names: list, k: int, dghs: dict, generalizations: dict, v=True):
+    """
+    Generalizes the QI sequences of a bucket like the greedy algorithm of k_anonymization, each round on the
+    attribute with the most distinct values, until the tuples which are not k-anonymous are at most k, then
+    suppresses them. The QI columns are encoded as integers, so a round is a gather of the generalized codes
+    and a grouping of the sequences, with the same result of generalizing the sequences one by one.
+
+    :param B:                Bucket of tuples that respect the path condition, as list of rows or columnar table.
+    :param attributes:       Dictionary of attributes corresponding the qi to the index in the raw dataset tuples.
+    :param qi_names:         List of names of the Quasi Identifiers attributes to consider during k-anonymization.
+    :param k:                Level of anonymity.
+    :param dghs:             Dictionary whose values are DGH instances and whose
+                             keys are the corresponding attribute names.
+    :param generalizations:  Look up table whose keys are triples (attribute, value, level) and whose values are
+                             the generalized values.
+    :param v:                If True prints some logging.
+    :return:                 List of couples (anonymized QI sequence, indices of its rows in B), None if a value
+                             is not in the hierarchy of its attribute.
+    """
+
+    if len(B) == 0:
+        return []
+
+    # Encoders of the values of every QI attribute, and matrix of the codes of the rows
+    encoders, columns = [], []
+    for name in qi_names:
+        encoder, codes = _encode_column(B, name, attributes[name])
+        encoders.append(encoder)
+        columns.append(codes)
+
+    # Distinct QI sequences in order of first occurrence, with the index of the sequence of each row
+    groups, row_groups = _group_rows(np.column_stack(columns), [len(encoder) for encoder in encoders])
+    counts = np.bincount(row_groups, minlength=len(groups)).astype(np.int64)
+
+    log("[LOG] Read {0} lines from the path condition.".format(len(B)), endl=True, enabled=v)
+
+    # Number of distinct values and current level of generalization of each QI attribute
+    domain_sizes = [len(np.unique(groups[:, j])) for j in range(len(qi_names))]
+    gen_levels = [0] * len(qi_names)
+
+    while True:
+
+        # Number of tuples which are not k-anonymous.
+        count = int(counts[counts < k].sum())
+        log("[LOG] {0} tuples are not yet k-anonymous...".format(count), endl=True, enabled=v)
+
+        # Get the attribute whose domain has the max cardinality:
+        max_cardinality, max_attribute_idx = 0, None
+        for attribute_idx, domain_size in enumerate(domain_sizes):
+            if domain_size > max_cardinality:
+                max_cardinality = domain_size
+                max_attribute_idx = attribute_idx
+
+        # Limit the number of tuples to suppress to k:
+        if count <= k or max_attribute_idx is None:
+            break
+
+        attribute_idx = max_attribute_idx
+        name = qi_names[attribute_idx]
+        log("[LOG] Current attribute with most distinct values is '{0}'.".format(name), endl=True, enabled=v)
+
+        # Generalized code of every value of the attribute, in order of the sequences
+        column = groups[:, attribute_idx]
+        values, first = np.unique(column, return_index=True)
+        codes = values[np.argsort(first, kind="stable")].tolist()
+
+        # The values not yet in the look up table are generalized by the DGH in a single call
+        missing = [encoders[attribute_idx].values[code] for code in codes
+                   if (name, encoders[attribute_idx].values[code], gen_levels[attribute_idx]) not in generalizations]
+        try:
+            for value, generalized_value in zip(missing, dghs[name].generalize_column(missing,
+                                                                                      gen_levels[attribute_idx])):
+                generalizations[(name, value, gen_levels[attribute_idx])] = generalized_value
+        except KeyError as error:
+            log('', endl=True, enabled=True)
+            log("[ERROR] Value '{0}' is not in hierarchy for attribute '{1}'."
+                .format(error.args[0], name), endl=True, enabled=True)
+            return
+
+        parents = dict()
+        for code in codes:
+            generalized_value = generalizations[(name, encoders[attribute_idx].values[code], gen_levels[attribute_idx])]
+            parents[code] = -1 if generalized_value is None else encoders[attribute_idx].add(generalized_value)
+
+        lookup = np.array([parents[code] for code in values.tolist()], dtype=np.int64)
+        new_column = lookup[np.searchsorted(values, column)]
+        is_moved = new_column >= 0
+        kept = np.flatnonzero(~is_moved)
+        moved = np.flatnonzero(is_moved)
+        new_groups = groups[moved]
+        new_groups[:, attribute_idx] = new_column[moved]
+
+        sizes = [len(encoder) for encoder in encoders]
+
+        if not _collides(groups, moved, new_groups, sizes):
+            # The hierarchy roots keep their places, while the generalized sequences are merged in order of
+            # their first occurrence after them, like the sequences moved one by one to the end
+            new_groups, moved_labels = _group_rows(new_groups, sizes) if len(moved) != 0 \
+                else (new_groups, np.empty(0, dtype=np.int64))
+
+            labels = np.empty(len(groups), dtype=np.int64)
+            labels[kept] = np.arange(len(kept))
+            labels[moved] = len(kept) + moved_labels
+
+            groups = np.concatenate([groups[kept], new_groups])
+            counts = np.bincount(labels, weights=counts, minlength=len(groups)).astype(np.int64)
+            domain_sizes[attribute_idx] = len(np.unique(new_column[moved]))
+        else:
+            groups, counts, labels, domain_sizes[attribute_idx] = \
+                _generalize_round(groups, counts, attribute_idx, parents)
+
+        row_groups = labels[row_groups]
+
+        # Update current level of generalization:
+        gen_levels[attribute_idx] += 1
+
+        log("[LOG] Generalized attribute '{0}'. Current generalization level is {1}."
+            .format(name, gen_levels[attribute_idx]), endl=True, enabled=v)
+
+    log("[LOG] Suppressed {0} tuples.".format(count), endl=True, enabled=v)
+
+    # Indices of the rows of every sequence, in order of row
+    rows = np.argsort(row_groups, kind="stable")
+    ends = np.cumsum(counts)
+
+    # Drop tuples which occur less than k times:
+    return [(tuple(encoders[j].values[code] for j, code in enumerate(sequence)),
+             rows[ends[group] - counts[group]:ends[group]].tolist())
+            for group, sequence in enumerate(groups.tolist()) if counts[group] >= k]
@@ -0,0 +1,281 @@
+from itertools import product
+from utils.utils import log
+
+
+class _Lattice:
+
+    def __init__(self, sequences: dict, qi_names: list, k: int, dghs: dict, generalizations: dict):
+
+        """
+        Lattice of the full-domain generalizations of the QI attributes of a bucket, where every node is the
+        tuple of the generalization levels of the attributes.
+
+        :param sequences:           Dictionary whose keys are the distinct QI sequences of the bucket and whose
+                                    values are the lists of the indices of their rows.
+        :param qi_names:            List of names of the Quasi Identifiers attributes.
+        :param k:                   Level of anonymity.
+        :param dghs:                Dictionary whose values are DGH instances and whose
+                                    keys are the corresponding attribute names.
+        :param generalizations:     Look up table whose keys are triples (attribute, value, level) and whose
+                                    values are the generalized values.
+        :raises KeyError:           If a value is not in the hierarchy of its attribute.
+        """
+
+        self.k = k
+        """
+        Level of anonymity.
+        """
+        self.heights = [max(dghs[name].gen_levels.values(), default=0) for name in qi_names]
+        """
+        List of the number of generalization levels of each attribute.
+        """
+        self.bottom = tuple(0 for _ in qi_names)
+        """
+        Node without generalizations.
+        """
+        self.top = tuple(self.heights)
+        """
+        Node with all the attributes generalized to the roots.
+        """
+        self.chains = []
+        """
+        List of dictionaries, one for each attribute, whose keys are the values of the bucket and whose values
+        are the lists of their generalizations on every level (the root is repeated on the levels above it).
+        """
+        self.frequencies = dict()
+        """
+        Dictionary whose keys are the evaluated nodes and whose values are the dictionaries of the number of
+        occurrences of each generalized QI sequence, from which the nodes above are rolled up.
+        """
+        self.tags = dict()
+        """
+        Dictionary whose keys are the nodes and whose values are True if the node is k-anonymous, False if
+        it's not, evaluated or predicted by monotonicity.
+        """
+        self.evaluated = 0
+        """
+        Number of nodes whose frequencies have been computed.
+        """
+        self._rollups = dict()
+
+        for j, name in enumerate(qi_names):
+            chains = dict()
+            for value in set(sequence[j] for sequence in sequences):
+                chain = [value]
+                for level in range(self.heights[j]):
+                    key = (name, chain[-1], level)
+                    if key not in generalizations:
+                        try:
+                            generalizations[key] = dghs[name].generalize(chain[-1], level)
+                        except KeyError:
+                            raise KeyError(chain[-1], name)
+                    if generalizations[key] is None:
+                        # The root stays the same on the levels above it
+                        chain.extend(chain[-1:] * (self.heights[j] - level))
+                        break
+                    chain.append(generalizations[key])
+                chains[value] = chain
+            self.chains.append(chains)
+
+        self.frequencies[self.bottom] = dict((sequence, len(rows)) for sequence, rows in sequences.items())
+
+    def __len__(self):
+
+        n = 1
+        for height in self.heights:
+            n *= height + 1
+        return n
+
+    def nodes(self, bottom: tuple, top: tuple, height: int):
+
+        """
+        Gets the nodes of a sublattice on a level.
+
+        :param bottom:  Lowest node of the sublattice.
+        :param top:     Highest node of the sublattice.
+        :param height:  Sum of the generalization levels of the nodes.
+        :return:        List of the nodes, in lexicographic order.
+        """
+
+        return [node for node in product(*(range(b, t + 1) for b, t in zip(bottom, top))) if sum(node) == height]
+
+    def generalize(self, sequence: tuple, node: tuple):
+
+        """
+        Generalizes a QI sequence of the bucket to the levels of a node.
+        """
+
+        return tuple(self.chains[j][value][level] for j, (value, level) in enumerate(zip(sequence, node)))
+
+    def _rollup(self, j: int, level_from: int, level_to: int):
+
+        """
+        Gets the dictionary that maps the values of an attribute on a level to their generalizations on a
+        level above.
+        """
+
+        key = (j, level_from, level_to)
+        if key not in self._rollups:
+            rollup = dict()
+            for chain in self.chains[j].values():
+                rollup.setdefault(chain[level_from], chain[level_to])
+            self._rollups[key] = rollup
+
+        return self._rollups[key]
+
+    def suppressed(self, node: tuple):
+
+        """
+        Gets the number of tuples that are not k-anonymous on a node, rolling up its frequencies from the
+        nearest evaluated node below it.
+
+        :param node:    Node to evaluate.
+        :return:        Number of tuples in QI sequences with less than k occurrences.
+        """
+
+        if node not in self.frequencies:
+            below = max((evaluated for evaluated in self.frequencies
+                         if all(e <= n for e, n in zip(evaluated, node))), key=sum)
+            rollups = [self._rollup(j, level_from, level_to)
+                       for j, (level_from, level_to) in enumerate(zip(below, node))]
+
+            frequencies = dict()
+            for sequence, count in self.frequencies[below].items():
+                generalized = tuple(rollup[value] for rollup, value in zip(rollups, sequence))
+                frequencies[generalized] = frequencies.get(generalized, 0) + count
+
+            self.frequencies[node] = frequencies
+            self.evaluated += 1
+
+        return sum(count for count in self.frequencies[node].values() if count < self.k)
+
+    def is_k_anonymous(self, node: tuple):
+
+        """
+        Checks if a node is k-anonymous, that is if the tuples to suppress are at most k like the greedy
+        algorithm, tagging by monotonicity the nodes above it if it is and the nodes below it if it's not.
+        """
+
+        if node not in self.tags:
+            result = self.suppressed(node) <= self.k
+            if result:
+                for other in self._above(node):
+                    self.tags.setdefault(other, True)
+            else:
+                for other in self._below(node):
+                    self.tags.setdefault(other, False)
+            self.tags[node] = result
+
+        return self.tags[node]
+
+    def _above(self, node: tuple):
+
+        return product(*(range(n, t + 1) for n, t in zip(node, self.top)))
+
+    def _below(self, node: tuple):
+
+        return product(*(range(0, n + 1) for n in node))
+
+    def k_minimal(self, bottom: tuple, top: tuple, found: set):
+
+        """
+        Searches the k-minimal nodes of a sublattice like OLA, with a binary search on the levels of its
+        nodes.
+
+        :param bottom:  Lowest node of the sublattice.
+        :param top:     Highest node of the sublattice.
+        :param found:   Set where the k-anonymous nodes found are added.
+        """
+
+        height_bottom, height_top = sum(bottom), sum(top)
+
+        if height_top - height_bottom > 1:
+            for node in self.nodes(bottom, top, (height_bottom + height_top) // 2):
+                if self.is_k_anonymous(node):
+                    self.k_minimal(bottom, node, found)
+                else:
+                    self.k_minimal(node, top, found)
+        elif self.is_k_anonymous(bottom):
+            found.add(bottom)
+        elif self.is_k_anonymous(top):
+            found.add(top)
+
+    def loss(self, node: tuple):
+
+        """
+        Gets the information loss of a node with the precision metric: the mean of the generalization levels
+        of the attributes relative to the heights of their hierarchies, where the suppressed tuples count as
+        generalized to the roots.
+        """
+
+        precision = [level / height for level, height in zip(node, self.heights) if height != 0]
+        precision = sum(precision) / max(len(precision), 1)
+
+        n = sum(self.frequencies[self.bottom].values())
+        suppressed = self.suppressed(node)
+
+        return ((n - suppressed) * precision + suppressed) / n, node
+
+
+def lattice_groups(B, attributes: dict, qi_names: list, k: int, dghs: dict, generalizations: dict,
+                   stats: dict = None, v=True):
+    """
+    Generalizes the QI attributes of a bucket with the full-domain generalization of least loss that is
+    k-anonymous (suppressing at most k tuples), searched in the lattice of the generalization levels like
+    OLA: the nodes are tagged by monotonicity, and the frequencies of a node are rolled up from the nearest
+    evaluated node below it. Then suppresses the tuples which are not k-anonymous.
+
+    :param B:                Bucket of tuples that respect the path condition.
+    :param attributes:       Dictionary of attributes corresponding the qi to the index in the raw dataset tuples.
+    :param qi_names:         List of names of the Quasi Identifiers attributes to consider during k-anonymization.
+    :param k:                Level of anonymity.
+    :param dghs:             Dictionary whose values are DGH instances and whose
+                             keys are the corresponding attribute names.
+    :param generalizations:  Look up table whose keys are triples (attribute, value, level) and whose values are
+                             the generalized values.
+    :param stats:            Dictionary where the number of evaluated nodes ("evaluated_nodes") and of nodes of
+                             the lattices ("lattice_nodes") are added.
+    :param v:                If True prints some logging.
+    :return:                 List of couples (anonymized QI sequence, indices of its rows in B), None if a value
+                             is not in the hierarchy of its attribute.
+    """
+
+    # Distinct QI sequences in order of first occurrence, with the indices of their rows
+    sequences = dict()
+    for n, row in enumerate(B):
+        sequences.setdefault(tuple(row[attributes[name]] for name in qi_names), []).append(n)
+
+    try:
+        lattice = _Lattice(sequences, qi_names, k, dghs, generalizations)
+    except KeyError as error:
+        log('', endl=True, enabled=True)
+        log("[ERROR] Value '{0}' is not in hierarchy for attribute '{1}'."
+            .format(error.args[0], error.args[1]), endl=True, enabled=True)
+        return
+
+    found = set()
+    lattice.k_minimal(lattice.bottom, lattice.top, found)
+
+    # Only the k-minimal nodes are compared, that are the nodes found without other nodes found below them
+    k_minimal = [node for node in found
+                 if not any(other != node and all(o <= n for o, n in zip(other, node)) for other in found)]
+
+    # Node of least loss, or the top if no node is k-anonymous
+    node = min(k_minimal, key=lattice.loss) if len(k_minimal) != 0 else lattice.top
+
+    log("[LOG] Evaluated {0} of {1} lattice nodes, chosen generalization levels {2}."
+        .format(lattice.evaluated, len(lattice), dict(zip(qi_names, node))), endl=True, enabled=v)
+
+    if stats is not None:
+        stats["evaluated_nodes"] = stats.get("evaluated_nodes", 0) + lattice.evaluated
+        stats["lattice_nodes"] = stats.get("lattice_nodes", 0) + len(lattice)
+
+    # Group the rows by their generalized sequences
+    groups = dict()
+    for sequence, rows in sequences.items():
+        groups.setdefault(lattice.generalize(sequence, node), []).extend(rows)
+
+    log("[LOG] Suppressed {0} tuples.".format(lattice.suppressed(node)), endl=True, enabled=v)
+
+    # Drop tuples which occur less than k times:
+    return [(qi_anonymized, sorted(rows)) for qi_anonymized, rows in groups.items() if len(rows) >= k]
@@ -0,0 +1,115 @@
+from utils.utils import log, strToVal
+
+
+def _split(partition: list, values: list, k: int, widths: list):
+    """
+    Splits recursively a partition on the median of its widest attribute, as long as both halves have at least
+    k tuples.
+
+    :param partition:   List of the indices of the rows of the partition sorted by each attribute, one list
+                        for each attribute.
+    :param values:      List of the columns of the values of the attributes.
+    :param k:           Level of anonymity.
+    :param widths:      List of the widths of the attributes in the whole bucket, to normalize the widths.
+    :return:            List of the partitions that can't be split, as lists of sorted indices like partition.
+    """
+
+    leaves = []
+    stack = [partition]
+
+    while len(stack) != 0:
+        partition = stack.pop()
+        n = len(partition[0])
+
+        # Attributes in order of normalized width, the widest first
+        dimensions = sorted(range(len(values)), key=lambda j: -(values[j][partition[j][-1]] -
+                                                               values[j][partition[j][0]]) / widths[j])
+
+        for j in dimensions:
+            column, rows = values[j], partition[j]
+            median = column[rows[(n - 1) // 2]]
+
+            # Number of rows on the left, with the values up to the median
+            left = (n - 1) // 2 + 1
+            while left < n and column[rows[left]] == median:
+                left += 1
+
+            if left < k or n - left < k:
+                continue
+
+            # Mark the rows on the left and split every sorted list keeping its order
+            left_rows = set(rows[:left])
+            lhs = [[i for i in sorted_rows if i in left_rows] for sorted_rows in partition]
+            rhs = [[i for i in sorted_rows if i not in left_rows] for sorted_rows in partition]
+
+            stack.append(rhs)
+            stack.append(lhs)
+            break
+        else:
+            leaves.append(partition)
+
+    return leaves
+
+
+def mondrian_groups(B, attributes: dict, qi_names: list, k: int, generic_values: dict, v=True):
+    """
+    Generalizes the numeric QI attributes of a bucket like Mondrian, without hierarchies: the tuples are
+    partitioned recursively on the median of the attribute with the widest range, and every value is replaced
+    by the range "[min,max]" of its partition (or kept if all the values of the partition are equal), which
+    stays unambiguous with negative bounds. Every attribute is sorted once, then the splits keep the order of
+    the sorted lists.
+
+    :param B:                Bucket of tuples that respect the path condition.
+    :param attributes:       Dictionary of attributes corresponding the qi to the index in the raw dataset tuples.
+    :param qi_names:         List of names of the Quasi Identifiers attributes to consider during k-anonymization.
+    :param k:                Level of anonymity.
+    :param generic_values:   Dictionary containing generalization values for Quasi Identifiers, where the ranges
+                             are added.
+    :param v:                If True prints some logging.
+    :return:                 List of couples (anonymized QI sequence, indices of its rows in B), None if a value
+                             is not a number.
+    """
+
+    if len(B) < k:
+        log("[LOG] Suppressed {0} tuples.".format(len(B)), endl=True, enabled=v)
+        return []
+
+    # Columns of the QI values, as strings and as numbers
+    texts = [[] for _ in qi_names]
+    for row in B:
+        for j, name in enumerate(qi_names):
+            texts[j].append(row[attributes[name]])
+
+    values = []
+    for j, name in enumerate(qi_names):
+        try:
+            values.append([strToVal(text, True) for text in texts[j]])
+        except ValueError:
+            log("[ERROR] Attribute '{0}' has not only numeric values, it can't be generalized without "
+                "hierarchy.".format(name), endl=True, enabled=True)
+            return
+
+    partition = [sorted(range(len(B)), key=column.__getitem__) for column in values]
+    widths = [(column[rows[-1]] - column[rows[0]]) or 1 for column, rows in zip(values, partition)]
+
+    leaves = _split(partition, values, k, widths)
+
+    log("[LOG] Split the path condition in {0} partitions.".format(len(leaves)), endl=True, enabled=v)
+
+    groups = []
+    for leaf in leaves:
+        qi_anonymized = []
+        for j, name in enumerate(qi_names):
+            low, high = texts[j][leaf[j][0]], texts[j][leaf[j][-1]]
+            if values[j][leaf[j][0]] == values[j][leaf[j][-1]]:
+                qi_anonymized.append(low)
+            else:
+                qi_anonymized.append("[{0},{1}]".format(low, high))
+                # The range is a generic value of the attribute
+                generic_values.setdefault(name, set()).add(qi_anonymized[-1])
+        groups.append((tuple(qi_anonymized), sorted(leaf[0])))
+
+    log("[LOG] Suppressed {0} tuples.".format(len(B) - sum(len(rows) for _, rows in groups)), endl=True, enabled=v)
+
+    # The partitions in order of their first row
+    return sorted(groups, key=lambda group: group[1][0])
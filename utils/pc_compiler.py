@@ -0,0 +1,293 @@
+import argparse
+import ast
+from array import array
+import inspect
+from importlib import import_module
+
+import numpy as np
+
+
+_COMPARE_OPS = {
+    ast.Eq: "==",
+    ast.NotEq: "!=",
+    ast.Lt: "<",
+    ast.LtE: "<=",
+    ast.Gt: ">",
+    ast.GtE: ">=",
+}
+
+
+def pc_start(t: dict):
+    """
+    Starts the evaluation of a batch: a single branch that contains all the rows, with an empty path condition.
+
+    :param t:   Dictionary whose keys are the attributes names and whose values are the columns of the batch.
+    :return:    List of branches (mask, pc), where mask selects the rows of the branch.
+    """
+
+    n = len(next(iter(t.values()))) if len(t) != 0 else 0
+    return [(np.ones(n, dtype=bool), ())]
+
+
+def pc_split(branches: list, cond):
+    """
+    Splits every branch on a condition, dropping the branches without rows.
+
+    :param branches:    List of branches (mask, pc).
+    :param cond:        Boolean mask of the rows that satisfy the condition.
+    :return:            Couple of lists of branches, the first where the condition is True, the second where it's False.
+    """
+
+    cond = np.asarray(cond, dtype=bool)
+    branches_true, branches_false = [], []
+
+    for mask, pc in branches:
+        mask_true = mask & cond
+        mask_false = mask & ~cond
+        if mask_true.any():
+            branches_true.append((mask_true, pc))
+        if mask_false.any():
+            branches_false.append((mask_false, pc))
+
+    return branches_true, branches_false
+
+
+def pc_append(branches: list, condition: tuple):
+    """
+    Appends a condition to the path condition of every branch.
+
+    :param branches:    List of branches (mask, pc).
+    :param condition:   Condition (attribute, operator, value) to append.
+    :return:            List of the updated branches.
+    """
+
+    return [(mask, pc + (condition,)) for mask, pc in branches]
+
+
+def pc_finish(branches: list, t: dict):
+    """
+    Ends the evaluation of a batch, assigning to every row the id of its path condition.
+
+    :param branches:    List of branches (mask, pc).
+    :param t:           Dictionary whose keys are the attributes names and whose values are the columns of the batch.
+    :return:            Couple (ids, pcs), where ids is the array of the path condition ids of the rows (-1 if the
+                        row has an empty path condition) and pcs is the list of the path conditions of the ids.
+    """
+
+    n = len(next(iter(t.values()))) if len(t) != 0 else 0
+    ids = np.full(n, -1, dtype=np.int64)
+    pcs = []
+    pc_ids = dict()
+
+    for mask, pc in branches:
+        if len(pc) == 0:
+            continue
+        if pc not in pc_ids:
+            pc_ids[pc] = len(pcs)
+            pcs.append(pc)
+        ids[mask] = pc_ids[pc]
+
+    return ids, pcs
+
+
+def numpy_columns(columns: dict):
+    """
+    Converts the columns of a batch to numpy arrays, as passed to exec_pc_batch. The arrays of numbers are
+    not copied.
+
+    :param columns: Dictionary whose keys are the attributes names and whose values are the columns, as arrays
+                    of numbers or lists of strings (and numbers).
+    :return:        Dictionary whose keys are the attributes names and whose values are the numpy columns.
+    """
+
+    converted = dict()
+
+    for attribute, column in columns.items():
+        if isinstance(column, array):
+            converted[attribute] = np.frombuffer(column, dtype=np.float64 if column.typecode == 'd' else np.int64)
+        elif all(isinstance(value, str) for value in column):
+            converted[attribute] = np.asarray(column)
+        else:
+            # The numbers of a column of strings are compared as numbers, like by exec_pc
+            converted[attribute] = np.asarray(column, dtype=object)
+
+    return converted
+
+
+class _Compiler:
+
+    def __init__(self, function: ast.FunctionDef):
+
+        """
+        Compiler of the decision tree of an exec_pc function to the equivalent batch function.
+
+        :param function:    Definition of the exec_pc function.
+        :raises ValueError: If the function isn't a decision tree on comparisons of the attributes.
+        """
+
+        if len(function.args.args) != 1:
+            raise ValueError("exec_pc must have a single argument.")
+
+        self.t = function.args.args[0].arg
+        """
+        Name of the argument of exec_pc, the dictionary attribute -> value.
+        """
+        self.pc = None
+        """
+        Name of the list of the path condition in exec_pc.
+        """
+        self.lines = []
+        """
+        Lines of the source of the batch function.
+        """
+        self.n_vars = 0
+        """
+        Number of the branches variables declared.
+        """
+
+        self.lines.append("def exec_pc_batch({0}: dict):".format(self.t))
+        self.lines.append("    b = pc_start({0})".format(self.t))
+        self._statements(function.body, "b", 1)
+
+    def source(self):
+
+        """
+        Gets the source of the batch function.
+        """
+
+        return "\n".join(self.lines) + "\n"
+
+    def _error(self, node, message):
+
+        return ValueError("Line {0} of exec_pc: {1}".format(getattr(node, "lineno", "?"), message))
+
+    def _statements(self, statements: list, b: str, indent: int):
+
+        """
+        Compiles a list of statements applied to the branches in the variable b.
+        """
+
+        pad = "    " * indent
+
+        for stmt in statements:
+            if isinstance(stmt, ast.Assign):
+                # pc = []
+                if len(stmt.targets) != 1 or not isinstance(stmt.targets[0], ast.Name) \
+                        or not isinstance(stmt.value, ast.List) or len(stmt.value.elts) != 0 or self.pc is not None:
+                    raise self._error(stmt, "only the initialization of the path condition list is allowed.")
+                self.pc = stmt.targets[0].id
+            elif isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call):
+                # pc.append((attribute, operator, value))
+                call = stmt.value
+                if not isinstance(call.func, ast.Attribute) or call.func.attr != "append" \
+                        or not isinstance(call.func.value, ast.Name) or call.func.value.id != self.pc \
+                        or len(call.args) != 1:
+                    raise self._error(stmt, "only the append of a condition to the path condition is allowed.")
+                try:
+                    condition = ast.literal_eval(call.args[0])
+                except ValueError:
+                    raise self._error(stmt, "the conditions of the path condition must be constants.")
+                self.lines.append("{0}{1} = pc_append({1}, {2!r})".format(pad, b, condition))
+            elif isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant):
+                # Docstrings and other constants have no effect
+                continue
+            elif isinstance(stmt, ast.Pass):
+                continue
+            elif isinstance(stmt, ast.If):
+                self.n_vars += 1
+                b_true, b_false = "b_{0}_t".format(self.n_vars), "b_{0}_f".format(self.n_vars)
+                self.lines.append("{0}{1}, {2} = pc_split({3}, {4})"
+                                  .format(pad, b_true, b_false, b, self._expr(stmt.test)))
+                self._statements(stmt.body, b_true, indent)
+                self._statements(stmt.orelse, b_false, indent)
+                self.lines.append("{0}{1} = {2} + {3}".format(pad, b, b_true, b_false))
+            elif isinstance(stmt, ast.Return):
+                if b != "b" or not isinstance(stmt.value, ast.Name) or stmt.value.id != self.pc:
+                    raise self._error(stmt, "only the return of the path condition at the end is allowed.")
+                self.lines.append("{0}return pc_finish({1}, {2})".format(pad, b, self.t))
+            else:
+                raise self._error(stmt, "statement {0} is not allowed.".format(type(stmt).__name__))
+
+    def _expr(self, node):
+
+        """
+        Compiles an expression of a condition to an expression on the columns.
+        """
+
+        if isinstance(node, ast.Constant):
+            return repr(node.value)
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) \
+                and isinstance(node.operand, ast.Constant):
+            return repr(-node.operand.value)
+        elif isinstance(node, ast.Subscript):
+            # t["attribute"]
+            key = node.slice if isinstance(node.slice, ast.Constant) else getattr(node.slice, "value", None)
+            if not isinstance(node.value, ast.Name) or node.value.id != self.t or not isinstance(key, ast.Constant):
+                raise self._error(node, "only the values of the attributes can be compared.")
+            return "{0}[{1!r}]".format(self.t, key.value)
+        elif isinstance(node, ast.Compare):
+            # Chained comparisons are conjunctions of the single comparisons
+            terms, left = [], node.left
+            for op, right in zip(node.ops, node.comparators):
+                if type(op) not in _COMPARE_OPS:
+                    raise self._error(node, "operator {0} is not allowed.".format(type(op).__name__))
+                terms.append("({0} {1} {2})".format(self._expr(left), _COMPARE_OPS[type(op)], self._expr(right)))
+                left = right
+            return " & ".join(terms) if len(terms) == 1 else "({0})".format(" & ".join(terms))
+        elif isinstance(node, ast.BoolOp):
+            op = " & " if isinstance(node.op, ast.And) else " | "
+            return "({0})".format(op.join(self._expr(value) for value in node.values))
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return "(~{0})".format(self._expr(node.operand))
+        else:
+            raise self._error(node, "expression {0} is not allowed.".format(type(node).__name__))
+
+
+def compile_exec_pc(source: str):
+    """
+    Compiles the decision tree of the exec_pc function of a subject program to the source of the equivalent
+    exec_pc_batch function, that evaluates a whole batch of rows with numpy masks.
+
+    :param source:      Source of the subject program.
+    :return:            Source of the exec_pc_batch function.
+    :raises ValueError: If exec_pc isn't found or it isn't a decision tree on comparisons of the attributes.
+    """
+
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.FunctionDef) and node.name == "exec_pc":
+            return _Compiler(node).source()
+
+    raise ValueError("Function exec_pc not found.")
+
+
+def load_exec_pc_batch(mod):
+    """
+    Gets the batch function of a subject program module: exec_pc_batch if the module defines it, otherwise
+    the compilation of its exec_pc function.
+
+    :param mod:         Module of the subject program.
+    :return:            The exec_pc_batch function.
+    :raises ValueError: If exec_pc can't be compiled.
+    :raises OSError:    If the source of the module can't be read.
+    """
+
+    if hasattr(mod, "exec_pc_batch"):
+        return getattr(mod, "exec_pc_batch")
+
+    namespace = dict(pc_start=pc_start, pc_split=pc_split, pc_append=pc_append, pc_finish=pc_finish)
+    exec(compile(compile_exec_pc(inspect.getsource(mod)), mod.__name__ + ".exec_pc_batch", "exec"), namespace)
+
+    return namespace["exec_pc_batch"]
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Compiles the exec_pc function of a subject program to the "
+                                                 "exec_pc_batch function, that works on whole columns.")
+    parser.add_argument("-sp", "--subject_program", required=True,
+                        type=str, help="Name of the module of the subject program that contains exec_pc.")
+
+    args = parser.parse_args()
+
+    print("from utils.pc_compiler import pc_start, pc_split, pc_append, pc_finish\n\n")
+    print(compile_exec_pc(inspect.getsource(import_module(args.subject_program))), end="")
@@ -0,0 +1,187 @@
+from collections import deque
+from threading import Condition, Thread
+from z3 import Context
+
+
+class _Entry:
+
+    __slots__ = ("bucket", "releases", "done", "error")
+
+    def __init__(self, bucket):
+
+        """
+        Release data of a path condition bucket submitted to a release pool.
+
+        :param bucket:  Path condition bucket, as a triple (pc, B, tuples).
+        """
+
+        self.bucket = bucket
+        """
+        Path condition bucket, as a triple (pc, B, tuples).
+        """
+        self.releases = []
+        """
+        List of the release data of the bucket already solved.
+        """
+        self.done = False
+        """
+        True when all the release data of the bucket are solved.
+        """
+        self.error = None
+        """
+        Exception raised solving the bucket, raised again when the bucket is popped.
+        """
+
+
+class ReleasePool:
+
+    def __init__(self, constraint_solver, produce, threads=1, high_water=1000):
+
+        """
+        Pool of release data solved in background threads for the path condition buckets submitted to it, so that
+        the solver works while the next buckets are still anonymized and the release data of the previous ones
+        are written. Every thread owns a copy of the constraint solver in its own Z3 context, and the threads stop
+        solving when the pool holds high_water release data not yet popped, except for the first bucket that is
+        always solved to the end.
+
+        :param constraint_solver:   Constraint solver initialized with the data constraints.
+        :param produce:             Function that takes a constraint solver and a bucket and returns the generator
+                                    of the release data of the bucket.
+        :param threads:             Number of threads that solve the buckets.
+        :param high_water:          Maximum number of release data held by the pool before the threads wait.
+        """
+
+        self.produce = produce
+        """
+        Function that takes a constraint solver and a bucket and returns the generator of its release data.
+        """
+        self.high_water = high_water
+        """
+        Maximum number of release data held by the pool before the threads wait.
+        """
+        self.size = 0
+        """
+        Number of release data solved and not yet popped.
+        """
+
+        self._condition = Condition()
+        self._entries = deque()
+        self._tasks = deque()
+        self._closed = False
+
+        # the copies are made here, since the data constraints of the main context can't be used by the threads
+        self._threads = [Thread(target=self._run, args=(constraint_solver.in_context(Context()),), daemon=True)
+                         for _ in range(threads)]
+        for thread in self._threads:
+            thread.start()
+
+    def __len__(self):
+
+        """
+        :return:    Number of buckets submitted and not yet popped.
+        """
+
+        return len(self._entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def submit(self, bucket: tuple):
+
+        """
+        Adds a path condition bucket to the buckets to solve.
+
+        :param bucket:  Path condition bucket, as a triple (pc, B, tuples).
+        """
+
+        with self._condition:
+            entry = _Entry(bucket)
+            self._entries.append(entry)
+            self._tasks.append(entry)
+            self._condition.notify_all()
+
+    def ready(self):
+
+        """
+        :return:    True if all the release data of the first bucket are solved.
+        """
+
+        with self._condition:
+            return len(self._entries) > 0 and self._entries[0].done
+
+    def full(self):
+
+        """
+        :return:    True if the pool holds at least high_water release data.
+        """
+
+        with self._condition:
+            return self.size >= self.high_water
+
+    def pop(self):
+
+        """
+        Removes the first bucket submitted, waiting for all its release data.
+
+        :return:    Couple (bucket, list of the release data of the bucket).
+        """
+
+        with self._condition:
+            entry = self._entries[0]
+            while not entry.done:
+                self._condition.wait()
+            self._entries.popleft()
+            self.size -= len(entry.releases)
+            self._condition.notify_all()
+
+        if entry.error is not None:
+            raise entry.error
+        return entry.bucket, entry.releases
+
+    def close(self):
+
+        """
+        Stops the threads, discarding the buckets not yet solved.
+        """
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self, constraint_solver):
+
+        """
+        Solves the submitted buckets one after the other until the pool is closed.
+
+        :param constraint_solver:   Constraint solver of the thread.
+        """
+
+        while True:
+            with self._condition:
+                while not self._tasks and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                entry = self._tasks.popleft()
+
+            try:
+                for r in self.produce(constraint_solver, entry.bucket):
+                    with self._condition:
+                        # the first bucket is never stopped, otherwise pop would wait for it forever
+                        while self.size >= self.high_water and entry is not self._entries[0] and not self._closed:
+                            self._condition.wait()
+                        if self._closed:
+                            return
+                        entry.releases.append(r)
+                        self.size += 1
+            except Exception as e:
+                entry.error = e
+
+            with self._condition:
+                entry.done = True
+                self._condition.notify_all()
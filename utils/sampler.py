@@ -0,0 +1,428 @@
+from itertools import chain
+
+INDEX_MAX_SIZE = 1 << 22
+"""
+Maximum number of values of a domain indexed by an exclusion index, whose bitmap takes one byte for every value;
+wider domains are scanned value by value.
+"""
+
+
+class Domain:
+
+    __slots__ = ("lo", "hi", "allowed", "excluded")
+
+    def __init__(self):
+
+        """
+        Represents the values admitted for an attribute by constraints on that attribute only: an interval, an
+        optional set of allowed values and a set of excluded values.
+        """
+
+        self.lo = None
+        """
+        Lowest admitted value, None if the domain is unbounded below.
+        """
+        self.hi = None
+        """
+        Highest admitted value, None if the domain is unbounded above.
+        """
+        self.allowed = None
+        """
+        Set of the only admitted values, None if every value of the interval is admitted.
+        """
+        self.excluded = set()
+        """
+        Set of the values that are not admitted.
+        """
+
+    def copy(self):
+
+        """
+        Copies the domain, so that constraints can be added to the copy without changing it.
+
+        :return:    The copy of the domain.
+        """
+
+        domain = Domain()
+        domain.lo, domain.hi, domain.excluded = self.lo, self.hi, set(self.excluded)
+        domain.allowed = None if self.allowed is None else set(self.allowed)
+        return domain
+
+    def add(self, op: str, val):
+
+        """
+        Restricts the domain with a constraint of its attribute.
+
+        :param op:  Operator string.
+        :param val: Value, or tuple of values for the in and not in operators.
+        :return:    False if the operator isn't supported, so the domain can't represent the constraint.
+        """
+
+        if op == "==":
+            self.add_values((val,))
+        elif op == "in":
+            self.add_values(val)
+        elif op == "!=":
+            self.excluded.add(val)
+        elif op == ">=":
+            self.lo = val if self.lo is None else max(self.lo, val)
+        elif op == ">":
+            self.lo = val + 1 if self.lo is None else max(self.lo, val + 1)
+        elif op == "<=":
+            self.hi = val if self.hi is None else min(self.hi, val)
+        elif op == "<":
+            self.hi = val - 1 if self.hi is None else min(self.hi, val - 1)
+        elif op == "not in":
+            self.excluded.update(val)
+        else:
+            return False
+        return True
+
+    def add_values(self, values):
+
+        """
+        Restricts the domain to one of some values.
+
+        :param values:  Iterable of the allowed values.
+        """
+
+        self.allowed = set(values) if self.allowed is None else self.allowed.intersection(values)
+
+
+class ExclusionIndex:
+
+    def __init__(self, lo: int, hi: int, excluded):
+
+        """
+        Index of the admissible values of a bounded domain, built in one pass over its excluded values: a bitmap
+        with a byte for every value of the interval, zero if the value is admissible, so that the next
+        admissible value is found by a single search of the bitmap instead of checking the values one by one.
+
+        :param lo:          Lowest value of the domain.
+        :param hi:          Highest value of the domain.
+        :param excluded:    Iterable of the excluded values.
+        """
+
+        self.lo = lo
+        """
+        Lowest value of the domain, corresponding to the first byte of the bitmap.
+        """
+        self.bitmap = bytearray(max(hi - lo + 1, 0))
+        """
+        Bitmap of the excluded or blocked values.
+        """
+
+        for val in excluded:
+            if lo <= val <= hi:
+                self.bitmap[val - lo] = 1
+
+        self._excluded = bytes(self.bitmap)
+
+    def next(self, start: int, stop: int):
+
+        """
+        Gets the lowest admissible value in an interval of the domain.
+
+        :param start:   Lowest value of the interval.
+        :param stop:    Highest value of the interval.
+        :return:        The value, None if there isn't one.
+        """
+
+        i = self.bitmap.find(0, max(start - self.lo, 0), max(stop - self.lo + 1, 0))
+        return None if i < 0 else self.lo + i
+
+    def admits(self, val: int):
+
+        """
+        Checks if a value of the domain is admissible.
+
+        :param val:     Value to check.
+        :return:        True if the value is neither excluded nor blocked.
+        """
+
+        return 0 <= val - self.lo < len(self.bitmap) and self.bitmap[val - self.lo] == 0
+
+    def block(self, val: int):
+
+        """
+        Blocks a value of the domain, so that it's no longer admissible.
+
+        :param val:     Value to block.
+        """
+
+        if 0 <= val - self.lo < len(self.bitmap):
+            self.bitmap[val - self.lo] = 1
+
+    def unblock(self):
+
+        """
+        Cleans all the blocked values, keeping the excluded ones.
+        """
+
+        self.bitmap[:] = self._excluded
+
+
+class DomainSampler:
+
+    def __init__(self, domains: dict = None):
+
+        """
+        Sampler of the values of attributes whose constraints are all on single attributes, so that every
+        attribute is chosen independently from its own domain instead of solving the constraints with Z3.
+        The sampler is deterministic: every attribute takes the lowest value admitted by its domain that
+        hasn't been blocked.
+
+        :param domains: Dictionary whose keys are the attributes names and whose values are their domains.
+        """
+
+        self.domains = dict() if domains is None else domains
+        """
+        Dictionary whose keys are the attributes names and whose values are their domains.
+        """
+        self.blocked = dict()
+        """
+        Dictionary whose keys are the attributes names and whose values are the sets of the values already
+        released, which can't be sampled again until they are unblocked.
+        """
+        self._indices = dict()
+        self._exclusions = dict()
+        self._cursors = dict()
+
+    def domain(self, attr: str):
+
+        """
+        Gets the domain of an attribute, adding an unbounded domain if the attribute has none.
+
+        :param attr:    Attribute name.
+        :return:        The domain of the attribute.
+        """
+
+        domain = self.domains.get(attr)
+        if domain is None:
+            domain = self.domains[attr] = Domain()
+        return domain
+
+    def restrict(self, constraints: list):
+
+        """
+        Copies the sampler with more constraints, without the blocked values.
+
+        :param constraints: List of triples (attribute, operator, value) with values already converted to int.
+        :return:            The new sampler, None if a constraint isn't supported.
+        """
+
+        sampler = DomainSampler(dict((attr, domain.copy()) for attr, domain in self.domains.items()))
+        for attr, op, val in constraints:
+            if not sampler.domain(attr).add(op, val):
+                return None
+        return sampler
+
+    @staticmethod
+    def constraint_domains(constraints: list):
+
+        """
+        Gets the domains of some constraints alone, to sample once with them on top of the domains of the sampler.
+
+        :param constraints: List of triples (attribute, operator, value) with values already converted to int.
+        :return:            Dictionary whose keys are the attributes names and whose values are their domains,
+                            None if a constraint isn't supported.
+        """
+
+        domains = dict()
+        for attr, op, val in constraints:
+            domain = domains.get(attr)
+            if domain is None:
+                domain = domains[attr] = Domain()
+            if not domain.add(op, val):
+                return None
+        return domains
+
+    def exclude(self, attr: str, values):
+
+        """
+        Indexes values of an attribute that the next samples can exclude, so that the exclusion is indexed
+        once for all the samples instead of being added to the domains of each sample.
+
+        :param attr:    Attribute name.
+        :param values:  Iterable of the values to exclude.
+        :return:        False if the domain of the attribute can't be indexed.
+        """
+
+        base = self.domains.get(attr)
+        if not self._indexable(base):
+            return False
+
+        index = ExclusionIndex(base.lo, base.hi, chain(base.excluded, values))
+        for val in self.blocked.get(attr, ()):
+            index.block(val)
+        self._exclusions[attr] = index
+        return True
+
+    def sample(self, extra: dict = None, excluding=()):
+
+        """
+        Samples a value for every attribute.
+
+        :param extra:       Dictionary of domains that restrict further the attributes for this sample only.
+        :param excluding:   Attributes whose values indexed by exclude are excluded for this sample only.
+        :return:            Dictionary whose keys are the attributes names and whose values are the sampled
+                            values, None if an attribute has no admitted value.
+        """
+
+        values = dict()
+        for attr in self.domains:
+            val = self._first(attr, None if extra is None else extra.get(attr), attr in excluding)
+            if val is None:
+                return None
+            values[attr] = val
+
+        if extra is not None:
+            for attr in extra:
+                if attr not in self.domains:
+                    val = self._first(attr, extra[attr])
+                    if val is None:
+                        return None
+                    values[attr] = val
+
+        return values
+
+    def block(self, attr: str, val: int):
+
+        """
+        Blocks a value of an attribute for the next samples.
+
+        :param attr:    Attribute name.
+        :param val:     Value to block.
+        """
+
+        blocked = self.blocked.get(attr)
+        if blocked is None:
+            blocked = self.blocked[attr] = set()
+        blocked.add(val)
+
+        for indices in (self._indices, self._exclusions):
+            index = indices.get(attr)
+            if index is not None:
+                index.block(val)
+
+    def unblock(self):
+
+        """
+        Cleans all the blocked values.
+        """
+
+        self.blocked = dict()
+        self._cursors = dict()
+        for index in chain(self._indices.values(), self._exclusions.values()):
+            if index is not None:
+                index.unblock()
+
+    def _first(self, attr: str, extra: Domain = None, excluding=False):
+
+        """
+        Gets the lowest admitted value of an attribute which isn't blocked.
+
+        :param attr:        Attribute name.
+        :param extra:       Domain that restricts further the attribute, None if there isn't one.
+        :param excluding:   If True the values of the attribute indexed by exclude aren't admitted.
+        :return:            The value, None if the attribute has no admitted value.
+        """
+
+        base = self.domains.get(attr)
+        if base is None:
+            base = Domain()
+
+        if excluding:
+            index = self._exclusions[attr]
+        else:
+            index = self._indices[attr] if attr in self._indices else self._index(attr, base)
+        if index is not None and extra is None:
+            return index.next(base.lo, base.hi)
+
+        blocked = self.blocked.get(attr, ())
+        lo, hi, allowed = base.lo, base.hi, base.allowed
+        if extra is not None:
+            if extra.lo is not None:
+                lo = extra.lo if lo is None else max(lo, extra.lo)
+            if extra.hi is not None:
+                hi = extra.hi if hi is None else min(hi, extra.hi)
+            if extra.allowed is not None:
+                allowed = extra.allowed if allowed is None else allowed & extra.allowed
+
+        def admitted(val):
+            if index is not None:
+                # the index has the excluded and blocked values of the base domain
+                if not index.admits(val):
+                    return False
+            elif val in base.excluded or val in blocked:
+                return False
+            return extra is None or val not in extra.excluded
+
+        if allowed is not None:
+            for val in sorted(allowed):
+                if (lo is None or val >= lo) and (hi is None or val <= hi) and admitted(val):
+                    return val
+            return None
+
+        if index is not None:
+            val = index.next(lo, hi)
+            while val is not None and val in extra.excluded:
+                val = index.next(val + 1, hi)
+            return val
+
+        if lo is None:
+            # Only finitely many values are excluded, so an unbounded domain has always a value
+            if hi is None:
+                lo = 0
+            else:
+                val = hi
+                while not admitted(val):
+                    val -= 1
+                return val
+
+        # All the values of a domain too wide to be indexed, from the lowest one of the attribute up to its
+        # cursor, are excluded or blocked, so the next samples skip them; a cursor is kept only while the values
+        # blocked before are kept
+        cursor = self._cursors.get(attr, base.lo) if base.lo is not None else None
+        val = lo if cursor is None else max(lo, cursor)
+        while hi is None or val <= hi:
+            if val in base.excluded or val in blocked:
+                if val == cursor:
+                    cursor += 1
+                    self._cursors[attr] = cursor
+            elif extra is None or val not in extra.excluded:
+                return val
+            val += 1
+        return None
+
+    def _index(self, attr: str, base: Domain):
+
+        """
+        Gets the exclusion index of an attribute, building it on the first sample of the attribute.
+
+        :param attr:    Attribute name.
+        :param base:    Domain of the attribute.
+        :return:        The exclusion index, None if the domain is unbounded, too wide or restricted to a set.
+        """
+
+        if attr not in self._indices:
+            index = None
+            if self._indexable(base):
+                index = ExclusionIndex(base.lo, base.hi, base.excluded)
+                for val in self.blocked.get(attr, ()):
+                    index.block(val)
+            self._indices[attr] = index
+        return self._indices[attr]
+
+    @staticmethod
+    def _indexable(base: Domain):
+
+        """
+        Checks if a domain can be indexed by an exclusion index.
+
+        :param base:    Domain of the attribute, None if the attribute has none.
+        :return:        True if the domain is bounded, not too wide and not restricted to a set.
+        """
+
+        return base is not None and base.lo is not None and base.hi is not None and base.allowed is None \
+            and base.hi - base.lo < INDEX_MAX_SIZE
@@ -0,0 +1,118 @@
+import argparse
+import csv
+from time import perf_counter
+from z3 import Solver, sat
+from modules.constraint_solver import ConstraintSolver
+
+
+def _time(function, repeat: int):
+    """
+    Gets the mean time of a function in milliseconds.
+
+    :param function:    Function without arguments to time.
+    :param repeat:      Number of calls of the function.
+    :return:            Mean time of a call in milliseconds.
+    """
+
+    start = perf_counter()
+    for _ in range(repeat):
+        function()
+    return (perf_counter() - start) / repeat * 1000
+
+
+def _enumerate(constraint_solver: ConstraintSolver, n: int):
+    """
+    Gets release data from a solver with only the data constraints, blocking the values of every release data
+    like for the tuples of a path condition.
+
+    :param constraint_solver:   Constraint solver initialized with the data constraints.
+    :param n:                   Number of release data.
+    """
+
+    solver = Solver()
+    solver.add(constraint_solver.data_formula)
+    constraint_solver.used_constraints = []
+    for _ in range(n):
+        if solver.check() != sat:
+            break
+        n_used = len(constraint_solver.used_constraints)
+        constraint_solver.find_release_raw(solver)
+        for (attr, op, val) in constraint_solver.used_constraints[n_used:]:
+            solver.add(constraint_solver.get_scaled_constraint(attr, op, int(val)))
+
+
+def benchmark(attributes: tuple, data_constraints: str, repeat=1000, releases=100):
+    """
+    Measures the cost of the setup of a solver with the data constraints: added one by one like before they were
+    compiled, added as the single compiled formula, and parsed from the SMT-LIB2 format like in a worker process.
+    Then it measures the cost of release data solved with all the attributes as integers and with the bounded
+    attributes as bit-vectors.
+
+    :param attributes:          Name attributes of raw dataset.
+    :param data_constraints:    Path to the file that contains data constraints.
+    :param repeat:              Number of solvers created for every measure.
+    :param releases:            Number of release data solved for every sort.
+    :return:                    List of couples (name of the measure, mean time in milliseconds).
+    """
+
+    constraint_solver = ConstraintSolver(attributes, data_constraints, dict())
+    smt2 = constraint_solver.to_smt2()
+
+    def separate(check):
+        solver = Solver()
+        for dc in constraint_solver.data_constraints:
+            solver.add(dc)
+        if check:
+            solver.check()
+
+    def single(check):
+        solver = Solver()
+        solver.add(constraint_solver.data_formula)
+        if check:
+            solver.check()
+
+    def parsed(check):
+        solver = Solver()
+        solver.add(ConstraintSolver.from_smt2(smt2))
+        if check:
+            solver.check()
+
+    results = [("compile data constraints", _time(lambda: ConstraintSolver(attributes, data_constraints, dict()),
+                                                  max(repeat // 10, 1)))]
+    for check in (False, True):
+        suffix = " + first check" if check else ""
+        results.append(("{0} assertions{1}".format(len(constraint_solver.data_constraints), suffix),
+                        _time(lambda: separate(check), repeat)))
+        results.append(("single formula{0}".format(suffix), _time(lambda: single(check), repeat)))
+        results.append(("formula from SMT-LIB2{0}".format(suffix), _time(lambda: parsed(check), repeat)))
+
+    bv_solver = ConstraintSolver(attributes, data_constraints, dict(), sorts=dict((attr, "bitvec")
+                                                                                  for attr in attributes))
+    results.append(("{0} releases with int sorts".format(releases),
+                    _time(lambda: _enumerate(constraint_solver, releases), max(repeat // 100, 1))))
+    results.append(("{0} releases with bit-vector sorts".format(releases),
+                    _time(lambda: _enumerate(bv_solver, releases), max(repeat // 100, 1))))
+
+    return results
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Measures the setup cost of a solver with the data constraints "
+                                                 "added one by one or as a single compiled formula, and the cost "
+                                                 "of release data with int or bit-vector sorts.")
+    parser.add_argument("-rd", "--raw_dataset", required=True,
+                        type=str, help="Path to the CSV table whose first row contains the attributes names.")
+    parser.add_argument("-dc", "--data_constraints", required=True,
+                        type=str, help="Path to the data constraints that contains constraints of data for the solver.")
+    parser.add_argument("-n", "--repeat", type=int, default=1000, help="Number of solvers for every measure.")
+    parser.add_argument("-r", "--releases", type=int, default=100,
+                        help="Number of release data solved for every sort.")
+
+    args = parser.parse_args()
+
+    with open(args.raw_dataset, newline='') as file:
+        header = tuple(next(csv.reader(file)))
+
+    for name, milliseconds in benchmark(header, args.data_constraints, args.repeat, args.releases):
+        print("{0:<40}{1:>10.3f} ms".format(name, milliseconds))
@@ -0,0 +1,413 @@
+import os
+import pickle
+from array import array
+from tempfile import mkstemp
+from utils.encoder import StringEncoder
+from utils.utils import strTypeVal
+
+
+class ColumnarTable:
+
+    def __init__(self, attributes: dict, string_dict: dict = None, types: list = None):
+
+        """
+        In-memory table stored by columns: the type of each column is inferred once, integers and
+        decimals are stored in typed arrays and strings are stored as the codes of the encoder of their
+        attribute.
+
+        :param attributes:  Dictionary whose keys are the table attributes names and whose values are the
+                            corresponding column indices.
+        :param string_dict: Dictionary of the encoders of the attributes that contains only strings, shared
+                            with the other tables of the same dataset.
+        :param types:       List of the types of the columns ("int", "float" or "str"), inferred from the
+                            first row if not given.
+        """
+
+        self.attributes = attributes
+        """
+        Dictionary whose keys are the table attributes names and whose values are the corresponding
+        column indices.
+        """
+        self.string_dict = string_dict if string_dict is not None else dict()
+        """
+        Dictionary whose keys are the attributes that contains only strings and whose values are the
+        encoders of their domains.
+        """
+        self.types = None
+        """
+        List of the types of the columns ("int", "float" or "str").
+        """
+        self.columns = None
+        """
+        List of the columns, as arrays of integers, decimals or string codes.
+        """
+        self.texts = None
+        """
+        List of dictionaries, one for each column, whose keys are the indices of the numeric values that
+        aren't written in their canonical form in the table file (e.g. zip codes with leading zeros) and whose
+        values are the original strings.
+        """
+        self._names = list(attributes.keys())
+
+        if types is not None:
+            self._init_columns(types)
+
+    def _init_columns(self, types: list):
+
+        """
+        Instantiates the empty columns of the given types.
+
+        :param types:   List of the types of the columns ("int", "float" or "str").
+        """
+
+        self.types = list(types)
+        self.columns = []
+        self.texts = [dict() for _ in self.types]
+
+        for n, column_type in enumerate(self.types):
+            if column_type == "str":
+                self.string_dict.setdefault(self._names[n], StringEncoder())
+                self.columns.append(array('q'))
+            elif column_type == "float":
+                self.columns.append(array('d'))
+            else:
+                self.columns.append(array('q'))
+
+    def __len__(self):
+
+        return len(self.columns[0]) if self.columns else 0
+
+    def __getstate__(self):
+
+        """
+        Gets the state of the table to pickle it, without the string encoders: they are shared by all the tables
+        of the dataset, so a process that receives many tables gets them only once and sets them with
+        share_strings.
+        """
+
+        state = self.__dict__.copy()
+        state["string_dict"] = None
+        return state
+
+    def share_strings(self, string_dict: dict):
+
+        """
+        Sets the string encoders of an unpickled table.
+
+        :param string_dict: Dictionary of the encoders of the attributes that contains only strings, shared
+                            with the other tables of the same dataset.
+        :return:            The table.
+        """
+
+        self.string_dict = string_dict
+        return self
+
+    def __getitem__(self, i: int):
+
+        """
+        Gets a row of the table as a list of strings, like it is read from the table file.
+        """
+
+        row = []
+
+        for n, column in enumerate(self.columns):
+            if self.types[n] == "str":
+                row.append(self.string_dict[self._names[n]].decode(column[i]))
+            else:
+                text = self.texts[n].get(i)
+                row.append(text if text is not None else str(column[i]))
+
+        return row
+
+    def __iter__(self):
+
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, row: list):
+
+        """
+        Appends a row of strings to the table, converting each value to the type of its column. The row is
+        appended only if all its values can be converted, so a wrong row doesn't change the table.
+
+        :param row:         List of the values of the row, as read from the table file.
+        :raises ValueError: If the row hasn't a value for every column or a value of a numeric column is not a
+                            number.
+        """
+
+        # The types of the columns are inferred on the first row
+        if self.columns is None:
+            self._init_columns([strTypeVal(val) for val in row])
+
+        if len(row) != len(self.types):
+            raise ValueError("The row has {0} values instead of {1}.".format(len(row), len(self.types)))
+
+        i = len(self)
+
+        for n, val in enumerate(row):
+            column_type = self.types[n]
+            if column_type == "str":
+                self.columns[n].append(self.string_dict[self._names[n]].add(val))
+                continue
+            try:
+                if column_type == "int":
+                    try:
+                        value = int(val)
+                    except ValueError:
+                        value = float(val)
+                        # The column contains decimals, so it's converted once to a column of decimals
+                        self._to_float(n)
+                else:
+                    value = float(val)
+            except ValueError:
+                # Remove the values of the row already appended
+                for m in range(n):
+                    del self.columns[m][i:]
+                    self.texts[m].pop(i, None)
+                raise ValueError("Value '{0}' of attribute {1} isn't a number.".format(val, self._names[n]))
+            self.columns[n].append(value)
+            if str(value) != val:
+                self.texts[n][i] = val
+
+    def _to_float(self, n: int):
+
+        """
+        Converts a column of integers to a column of decimals, keeping the original strings of the
+        integers already stored.
+
+        :param n:   Index of the column.
+        """
+
+        self.types[n] = "float"
+        for j, integer in enumerate(self.columns[n]):
+            self.texts[n].setdefault(j, str(integer))
+        self.columns[n] = array('d', self.columns[n])
+
+    def extend(self, table, indices=None):
+
+        """
+        Appends some rows of another table of the same dataset, whose strings are encoded with the same
+        encoders, without converting again their values.
+
+        :param table:   Table whose rows are appended.
+        :param indices: Indices of the rows of the other table to append, all the rows if None.
+        """
+
+        if table.columns is None:
+            return
+        if self.columns is None:
+            self._init_columns(table.types)
+        if indices is None:
+            indices = range(len(table))
+
+        offset = len(self)
+
+        for n, column in enumerate(table.columns):
+            if self.types[n] == "int" and table.types[n] == "float":
+                self._to_float(n)
+            self.columns[n].extend(column[i] for i in indices)
+
+            if self.types[n] == "float" and table.types[n] == "int":
+                # The integers appended to a column of decimals keep their original strings
+                for j, i in enumerate(indices):
+                    self.texts[n][offset + j] = table.texts[n].get(i, str(column[i]))
+            elif len(table.texts[n]) != 0:
+                texts = table.texts[n]
+                for j, i in enumerate(indices):
+                    if i in texts:
+                        self.texts[n][offset + j] = texts[i]
+
+    def decimals(self):
+
+        """
+        Gets the number of decimals of the values of every column of decimals, as the values are written in
+        their shortest form.
+
+        :return:    Dictionary whose keys are the attributes of the columns of decimals and whose values are
+                    the maximum numbers of decimals of their values.
+        """
+
+        decimals = dict()
+
+        for n, column in enumerate(self.columns or []):
+            if self.types[n] == "float":
+                # Every distinct value is counted once, without the exponent of the values like 1e-05
+                digits = 0
+                for value in set(column):
+                    text = repr(value)
+                    mantissa, _, exponent = text.partition('e')
+                    digits = max(digits, len(mantissa.partition('.')[2].rstrip('0')) - int(exponent or 0))
+                decimals[self._names[n]] = digits
+
+        return decimals
+
+    def values(self, i: int):
+
+        """
+        Gets a row of the table with every value converted to its type.
+
+        :param i:   Index of the row.
+        :return:    List of the values of the row (integers, decimals or strings).
+        """
+
+        row = []
+
+        for n, column in enumerate(self.columns):
+            if self.types[n] == "str":
+                row.append(self.string_dict[self._names[n]].typed_values()[column[i]])
+            else:
+                row.append(column[i])
+
+        return row
+
+    def decoded_columns(self):
+
+        """
+        Gets all the columns of the table with the strings decoded. Like every value of the table file, the
+        numbers of a column of strings are converted to int or float.
+
+        :return:    Dictionary whose keys are the attributes names and whose values are the columns, as arrays
+                    of numbers or lists of strings (and numbers).
+        """
+
+        columns = dict()
+
+        for attribute, n in self.attributes.items():
+            if self.types[n] == "str":
+                values = self.string_dict[attribute].typed_values()
+                columns[attribute] = [values[code] for code in self.columns[n]]
+            else:
+                columns[attribute] = self.columns[n]
+
+        return columns
+
+    def column(self, attribute: str):
+
+        """
+        Gets a column of the table.
+
+        :param attribute:   Name of the attribute of the column.
+        :return:            Array of the column, where the strings are represented by their codes.
+        """
+
+        return self.columns[self.attributes[attribute]]
+
+    def take(self, indices: list):
+
+        """
+        Builds a new table with a subset of the rows of this table.
+
+        :param indices: Indices of the rows to take, in the order of the new table.
+        :return:        The new table, sharing the string encoders with this one.
+        """
+
+        table = ColumnarTable(self.attributes, self.string_dict, self.types)
+        table.extend(self, indices)
+
+        return table
+
+
+class SpilledTable:
+
+    def __init__(self, spill_dir: str, attributes: dict, string_dict: dict, types: list):
+
+        """
+        Table stored on disk by chunks of rows, used to spill a bucket while the table file is read: every chunk
+        is appended to the file of the table as soon as it's added, and the whole table is loaded in memory only
+        when it's processed. The chunks are stored like columnar tables, with the codes of the strings.
+
+        :param spill_dir:   Path to the directory of the file of the table.
+        :param attributes:  Dictionary whose keys are the table attributes names and whose values are the
+                            corresponding column indices.
+        :param string_dict: Dictionary of the encoders of the attributes that contains only strings, shared
+                            with the other tables of the same dataset, kept in memory.
+        :param types:       List of the types of the columns ("int", "float" or "str").
+        :raises IOError:    If the file cannot be created.
+        """
+
+        self.attributes = attributes
+        """
+        Dictionary whose keys are the table attributes names and whose values are the corresponding
+        column indices.
+        """
+        self.string_dict = string_dict
+        """
+        Dictionary whose keys are the attributes that contains only strings and whose values are the
+        encoders of their domains.
+        """
+        self.types = list(types)
+        """
+        List of the types of the columns of the first chunk.
+        """
+        self.path = None
+        """
+        Path to the file of the chunks, None when the table has been loaded or discarded.
+        """
+        self._len = 0
+
+        file, self.path = mkstemp(suffix=".bucket", dir=spill_dir)
+        os.close(file)
+
+    def __len__(self):
+
+        return self._len
+
+    def __del__(self):
+
+        self.discard()
+
+    def extend(self, table: ColumnarTable, indices=None):
+
+        """
+        Appends some rows of a table of the same dataset to the file, as a new chunk.
+
+        :param table:       Table whose rows are appended.
+        :param indices:     Indices of the rows of the other table to append, all the rows if None.
+        :raises IOError:    If the file cannot be written.
+        """
+
+        chunk = ColumnarTable(self.attributes, types=table.types)
+        chunk.extend(table, indices)
+
+        with open(self.path, 'ab') as file:
+            pickle.dump((chunk.types, chunk.columns, chunk.texts), file, pickle.HIGHEST_PROTOCOL)
+
+        self._len += len(chunk)
+
+    def load(self):
+
+        """
+        Loads the table in memory and removes its file.
+
+        :return:            Columnar table of all the rows, sharing the string encoders of the dataset.
+        :raises IOError:    If the file cannot be read.
+        """
+
+        table = ColumnarTable(self.attributes, self.string_dict, self.types)
+
+        with open(self.path, 'rb') as file:
+            while True:
+                try:
+                    types, columns, texts = pickle.load(file)
+                except EOFError:
+                    break
+                chunk = ColumnarTable(self.attributes, types=types)
+                chunk.columns, chunk.texts = columns, texts
+                table.extend(chunk)
+
+        self.discard()
+
+        return table
+
+    def discard(self):
+
+        """
+        Removes the file of the table.
+        """
+
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
@@ -0,0 +1,99 @@
+import csv
+import gzip
+
+
+class CsvReleaseWriter:
+
+    def __init__(self, output: str, batch_size=1000):
+
+        """
+        Writer of the release data to a CSV file, compressed with gzip if its name ends with ".gz". The rows are
+        buffered and written by batches with a csv writer, which quotes the values that contain commas or quotes,
+        and the file is flushed after every batch so that it grows while the release data are generated.
+
+        :param output:      Path to the output file.
+        :param batch_size:  Number of rows buffered before writing them to the file.
+        :raises IOError:    If the file cannot be written.
+        """
+
+        self.file = gzip.open(output, 'wt', newline='') if output.endswith(".gz") \
+            else open(output, 'w', newline='')
+        """
+        Reference to the output file.
+        """
+        self.csv_writer = csv.writer(self.file, lineterminator='\n')
+        """
+        Writer of the rows of the output file.
+        """
+        self.batch_size = batch_size
+        """
+        Number of rows buffered before writing them to the file.
+        """
+        self.fields = None
+        """
+        List of the names of the attributes of the release data, written in the first row of the file.
+        """
+        self.rows = []
+        """
+        List of the rows buffered and not yet written.
+        """
+        self.count = 0
+        """
+        Number of release data written to the file.
+        """
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self.close()
+
+    def write(self, release: list):
+
+        """
+        Adds release data to the file, writing the buffered rows when they are at least batch size.
+
+        :param release:     List of release data, as dictionaries whose keys are the attributes names and whose
+                            values are the corresponding values.
+        :raises IOError:    If the file cannot be written.
+        """
+
+        if len(release) == 0:
+            return
+
+        if self.fields is None:
+            # The header is the attributes of the first release data, in the order of the solver
+            self.fields = list(release[0].keys())
+            self.csv_writer.writerow(self.fields)
+
+        self.rows.extend(data.values() for data in release)
+
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+
+        """
+        Writes the buffered rows to the file.
+
+        :raises IOError:    If the file cannot be written.
+        """
+
+        self.csv_writer.writerows(self.rows)
+        self.count += len(self.rows)
+        self.rows = []
+        self.file.flush()
+
+    def close(self):
+
+        """
+        Writes the buffered rows and closes the file.
+
+        :raises IOError:    If the file cannot be written.
+        """
+
+        if not self.file.closed:
+            self.flush()
+            self.file.close()